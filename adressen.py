@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Adress-Normalisierung vor der Geocodierung
+Schreibweisen von Straße und Hausnummer werden vereinheitlicht ("Hauptstr. 12 a" →
+"Hauptstraße 12a"), Tippvarianten derselben Adresse innerhalb einer PLZ und mit gleicher
+Hausnummer ("Hauptstarße 12" / "Hauptstraße 12") zusammengeführt. Jede Einrichtung wird
+so nur einmal geocodiert und geroutet, statt für jede Variante Nominatim und den
+PLZ-Fallback zu bemühen. Die Zusammenführungen landen als Bericht im Sheet "Adressen".
+"""
+
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Spalten des Berichts (Sheet "Adressen")
+BERICHT_SPALTEN = ['PLZ', 'Adresse', 'Vereinheitlicht', 'Schülerinnen', 'Einrichtungen', 'Ähnlichkeit']
+
+# "Str.", "Str", "Strasse" als Wortende oder eigenes Wort (vor Leerzeichen, Komma, Hausnummer oder Ende)
+_STRASSE = re.compile(r'(str\.|str|strasse|straße)(?=[\s,\d]|$)', re.IGNORECASE)
+_NUMMER_PRAEFIX = re.compile(r'\bNr\.?\s*(?=\d)', re.IGNORECASE)
+_NUMMER_ZUSATZ = re.compile(r'(\d)\s+([A-Za-z])\b')       # "12 a" → "12a"
+_NUMMER_BEREICH = re.compile(r'(\d[A-Za-z]?)\s*([-/])\s*(\d)')  # "12 - 14" → "12-14"
+_HAUSNUMMER = re.compile(r'^(.*?)[\s,]*(\d+[a-z]?(?:[-/]\d+[a-z]?)?)?$')
+# Übliche Endungen von Straßennamen (Schlüssel-Schreibweise): bei Gleichstand bevorzugt
+_ENDUNGEN = ('strasse', 'weg', 'allee', 'platz', 'ring', 'damm', 'gasse', 'chaussee', 'ufer', 'hof', 'markt')
+_UMLAUTE = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+
+
+def _leerzeichen(text: str) -> str:
+    return re.sub(r'\s+', ' ', text).strip().replace(' ,', ',')
+
+
+def _strasse_ersetzen(treffer: re.Match) -> str:
+    return "Straße" if treffer.group(1)[0].isupper() else "straße"
+
+
+def strasse_normalisieren(strasse: str) -> str:
+    """Einheitliche Schreibweise von Straße und Hausnummer (Groß-/Kleinschreibung bleibt)"""
+    strasse = _leerzeichen(str(strasse))
+    strasse = _STRASSE.sub(_strasse_ersetzen, strasse)
+    strasse = re.sub(r'(?i)(straße)(?=\d)', r'\1 ', strasse)
+    strasse = _NUMMER_PRAEFIX.sub('', strasse)
+    strasse = _NUMMER_BEREICH.sub(r'\1\2\3', strasse)
+    return _NUMMER_ZUSATZ.sub(r'\1\2', strasse)
+
+
+def adress_schluessel(strasse: str) -> Tuple[str, str]:
+    """
+    Vergleichsschlüssel einer normalisierten Straße: (Straßenname nur aus Kleinbuchstaben
+    und Ziffern, Umlaute ausgeschrieben; Hausnummer, leer wenn keine erkannt)
+    """
+    text = strasse.casefold().translate(_UMLAUTE)
+    name, nummer = _HAUSNUMMER.match(text).groups()
+    return re.sub(r'[^a-z0-9]', '', name), nummer or ""
+
+
+def aehnlichkeit(a: str, b: str) -> float:
+    """Ähnlichkeit zweier Straßennamen-Schlüssel zwischen 0 und 1 (difflib)"""
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _einrichtung_schluessel(einrichtung: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', str(einrichtung).casefold().translate(_UMLAUTE))
+
+
+def _gleiche_einrichtung(a: Dict, b: Dict, schwelle: float) -> bool:
+    """Mindestens eine Einrichtung beider Varianten gleich oder ähnlich benannt"""
+    return any(aehnlichkeit(x, y) >= schwelle for x in a for y in b)
+
+
+def adressen_vereinheitlichen(strassen: Sequence, plz: Sequence, orte: Sequence,
+                              einrichtungen: Sequence[Optional[str]],
+                              schwelle: float = 0.85) -> Tuple[List[str], pd.DataFrame]:
+    """
+    Adresse je Zeile für Geocodierung und Routing. Gleich normalisierte Adressen werden
+    immer zusammengefasst; Tippvarianten (gleiche PLZ und Hausnummer, Straßennamen mindestens
+    `schwelle` ähnlich) nur, wenn auch eine Einrichtung gleich oder ähnlich heißt - sonst
+    bleiben z.B. "Kirchstraße 1" und "Kirchenstraße 1" getrennt. Die Gruppe erhält die
+    Schreibweise mit den meisten Zeilen; bei Gleichstand eine mit üblicher Endung
+    ("-straße", "-weg", ...), sonst die zuerst genannte.
+    Returns: (Adressen im Format "Straße, PLZ Ort", Bericht der geänderten Eingabe-Adressen)
+    """
+    # Eingabe-Adresse (wie in Kohorte.adressen) → Zeilen, Einrichtungen, normalisierte Variante
+    eingaben: Dict[str, Dict] = {}
+    zeilen_adressen = []
+    for strasse, p, ort, einrichtung in zip(strassen, plz, orte, einrichtungen):
+        adresse = f"{strasse}, {p} {ort}"
+        zeilen_adressen.append(adresse)
+        eintrag = eingaben.get(adresse)
+        if eintrag is None:
+            normalisiert = strasse_normalisieren(strasse)
+            eintrag = eingaben[adresse] = {
+                'plz': _leerzeichen(str(p)), 'strasse': normalisiert, 'ort': _leerzeichen(str(ort)),
+                'schluessel': adress_schluessel(normalisiert), 'zeilen': 0, 'einrichtungen': {},
+            }
+        eintrag['zeilen'] += 1
+        if einrichtung is not None:
+            eintrag['einrichtungen'].setdefault(einrichtung)
+
+    # Varianten je PLZ und Hausnummer
+    varianten: Dict[Tuple[str, str], Dict[str, Dict]] = {}
+    for adresse, eintrag in eingaben.items():
+        name, nummer = eintrag['schluessel']
+        variante = varianten.setdefault((eintrag['plz'], nummer), {}).setdefault(
+            name, {'zeilen': 0, 'erste': eintrag, 'einrichtungen': {}})
+        variante['zeilen'] += eintrag['zeilen']
+        for einrichtung in eintrag['einrichtungen']:
+            variante['einrichtungen'].setdefault(_einrichtung_schluessel(einrichtung))
+
+    # Jede Variante schließt sich dem ähnlichsten Vertreter an, sonst wird sie selbst Vertreter
+    vertreter_von: Dict[Tuple[str, str, str], Tuple[Dict, float]] = {}
+    for (p, nummer), namen in varianten.items():
+        vertreter: List[str] = []
+        # Häufigste zuerst, dann übliche Endung; sorted ist stabil (sonst Reihenfolge der Eingabe)
+        for name in sorted(namen, key=lambda n: (-namen[n]['zeilen'], not n.endswith(_ENDUNGEN))):
+            quoten = [aehnlichkeit(name, v) if _gleiche_einrichtung(
+                namen[name]['einrichtungen'], namen[v]['einrichtungen'], schwelle) else 0.0 for v in vertreter]
+            if quoten and max(quoten) >= schwelle:
+                bester = vertreter[quoten.index(max(quoten))]
+                vertreter_von[(p, name, nummer)] = (namen[bester]['erste'], max(quoten))
+            else:
+                vertreter.append(name)
+                vertreter_von[(p, name, nummer)] = (namen[name]['erste'], 1.0)
+
+    kanonisch: Dict[str, str] = {}
+    bericht = []
+    for adresse, eintrag in eingaben.items():
+        ziel, quote = vertreter_von[(eintrag['plz'], *eintrag['schluessel'])]
+        kanonisch[adresse] = f"{ziel['strasse']}, {ziel['plz']} {ziel['ort']}"
+        if kanonisch[adresse] != adresse:
+            bericht.append((eintrag['plz'], adresse, kanonisch[adresse], eintrag['zeilen'],
+                            ", ".join(str(e) for e in eintrag['einrichtungen']), round(quote, 3)))
+    return [kanonisch[adresse] for adresse in zeilen_adressen], pd.DataFrame(bericht, columns=BERICHT_SPALTEN)
@@ -1,3 +1,5 @@
+import os
+
 import pandas as pd
 
 # Lehrkräfte
@@ -39,3 +41,10 @@ zut = pd.read_excel('Zuteilung_2026_FSP25a_FSP25c_FSP25d.xlsx', sheet_name='Zute
 print(f"Total Zuweisungen: {len(zut)}")
 print("\nZuweisungen pro Lehrkraft:")
 print(zut['Lehrkraft'].value_counts())
+
+# Fahrzeiten aus der Fahrzeit-Matrix des letzten Laufs ("fahrzeit_matrix": {"export": true})
+if os.path.exists(os.path.join('fahrzeit_matrix', 'fahrzeiten.npy')):
+    from fahrzeit_matrix import FahrzeitMatrix
+    matrix = FahrzeitMatrix.laden('fahrzeit_matrix')
+    print("\n=== FAHRZEITEN PRO LEHRKRAFT ===")
+    print(matrix.lehrkraft_fahrzeiten(zut).to_string(index=False))
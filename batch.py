@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batch-Betrieb
+Verarbeitet mehrere Kohorten (Schulen, Jahrgänge) ohne Rückfragen aus einer
+Manifest-Datei. Die Jobs laufen in einem Prozess-Pool; alle Worker nutzen
+denselben persistenten Cache (SQLite) und teilen sich das Rate-Limit-Budget.
+
+    python batch.py manifest.json
+    python batch.py manifest.json --worker 4 --ausgabe ergebnisse/
+
+Manifest (JSON):
+    {
+      "config": "config.json",                # Basis-Konfiguration
+      "ausgabe_verzeichnis": "batch_ausgabe",
+      "worker": 2,
+      "jobs": [
+        {"name": "rendsburg_2026", "schueler": "schueler.xlsx", "lehrkraefte": "lehrkraefte.xlsx"},
+        {"name": "kiel_2026", "schueler": "kiel/schueler.xlsx", "lehrkraefte": "kiel/lehrkraefte.xlsx",
+         "config": {"schule_adresse": "Westring 10, 24118 Kiel"}},
+        {"name": "rendsburg_nachtrag", "schueler": "schueler_neu.xlsx", "lehrkraefte": "lehrkraefte.xlsx",
+         "vorherige_zuteilung": "batch_ausgabe/rendsburg_2026/Zuteilung_2026_FSP23a.xlsx"}
+      ]
+    }
+
+Relative Pfade gelten relativ zum Manifest. "config" in einem Job überschreibt
+einzelne Einträge der Basis-Konfiguration. Mit "vorherige_zuteilung" läuft der
+Job im Reparatur-Modus (nur betroffene Schülerinnen werden neu zugeteilt).
+
+Exit-Codes:
+    0  alle Jobs erfolgreich, alle Schülerinnen zugeteilt
+    1  mindestens ein Job fehlgeschlagen
+    2  Manifest oder Konfiguration ungültig (keine Jobs gestartet)
+    3  alle Jobs gelaufen, aber nicht alle Schülerinnen zugeteilt
+"""
+
+import argparse
+import copy
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Dict, List
+
+EXIT_OK = 0
+EXIT_JOB_FEHLGESCHLAGEN = 1
+EXIT_MANIFEST_UNGUELTIG = 2
+EXIT_UNVOLLSTAENDIG = 3
+
+# Rate-Limits, die sich alle Worker teilen (Anfragen pro Minute)
+GETEILTE_LIMITS = ('nominatim_pro_minute', 'ors_directions_pro_minute', 'ors_matrix_pro_minute')
+
+# Tools pro Worker-Prozess, je Konfiguration nur einmal erzeugt (Schule nur einmal geocodiert)
+_TOOLS: Dict[str, object] = {}
+
+
+class ManifestFehler(ValueError):
+    """Manifest oder Basis-Konfiguration ist ungültig"""
+
+
+def zusammenfuehren(basis: Dict, ueberschreiben: Dict) -> Dict:
+    """Überschreibt Einträge von basis rekursiv (verschachtelte Abschnitte werden gemischt)"""
+    ergebnis = copy.deepcopy(basis)
+    for key, wert in ueberschreiben.items():
+        if isinstance(wert, dict) and isinstance(ergebnis.get(key), dict):
+            ergebnis[key] = zusammenfuehren(ergebnis[key], wert)
+        else:
+            ergebnis[key] = copy.deepcopy(wert)
+    return ergebnis
+
+
+def rate_budget_aufteilen(config: Dict, anzahl_worker: int) -> Dict:
+    """
+    Teilt die Rate-Limits gleichmäßig auf die Worker auf: zusammen bleiben alle
+    Prozesse innerhalb des konfigurierten Limits pro Anbieter.
+    """
+    config = copy.deepcopy(config)
+    limits = config.setdefault('rate_limits', {})
+    standard = {'nominatim_pro_minute': 60, 'ors_directions_pro_minute': 40, 'ors_matrix_pro_minute': 40}
+    for name in GETEILTE_LIMITS:
+        limits[name] = limits.get(name, standard[name]) / anzahl_worker
+    limits['parallele_anfragen'] = max(1, math.ceil(limits.get('parallele_anfragen', 4) / anzahl_worker))
+    return config
+
+
+def manifest_laden(pfad: str, worker: int = None, ausgabe_verzeichnis: str = None) -> Dict:
+    """
+    Liest und prüft das Manifest. Returns: {'worker', 'ausgabe_verzeichnis', 'jobs'},
+    jeder Job mit absoluten Pfaden und vollständiger Konfiguration (inkl. Rate-Budget)
+    """
+    try:
+        with open(pfad, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ManifestFehler(f"Manifest nicht lesbar: {e}")
+
+    basis = os.path.dirname(os.path.abspath(pfad))
+
+    def absolut(p: str) -> str:
+        return p if os.path.isabs(p) else os.path.join(basis, p)
+
+    jobs = manifest.get('jobs')
+    if not isinstance(jobs, list) or not jobs:
+        raise ManifestFehler("Manifest enthält keine Jobs ('jobs': [...])")
+
+    config_pfad = absolut(manifest.get('config', "config.json"))
+    try:
+        with open(config_pfad, 'r', encoding='utf-8') as f:
+            basis_config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ManifestFehler(f"Konfiguration nicht lesbar: {config_pfad} ({e})")
+
+    worker = worker or manifest.get('worker') or min(len(jobs), 4)
+    worker = max(1, min(int(worker), len(jobs)))
+    ausgabe = os.path.abspath(ausgabe_verzeichnis or absolut(manifest.get('ausgabe_verzeichnis', "batch_ausgabe")))
+
+    cache_pfad = basis_config.get('cache', {}).get('pfad', "cache/geo_cache.sqlite")
+    if cache_pfad != ":memory:" and not os.path.isabs(cache_pfad):
+        # Alle Worker müssen dieselbe Cache-Datei öffnen, unabhängig vom Arbeitsverzeichnis
+        basis_config.setdefault('cache', {})['pfad'] = os.path.join(os.path.dirname(config_pfad), cache_pfad)
+
+    namen = set()
+    aufgeloest = []
+    for nr, job in enumerate(jobs, start=1):
+        if not isinstance(job, dict) or 'schueler' not in job or 'lehrkraefte' not in job:
+            raise ManifestFehler(f"Job {nr}: 'schueler' und 'lehrkraefte' sind erforderlich")
+        name = str(job.get('name') or f"job_{nr}")
+        if name in namen:
+            raise ManifestFehler(f"Job-Name doppelt: {name}")
+        namen.add(name)
+        config = rate_budget_aufteilen(zusammenfuehren(basis_config, job.get('config', {})), worker)
+        aufgeloest.append({
+            'name': name,
+            'schueler': absolut(job['schueler']),
+            'lehrkraefte': absolut(job['lehrkraefte']),
+            'engine': job.get('engine'),
+            'vorherige_zuteilung': absolut(job['vorherige_zuteilung']) if job.get('vorherige_zuteilung') else None,
+            'ausgabe': os.path.join(ausgabe, name),
+            'config': config,
+        })
+
+    return {'worker': worker, 'ausgabe_verzeichnis': ausgabe, 'jobs': aufgeloest}
+
+
+def _tool(config: Dict):
+    """Tool dieses Worker-Prozesses für eine Konfiguration (wiederverwendet über Jobs)"""
+    from praktikumszuteilung import PraktikumszuteilungTool
+
+    key = json.dumps(config, sort_keys=True)
+    tool = _TOOLS.get(key)
+    if tool is None:
+        tool = PraktikumszuteilungTool(config=config)
+        _TOOLS[key] = tool
+    else:
+        # Einträge übernehmen, die andere Worker inzwischen in den Cache geschrieben haben
+        neu = tool.cache.nachladen()
+        if neu:
+            print(f"✓ Cache: {neu} neue Einträge aus anderen Workern übernommen")
+    return tool
+
+
+def job_ausfuehren(job: Dict) -> Dict:
+    """Führt einen Job aus; die Konsolenausgabe landet in <ausgabe>/protokoll.txt"""
+    from praktikumszuteilung import drucke_metriken, fehlende_spalten
+    from reparatur import zuteilung_laden
+
+    os.makedirs(job['ausgabe'], exist_ok=True)
+    protokoll = os.path.join(job['ausgabe'], "protokoll.txt")
+    ergebnis = {'name': job['name'], 'status': 'fehler', 'ausgabe': None,
+                'protokoll': protokoll, 'schueler': None, 'zugeteilt': None, 'fehler': None}
+    start = time.perf_counter()
+
+    with open(protokoll, 'w', encoding='utf-8') as log, redirect_stdout(log):
+        try:
+            for pfad in (job['schueler'], job['lehrkraefte'], job['vorherige_zuteilung']):
+                if pfad and not os.path.exists(pfad):
+                    raise FileNotFoundError(f"Datei nicht gefunden: {pfad}")
+            tool = _tool(job['config'])
+            schueler_df, lehrkraefte_df = tool.load_data(job['schueler'], job['lehrkraefte'])
+            fehler = fehlende_spalten(schueler_df, lehrkraefte_df)
+            if fehler:
+                raise ValueError("; ".join(fehler))
+
+            if job['vorherige_zuteilung']:
+                results_df, aenderungen_df = tool.repariere_zuteilung(
+                    zuteilung_laden(job['vorherige_zuteilung']), schueler_df, lehrkraefte_df, engine=job['engine'])
+                ergebnis['aenderungen'] = len(aenderungen_df)
+            else:
+                results_df, aenderungen_df = tool.assign_praktika(schueler_df, lehrkraefte_df,
+                                                                  engine=job['engine']), None
+            ergebnis['ausgabe'] = tool.save_results(results_df, schueler_df, ausgabe_verzeichnis=job['ausgabe'],
+                                                    aenderungen_df=aenderungen_df)
+            bericht = tool.metriken.bericht()
+            drucke_metriken(bericht)
+
+            ergebnis['schueler'] = len(schueler_df)
+            ergebnis['zugeteilt'] = len(results_df)
+            ergebnis['status'] = 'ok' if len(results_df) == len(schueler_df) else 'unvollstaendig'
+            ergebnis['api_aufrufe'] = bericht['api_aufrufe']
+            ergebnis['wartezeit_rate_limit_s'] = bericht['rate_limit']['wartezeit_gesamt_s']
+        except SystemExit as e:
+            # Das Tool beendet sich bei ungültiger Konfiguration (z.B. fehlender API-Key)
+            ergebnis['fehler'] = f"Konfiguration ungültig (Exit-Code {e.code}, siehe Protokoll)"
+        except Exception as e:
+            ergebnis['fehler'] = f"{type(e).__name__}: {e}"
+            traceback.print_exc(file=log)
+
+    ergebnis['dauer_s'] = round(time.perf_counter() - start, 2)
+    return ergebnis
+
+
+def batch_ausfuehren(manifest: Dict) -> List[Dict]:
+    """Verteilt die Jobs auf den Prozess-Pool und meldet jedes Ergebnis, sobald es vorliegt"""
+    jobs = manifest['jobs']
+    ergebnisse = []
+    # spawn: keine geerbten Threads/SQLite-Verbindungen aus dem Elternprozess
+    kontext = multiprocessing.get_context('spawn')
+    with kontext.Pool(manifest['worker']) as pool:
+        for ergebnis in pool.imap_unordered(job_ausfuehren, jobs):
+            ergebnisse.append(ergebnis)
+            if ergebnis['status'] == 'ok':
+                print(f"   ✓ {ergebnis['name']}: {ergebnis['zugeteilt']}/{ergebnis['schueler']} zugeteilt "
+                      f"({ergebnis['dauer_s']:.1f} s)")
+            elif ergebnis['status'] == 'unvollstaendig':
+                print(f"   ⚠️  {ergebnis['name']}: nur {ergebnis['zugeteilt']}/{ergebnis['schueler']} "
+                      f"zugeteilt ({ergebnis['dauer_s']:.1f} s)")
+            else:
+                print(f"   ❌ {ergebnis['name']}: {ergebnis['fehler']} (Protokoll: {ergebnis['protokoll']})")
+
+    # Zusammenfassung in Manifest-Reihenfolge
+    reihenfolge = {job['name']: i for i, job in enumerate(jobs)}
+    return sorted(ergebnisse, key=lambda e: reihenfolge[e['name']])
+
+
+def exit_code(ergebnisse: List[Dict]) -> int:
+    if any(e['status'] == 'fehler' for e in ergebnisse):
+        return EXIT_JOB_FEHLGESCHLAGEN
+    if any(e['status'] == 'unvollstaendig' for e in ergebnisse):
+        return EXIT_UNVOLLSTAENDIG
+    return EXIT_OK
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Praktikumszuteilung für mehrere Kohorten (Batch)")
+    parser.add_argument('manifest', help="Manifest-Datei (JSON) mit den Jobs")
+    parser.add_argument('--worker', type=int, help="Anzahl paralleler Prozesse (Standard: aus dem Manifest)")
+    parser.add_argument('--ausgabe', help="Ausgabeverzeichnis (Standard: aus dem Manifest)")
+    args = parser.parse_args()
+
+    try:
+        manifest = manifest_laden(args.manifest, args.worker, args.ausgabe)
+    except ManifestFehler as e:
+        print(f"❌ {e}")
+        return EXIT_MANIFEST_UNGUELTIG
+
+    print(f"🗂️  Batch: {len(manifest['jobs'])} Jobs, {manifest['worker']} Worker "
+          f"→ {manifest['ausgabe_verzeichnis']}")
+    os.makedirs(manifest['ausgabe_verzeichnis'], exist_ok=True)
+    start = time.perf_counter()
+    ergebnisse = batch_ausfuehren(manifest)
+    code = exit_code(ergebnisse)
+
+    zusammenfassung = os.path.join(manifest['ausgabe_verzeichnis'], "batch_zusammenfassung.json")
+    with open(zusammenfassung, 'w', encoding='utf-8') as f:
+        json.dump({
+            'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+            'manifest': os.path.abspath(args.manifest),
+            'worker': manifest['worker'],
+            'dauer_s': round(time.perf_counter() - start, 2),
+            'exit_code': code,
+            'jobs': ergebnisse,
+        }, f, indent=2, ensure_ascii=False)
+
+    fehlgeschlagen = sum(e['status'] == 'fehler' for e in ergebnisse)
+    unvollstaendig = sum(e['status'] == 'unvollstaendig' for e in ergebnisse)
+    print(f"\n{'✅' if code == EXIT_OK else '⚠️ '} {len(ergebnisse) - fehlgeschlagen - unvollstaendig}/"
+          f"{len(ergebnisse)} Jobs erfolgreich, {unvollstaendig} unvollständig, {fehlgeschlagen} fehlgeschlagen")
+    print(f"   Zusammenfassung: {zusammenfassung}")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
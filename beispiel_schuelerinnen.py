@@ -2,7 +2,16 @@
 # -*- coding: utf-8 -*-
 """
 Erstellt Beispiel-Excel-Dateien für Tests
+
+Ohne Argumente: die festen Beispieldateien (10 Schülerinnen, 5 Lehrkräfte).
+Mit --schueler/--lehrkraefte: synthetische Kohorte beliebiger Größe, z.B.
+    python beispiel_schuelerinnen.py --schueler 2000 --lehrkraefte 100 --seed 1
 """
+import argparse
+import math
+import random
+from typing import Tuple
+
 import pandas as pd
 
 # Beispiel Schülerinnen
@@ -63,13 +72,133 @@ lehrkraefte_data = {
     ]
 }
 
-# Excel-Dateien erstellen
-schueler_df = pd.DataFrame(schueler_data)
-lehrkraefte_df = pd.DataFrame(lehrkraefte_data)
+# Bausteine für synthetische Kohorten
+ORTE = [
+    ('24768', 'Rendsburg'), ('24782', 'Büdelsdorf'), ('24787', 'Fockbek'), ('24796', 'Bredenbek'),
+    ('24783', 'Osterrönfeld'), ('24790', 'Schacht-Audorf'), ('24791', 'Alt Duvenstedt'),
+    ('24794', 'Borgstedt'), ('24806', 'Hohn'), ('24589', 'Nortorf'), ('24340', 'Eckernförde'),
+    ('24837', 'Schleswig'), ('24103', 'Kiel'), ('24105', 'Kiel'), ('24114', 'Kiel'),
+    ('24534', 'Neumünster'), ('25746', 'Heide'), ('25524', 'Itzehoe'), ('24214', 'Gettorf'),
+    ('24395', 'Gelting'),
+]
+EINRICHTUNGSTYPEN = ['Kita', 'Kindergarten', 'Krippe', 'Familienzentrum', 'Hort', 'Kinderhaus']
+EINRICHTUNGSNAMEN = ['Sonnenschein', 'Regenbogen', 'Waldweg', 'Abenteuerland', 'Sterntaler',
+                     'Pusteblume', 'Löwenzahn', 'Wirbelwind', 'Kunterbunt', 'Arche', 'Spatzennest',
+                     'Marienkäfer', 'Seepferdchen', 'Schatzkiste', 'Villa Kunterbunt', 'Eichhörnchen']
+STRASSEN = ['Hauptstraße', 'Bahnhofstraße', 'Waldstraße', 'Schulweg', 'Marktplatz', 'Kirchweg',
+            'Gartenstraße', 'Lindenallee', 'Am Kanal', 'Mühlenweg', 'Dorfstraße', 'Friedhofsweg']
+VORNAMEN = ['Anna', 'Lisa', 'Sarah', 'Julia', 'Marie', 'Laura', 'Sophie', 'Emma', 'Lena', 'Hannah',
+            'Mia', 'Lea', 'Clara', 'Ella', 'Paula', 'Greta', 'Frieda', 'Ida', 'Johanna', 'Nele']
+NACHNAMEN = ['Schmidt', 'Müller', 'Weber', 'Koch', 'Becker', 'Wagner', 'Schulz', 'Fischer', 'Meyer',
+             'Hoffmann', 'Jensen', 'Hansen', 'Petersen', 'Thomsen', 'Carstensen', 'Lorenzen']
+
+
+def synthetische_kohorte(n_schueler: int, n_lehrkraefte: int,
+                         seed: int = 1) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Erzeugt eine realistische Kohorte im Format der Eingabedateien:
+    - ca. 22 Schülerinnen pro Klasse, jede Lehrkraft betreut 1-3 Klassen, jede Klasse
+      hat mindestens eine Lehrkraft (Klassen überschneiden sich zwischen Lehrkräften)
+    - ca. eine Einrichtung pro drei Schülerinnen, beliebte Einrichtungen werden
+      mehrfach belegt (Zipf-ähnliche Verteilung)
+    - Soll-Anzahlen summieren sich auf die Zahl der Schülerinnen
+    """
+    rnd = random.Random(seed)
+
+    # Orte: feste Liste, für große Kohorten ergänzt um weitere PLZ
+    orte = list(ORTE)
+    plz_vergeben = {plz for plz, _ in orte}
+    while len(orte) < max(len(ORTE), n_schueler // 50):
+        plz = str(rnd.randint(24100, 25999))
+        if plz not in plz_vergeben:
+            plz_vergeben.add(plz)
+            orte.append((plz, f"Gemeinde {plz}"))
+
+    # Klassen
+    n_klassen = max(2, math.ceil(n_schueler / 22))
+    klassen = [f"FSP{23 + k // 26}{chr(ord('a') + k % 26)}" for k in range(n_klassen)]
+
+    # Einrichtungen mit Zipf-ähnlicher Beliebtheit
+    n_einrichtungen = max(3, n_schueler // 3)
+    einrichtungen = []
+    namen = set()
+    for i in range(n_einrichtungen):
+        plz, ort = rnd.choice(orte)
+        name = f"{rnd.choice(EINRICHTUNGSTYPEN)} {rnd.choice(EINRICHTUNGSNAMEN)}"
+        if name in namen:
+            name = f"{name} {ort}"
+        if name in namen:
+            name = f"{name} {i}"
+        namen.add(name)
+        einrichtungen.append((name, f"{rnd.choice(STRASSEN)} {rnd.randint(1, 120)}", plz, ort))
+    gewichte = [1 / (rang + 1) ** 0.8 for rang in range(n_einrichtungen)]
+
+    schueler = []
+    for i, einrichtung in enumerate(rnd.choices(einrichtungen, weights=gewichte, k=n_schueler)):
+        name, strasse, plz, ort = einrichtung
+        schueler.append({
+            'Name': f"{rnd.choice(VORNAMEN)} {rnd.choice(NACHNAMEN)} {i + 1}",
+            'Klasse': klassen[i % n_klassen],
+            'Einrichtung': name,
+            'Straße': strasse,
+            'PLZ': plz,
+            'Ort': ort,
+        })
+    rnd.shuffle(schueler)
+
+    # Lehrkräfte: jede Klasse mindestens einmal, dazu weitere Klassen
+    lehrkraft_klassen = [{klassen[k]} for k in range(min(n_klassen, n_lehrkraefte))]
+    lehrkraft_klassen += [set() for _ in range(n_lehrkraefte - len(lehrkraft_klassen))]
+    for k in range(n_lehrkraefte, n_klassen):
+        lehrkraft_klassen[k % n_lehrkraefte].add(klassen[k])
+    for eintrag in lehrkraft_klassen:
+        ziel = min(rnd.randint(1, 3), n_klassen)
+        while len(eintrag) < ziel:
+            eintrag.add(rnd.choice(klassen))
+
+    # Soll-Anzahlen: gleichmäßig verteilt, Rest zufällig
+    soll = [n_schueler // n_lehrkraefte] * n_lehrkraefte
+    for j in rnd.sample(range(n_lehrkraefte), n_schueler % n_lehrkraefte):
+        soll[j] += 1
+
+    lehrkraefte = []
+    for j in range(n_lehrkraefte):
+        lehrkraefte.append({
+            'Name': f"{rnd.choice(['Frau', 'Herr'])} {rnd.choice(NACHNAMEN)} {j + 1}",
+            'PLZ_Wohnort': rnd.choice(orte)[0],
+            'Klassen': ", ".join(sorted(lehrkraft_klassen[j])),
+            'Soll_Anzahl_Betreuungen': max(1, soll[j]),
+        })
+
+    return pd.DataFrame(schueler), pd.DataFrame(lehrkraefte)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beispiel-Eingabedateien erstellen")
+    parser.add_argument('--schueler', type=int, help="Anzahl Schülerinnen (synthetische Kohorte)")
+    parser.add_argument('--lehrkraefte', type=int, help="Anzahl Lehrkräfte (synthetische Kohorte)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.schueler:
+        n_lehrkraefte = args.lehrkraefte or max(1, args.schueler // 20)
+        schueler_df, lehrkraefte_df = synthetische_kohorte(args.schueler, n_lehrkraefte, args.seed)
+        schueler_path = f"synthetisch_schuelerinnen_{args.schueler}.xlsx"
+        lehrkraefte_path = f"synthetisch_lehrkraefte_{n_lehrkraefte}.xlsx"
+    else:
+        # Excel-Dateien erstellen
+        schueler_df = pd.DataFrame(schueler_data)
+        lehrkraefte_df = pd.DataFrame(lehrkraefte_data)
+        schueler_path = 'beispiel_schuelerinnen.xlsx'
+        lehrkraefte_path = 'beispiel_lehrkraefte.xlsx'
+
+    schueler_df.to_excel(schueler_path, index=False)
+    lehrkraefte_df.to_excel(lehrkraefte_path, index=False)
+
+    print("✓ Beispiel-Dateien erstellt:")
+    print(f"  - {schueler_path}")
+    print(f"  - {lehrkraefte_path}")
 
-schueler_df.to_excel('beispiel_schuelerinnen.xlsx', index=False)
-lehrkraefte_df.to_excel('beispiel_lehrkraefte.xlsx', index=False)
 
-print("✓ Beispiel-Dateien erstellt:")
-print("  - beispiel_schuelerinnen.xlsx")
-print("  - beispiel_lehrkraefte.xlsx")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark der Zuteilungs-Pipeline
+Synthetische Kohorten (siehe beispiel_schuelerinnen.py) mit deterministischen
+Fake-Backends für Geocodierung und Routing - ohne API-Key und ohne Netzwerk.
+Gemessen werden die Phasen Geocodierung, Routing, Phase 1, Phase 2 und
+save_results sowie der Spitzen-Speicherbedarf. Jede Größe läuft in einem
+eigenen Prozess, damit sich Speicher und Caches nicht gegenseitig beeinflussen.
+
+    python benchmark.py                              # Standard-Suite
+    python benchmark.py --groessen 500x25 5000x250   # eigene Größen
+    python benchmark.py --suite voll --vergleich alt.json
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from beispiel_schuelerinnen import synthetische_kohorte
+from fahrzeit_modell import FahrzeitModell
+from plz_zentroide import parse_plz
+from routing_backends import Geocoder, RoutingBackend
+
+SUITEN = {
+    'standard': [(50, 5), (200, 20), (1000, 60), (2000, 120)],
+    'voll': [(50, 5), (200, 20), (1000, 60), (2000, 120), (5000, 250), (10000, 500), (20000, 1000)],
+}
+
+# Phasen in der Reihenfolge des Ablaufs (Schlüssel aus PraktikumszuteilungTool.laufzeiten)
+PHASEN = ['geocodierung', 'routing', 'phase1', 'phase2', 'save_results']
+
+# Abweichung, ab der eine Phase im Vergleich als langsamer markiert wird
+REGRESSIONS_SCHWELLE = 1.2
+
+
+def _hash_anteil(text: str, salz: str) -> float:
+    """Deterministische Zahl in [0, 1) aus einem Text (unabhängig von PYTHONHASHSEED)"""
+    return int(hashlib.md5(f"{salz}:{text}".encode('utf-8')).hexdigest()[:8], 16) / 2 ** 32
+
+
+class FakeGeocoder(Geocoder):
+    """
+    Deterministische Koordinaten in Schleswig-Holstein: jede PLZ erhält einen
+    festen Mittelpunkt, Adressen streuen in einem Umkreis von ca. 3 km darum.
+    """
+
+    name = "fake"
+
+    def geocode(self, anfrage: str) -> Optional[Tuple[float, float]]:
+        plz = parse_plz(anfrage) or anfrage
+        lat = 53.9 + 0.9 * _hash_anteil(plz, "lat")
+        lon = 9.0 + 1.8 * _hash_anteil(plz, "lon")
+        if anfrage.strip() != f"{plz}, Deutschland":
+            lat += 0.05 * (_hash_anteil(anfrage, "lat") - 0.5)
+            lon += 0.08 * (_hash_anteil(anfrage, "lon") - 0.5)
+        return (lat, lon)
+
+
+class FakeRouting(RoutingBackend):
+    """Fahrzeit aus der Luftlinie (3 min + 1.2 min/km), vektorisiert und ohne Größenlimit"""
+
+    name = "fake"
+    quelle = "fake"
+
+    def __init__(self):
+        self.modell = FahrzeitModell(3.0, 1.2)
+
+    def fahrzeit(self, start: Tuple[float, float], ende: Tuple[float, float]) -> float:
+        return self.modell.schaetzen(start, ende)
+
+    def matrix(self, quellen: Sequence[Tuple[float, float]],
+               ziele: Sequence[Tuple[float, float]]) -> List[List[float]]:
+        return self.modell.matrix(quellen, ziele).tolist()
+
+
+def _benchmark_config(config_path: str, verzeichnis: str, engine: str) -> str:
+    """Konfiguration für einen Benchmark-Lauf: Cache im Speicher, keine externen Dateien"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    config['api_key'] = "benchmark"
+    config['plz_zentroide'] = None
+    config['cache'] = {'pfad': ":memory:", 'ttl_tage': None, 'max_eintraege': None}
+    config.setdefault('routing', {}).update({'offline': False, 'fahrzeit_modell': False})
+    config.setdefault('zuteilung', {})['engine'] = engine
+    pfad = os.path.join(verzeichnis, "config.json")
+    with open(pfad, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    return pfad
+
+
+def benchmark_lauf(n_schueler: int, n_lehrkraefte: int, seed: int = 1, engine: str = "greedy",
+                   config_path: str = "config.json", mit_tracemalloc: bool = False) -> Dict:
+    """Ein vollständiger Durchlauf (assign_praktika + save_results) für eine Kohortengröße"""
+    from praktikumszuteilung import PraktikumszuteilungTool
+
+    schueler_df, lehrkraefte_df = synthetische_kohorte(n_schueler, n_lehrkraefte, seed)
+    if mit_tracemalloc:
+        tracemalloc.start()
+
+    with tempfile.TemporaryDirectory() as verzeichnis, open(os.devnull, 'w') as stumm:
+        with redirect_stdout(stumm):
+            tool = PraktikumszuteilungTool(_benchmark_config(config_path, verzeichnis, engine),
+                                           geocoder=FakeGeocoder(), routing_backend=FakeRouting())
+            start = time.perf_counter()
+            results_df = tool.assign_praktika(schueler_df, lehrkraefte_df)
+            tool.save_results(results_df, schueler_df, ausgabe_verzeichnis=verzeichnis)
+            zeiten = dict(tool.laufzeiten)
+            zeiten['gesamt'] = time.perf_counter() - start
+            metriken = tool.metriken.bericht()
+        tool.cache.close()
+        tool.abruf.close()
+
+    ergebnis = {
+        'schueler': n_schueler,
+        'lehrkraefte': n_lehrkraefte,
+        'einrichtungen': int(schueler_df['Einrichtung'].nunique()),
+        'seed': seed,
+        'engine': engine,
+        'zeiten_s': {phase: round(zeiten.get(phase, 0.0), 4) for phase in PHASEN + ['gesamt']},
+        # ru_maxrss: Kilobyte unter Linux, Byte unter macOS
+        'spitzen_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                                / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1),
+        'zugeteilt': len(results_df),
+        'score_summe': float(results_df['Score'].sum()) if len(results_df) else 0.0,
+        'metriken': metriken,
+    }
+    if mit_tracemalloc:
+        ergebnis['tracemalloc_spitze_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1)
+        tracemalloc.stop()
+    return ergebnis
+
+
+def _im_eigenen_prozess(kwargs: Dict) -> Dict:
+    return benchmark_lauf(**kwargs)
+
+
+def vergleichen(ergebnisse: List[Dict], referenz: List[Dict]) -> List[str]:
+    """Meldet Phasen, die gegenüber der Referenz um mehr als REGRESSIONS_SCHWELLE langsamer sind"""
+    alt = {(r['schueler'], r['lehrkraefte'], r['engine']): r for r in referenz}
+    meldungen = []
+    for neu in ergebnisse:
+        vorher = alt.get((neu['schueler'], neu['lehrkraefte'], neu['engine']))
+        if vorher is None:
+            continue
+        for phase in PHASEN + ['gesamt']:
+            t_alt, t_neu = vorher['zeiten_s'].get(phase, 0), neu['zeiten_s'].get(phase, 0)
+            # Sehr kurze Phasen schwanken zu stark für einen Vergleich
+            if max(t_alt, t_neu) >= 0.05 and t_neu > t_alt * REGRESSIONS_SCHWELLE:
+                meldungen.append(f"{neu['schueler']}x{neu['lehrkraefte']} {phase}: "
+                                 f"{t_alt:.2f} s → {t_neu:.2f} s ({t_neu / max(t_alt, 1e-9):.1f}×)")
+    return meldungen
+
+
+def _groesse(text: str) -> Tuple[int, int]:
+    schueler, lehrkraefte = text.lower().split('x')
+    return int(schueler), int(lehrkraefte)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der Zuteilungs-Pipeline")
+    parser.add_argument('--suite', choices=sorted(SUITEN), default='standard')
+    parser.add_argument('--groessen', nargs='+', type=_groesse, metavar="SxL",
+                        help="eigene Größen, z.B. 500x25 (Schülerinnen x Lehrkräfte)")
+    parser.add_argument('--engine', default="greedy")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--config', default="config.json")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="zusätzlich Python-Allokationen messen (verlangsamt die Läufe)")
+    parser.add_argument('--ausgabe', default="benchmark_ergebnisse.json")
+    parser.add_argument('--vergleich', help="frühere Ergebnisdatei, gegen die verglichen wird")
+    args = parser.parse_args()
+
+    groessen = args.groessen or SUITEN[args.suite]
+    print(f"⏱️  Benchmark: {len(groessen)} Kohorten, Engine {args.engine}")
+    print(f"   {'Größe':>12} | " + " | ".join(f"{phase:>12}" for phase in PHASEN + ['gesamt'])
+          + " | Speicher")
+
+    ergebnisse = []
+    # Frischer Prozess pro Größe: Spitzen-RSS gilt dann nur für diesen Lauf
+    kontext = multiprocessing.get_context('spawn')
+    for n_schueler, n_lehrkraefte in groessen:
+        with kontext.Pool(1, maxtasksperchild=1) as pool:
+            ergebnis = pool.apply(_im_eigenen_prozess, ({
+                'n_schueler': n_schueler, 'n_lehrkraefte': n_lehrkraefte, 'seed': args.seed,
+                'engine': args.engine, 'config_path': os.path.abspath(args.config),
+                'mit_tracemalloc': args.tracemalloc,
+            },))
+        ergebnisse.append(ergebnis)
+        zeiten = ergebnis['zeiten_s']
+        print(f"   {f'{n_schueler}x{n_lehrkraefte}':>12} | "
+              + " | ".join(f"{zeiten[phase]:>10.2f} s" for phase in PHASEN + ['gesamt'])
+              + f" | {ergebnis['spitzen_rss_mb']:.0f} MB")
+
+    with open(args.ausgabe, 'w', encoding='utf-8') as f:
+        json.dump({
+            'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'plattform': platform.platform(),
+            'laeufe': ergebnisse,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"✓ Ergebnisse gespeichert: {args.ausgabe}")
+
+    if args.vergleich:
+        with open(args.vergleich, 'r', encoding='utf-8') as f:
+            meldungen = vergleichen(ergebnisse, json.load(f)['laeufe'])
+        if meldungen:
+            print(f"⚠️  {len(meldungen)} Phasen langsamer als in {args.vergleich}:")
+            for meldung in meldungen:
+                print(f"   - {meldung}")
+            sys.exit(1)
+        print(f"✓ Keine Verschlechterung gegenüber {args.vergleich}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Score-Regeln ohne Zustand
+Statischer Score (Klasse, Fahrzeit, Rendsburg-Bonus) und Lastverteilung als reine
+Funktionen der Gewichte aus config.json ("scoring", "fahrzeit_grenzen"). Das Tool
+und die Szenario-Worker (szenarien.py) rechnen damit dieselben Werte.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+def fahrzeit_punkte(fahrzeit_min: np.ndarray, scoring: Dict, grenzen: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """Fahrzeit-Bonus und -Malus (negativ) je Fahrzeit; 0 ohne Koordinaten (NaN)"""
+    fahrzeit = np.select(
+        [fahrzeit_min <= grenzen['exzellent_max_min'], fahrzeit_min <= grenzen['gut_max_min'],
+         fahrzeit_min <= grenzen['akzeptabel_max_min']],
+        [scoring['fahrzeit_exzellent'], scoring['fahrzeit_gut'], scoring['fahrzeit_akzeptabel']], 0
+    )
+    malus = np.select(
+        [fahrzeit_min > grenzen['sehr_lang_min'], fahrzeit_min > grenzen['lang_min']],
+        [-scoring['fahrzeit_sehr_lang_malus'], -scoring['fahrzeit_lang_malus']], 0
+    )
+    return fahrzeit.astype(float), malus.astype(float)
+
+
+def komponenten_berechnen(klassen_match: np.ndarray, region_match: np.ndarray, fahrzeit_min: np.ndarray,
+                          scoring: Dict, grenzen: Dict) -> Dict[str, np.ndarray]:
+    """
+    Punkte je Komponente für alle Paare Schülerin × Lehrkraft (Malus negativ).
+    region_match: Einrichtung und Lehrkraft in der Rendsburg-Region, Koordinaten vorhanden
+    """
+    # Kriterium 3 (Prio 1): Klassenübereinstimmung
+    klasse = np.where(klassen_match, scoring['klassen_match'], 0)
+    # Kriterium 2 (Prio 2): Fahrzeit/Erreichbarkeit - Bonus für kurze, Malus für lange Fahrten
+    fahrzeit, malus = fahrzeit_punkte(fahrzeit_min, scoring, grenzen)
+    # Rendsburg-Bonus: Lehrkräfte aus Rendsburg-Umgebung erhalten Bonus für Rendsburg-Einrichtungen
+    region = np.where(region_match, scoring['rendsburg_bonus'], 0)
+    return {
+        'klasse': klasse.astype(float), 'fahrzeit_min': fahrzeit_min, 'fahrzeit': fahrzeit,
+        'malus': malus, 'region': region.astype(float),
+    }
+
+
+def statischer_score(komponenten: Dict[str, np.ndarray]) -> np.ndarray:
+    return komponenten['klasse'] + komponenten['fahrzeit'] + komponenten['malus'] + komponenten['region']
+
+
+def lastverteilung(current_count: int, soll_anzahl: int, abweichung_soll_malus: float) -> float:
+    """
+    Lastverteilung - nur Abweichungen außerhalb von Soll ±1 bestrafen
+    """
+    # Bonus für Lehrkräfte, die unter Soll sind (je weiter unter Soll, desto höher der Bonus)
+    if current_count < soll_anzahl:
+        # Positiver Bonus für Lehrkräfte unter Soll (ausgeglichene Verteilung fördern)
+        return (soll_anzahl - current_count) * 5
+    elif current_count == soll_anzahl:
+        # Exakt am Soll: leichter Malus, damit andere bevorzugt werden
+        return -10
+    else:
+        # Über Soll: Malus
+        abweichung = current_count - soll_anzahl
+        return -abweichung * abweichung_soll_malus
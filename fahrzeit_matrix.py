@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fahrzeit-Matrix als Datei
+Die Fahrzeiten eines Laufs als float32-Array Lehrkraft × Einrichtung × Strecke
+(fahrzeiten.npy) mit ID-Tabellen (lehrkraefte.csv, einrichtungen.csv) und meta.json.
+Andere Werkzeuge (z.B. analyze_data.py) und spätere Läufe blenden die Matrix mit
+np.load(mmap_mode='r') ohne Kopie ein: Fahrzeit-Statistiken pro Lehrkraft und eine
+Neubewertung der Fahrzeit-Punkte brauchen weder Netzwerk noch Excel.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from bewertung import fahrzeit_punkte
+
+# Dritte Achse der Matrix; "effektiv" ist die Fahrzeit, mit der die Zuteilung bewertet wurde
+STRECKEN = ('schule_einrichtung', 'einrichtung_schule', 'wohnort_schule', 'wohnort_einrichtung', 'effektiv')
+
+MATRIX_DATEI = "fahrzeiten.npy"
+LEHRKRAEFTE_DATEI = "lehrkraefte.csv"
+EINRICHTUNGEN_DATEI = "einrichtungen.csv"
+META_DATEI = "meta.json"
+
+
+def matrix_speichern(verzeichnis: str, fahrzeiten: np.ndarray, lehrkraefte: pd.DataFrame,
+                     einrichtungen: pd.DataFrame, meta: Dict = None) -> str:
+    """
+    Schreibt die Matrix (Minuten, NaN = unbekannt) und die ID-Tabellen.
+    lehrkraefte/einrichtungen: eine Zeile pro ID (Position auf der jeweiligen Achse)
+    Returns: Pfad der Matrix-Datei
+    """
+    os.makedirs(verzeichnis, exist_ok=True)
+    pfad = os.path.join(verzeichnis, MATRIX_DATEI)
+    np.save(pfad, np.ascontiguousarray(fahrzeiten, dtype=np.float32))
+    lehrkraefte.to_csv(os.path.join(verzeichnis, LEHRKRAEFTE_DATEI), index=False)
+    einrichtungen.to_csv(os.path.join(verzeichnis, EINRICHTUNGEN_DATEI), index=False)
+    with open(os.path.join(verzeichnis, META_DATEI), 'w', encoding='utf-8') as f:
+        json.dump({
+            'erstellt': datetime.now().isoformat(timespec='seconds'),
+            'form': list(fahrzeiten.shape), 'achsen': ['lehrkraft', 'einrichtung', 'strecke'],
+            'strecken': list(STRECKEN), 'einheit': "min", **(meta or {}),
+        }, f, indent=2, ensure_ascii=False)
+    return pfad
+
+
+class FahrzeitMatrix:
+    """
+    Eingeblendete Fahrzeit-Matrix mit ID-Tabellen. Lehrkräfte werden über den Namen
+    gefunden (bei gleichen Namen die erste Zeile), Einrichtungen über ihren Namen.
+    """
+
+    def __init__(self, fahrzeiten: np.ndarray, lehrkraefte: pd.DataFrame, einrichtungen: pd.DataFrame,
+                 meta: Dict = None):
+        self.fahrzeiten = fahrzeiten
+        self.lehrkraefte = lehrkraefte
+        self.einrichtungen = einrichtungen
+        self.meta = meta or {}
+        self.lehrkraft_index: Dict[str, int] = {}
+        for l_id, name in zip(lehrkraefte['ID'], lehrkraefte['Name']):
+            self.lehrkraft_index.setdefault(name, int(l_id))
+        self.einrichtung_index: Dict[str, int] = {name: int(e_id) for e_id, name in
+                                                  zip(einrichtungen['ID'], einrichtungen['Einrichtung'])}
+
+    @classmethod
+    def laden(cls, verzeichnis: str) -> "FahrzeitMatrix":
+        """Blendet die Matrix schreibgeschützt ein (keine Kopie, auch in mehreren Prozessen)"""
+        with open(os.path.join(verzeichnis, META_DATEI), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(
+            np.load(os.path.join(verzeichnis, MATRIX_DATEI), mmap_mode='r'),
+            pd.read_csv(os.path.join(verzeichnis, LEHRKRAEFTE_DATEI), dtype={'PLZ_Wohnort': str}),
+            pd.read_csv(os.path.join(verzeichnis, EINRICHTUNGEN_DATEI)),
+            meta,
+        )
+
+    def strecke(self, name: str = 'effektiv') -> np.ndarray:
+        """Lehrkraft × Einrichtung für eine Strecke (Sicht auf die Matrix, keine Kopie)"""
+        return self.fahrzeiten[:, :, STRECKEN.index(name)]
+
+    def fahrzeit(self, lehrkraft: str, einrichtung: str, strecke: str = 'effektiv') -> float:
+        return float(self.fahrzeiten[self.lehrkraft_index[lehrkraft], self.einrichtung_index[einrichtung],
+                                     STRECKEN.index(strecke)])
+
+    def lehrkraft_fahrzeiten(self, zuteilung_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Effektive Fahrzeiten einer Zuteilung (Spalten Lehrkraft, Einrichtung) pro Lehrkraft:
+        Anzahl, Summe, Mittel und Maximum in Minuten. Unbekannte Namen zählen ohne Fahrzeit.
+        """
+        l_ids = zuteilung_df['Lehrkraft'].map(self.lehrkraft_index)
+        e_ids = zuteilung_df['Einrichtung'].map(self.einrichtung_index)
+        bekannt = (l_ids.notna() & e_ids.notna()).to_numpy()
+        zeiten = np.full(len(zuteilung_df), np.nan)
+        zeiten[bekannt] = self.strecke()[l_ids[bekannt].astype(int).to_numpy(),
+                                         e_ids[bekannt].astype(int).to_numpy()]
+        tabelle = pd.DataFrame({'Lehrkraft': zuteilung_df['Lehrkraft'].to_numpy(), 'Fahrzeit_min': zeiten})
+        statistik = tabelle.groupby('Lehrkraft', sort=True)['Fahrzeit_min'].agg(['size', 'sum', 'mean', 'max'])
+        statistik.columns = ['Zuteilungen', 'Fahrzeit_gesamt_min', 'Fahrzeit_mittel_min', 'Fahrzeit_max_min']
+        return statistik.reset_index()
+
+    def fahrzeit_punkte(self, scoring: Dict, grenzen: Dict) -> np.ndarray:
+        """Fahrzeit-Bonus + Malus je Lehrkraft × Einrichtung für andere Gewichte/Grenzen"""
+        bonus, malus = fahrzeit_punkte(self.strecke(), scoring, grenzen)
+        return bonus + malus
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline-Fahrzeitmodell
+Schätzt Fahrzeiten aus der Luftlinie, kalibriert an den ORS-Fahrzeiten im Route-Cache:
+Fahrzeit = (a + b · km) · Regionalfaktor. Der Regionalfaktor bildet Umwege
+(Förde, Kanal, fehlende Brücken) pro Rasterzelle ab und wird zur 1 hin geglättet,
+wenn die Zelle nur wenige Messwerte hat.
+
+Fehlerbericht gegen die gecachten ORS-Fahrzeiten:
+    python fahrzeit_modell.py [--config config.json]
+"""
+
+import argparse
+import json
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+ERDRADIUS_KM = 6371.0088
+
+# Bisherige Schätzung bei Routing-Fehlern: 1 km ≈ 1.5 min
+LUFTLINIE_MIN_PRO_KM = 1.5
+
+
+def luftlinie_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Haversine-Distanz in km, elementweise mit NumPy-Broadcasting"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * ERDRADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _als_array(coords: Sequence[Tuple[float, float]]) -> np.ndarray:
+    return np.asarray(coords, dtype=float).reshape(-1, 2)
+
+
+class FahrzeitModell:
+    """Kalibriertes Luftlinien-Modell mit vektorisierter Auswertung"""
+
+    def __init__(self, achsenabschnitt: float, min_pro_km: float, raster_grad: float = 0.2,
+                 raster_ursprung: Tuple[float, float] = (0.0, 0.0),
+                 faktoren: Optional[np.ndarray] = None, stichproben: int = 0):
+        self.achsenabschnitt = achsenabschnitt
+        self.min_pro_km = min_pro_km
+        self.raster_grad = raster_grad
+        self.raster_ursprung = raster_ursprung
+        self.faktoren = faktoren if faktoren is not None else np.ones((0, 0))
+        self.stichproben = stichproben
+
+    # --- Kalibrierung ---
+
+    @classmethod
+    def anpassen(cls, starts: Sequence[Tuple[float, float]], ziele: Sequence[Tuple[float, float]],
+                 dauern_min: Sequence[float], raster_grad: float = 0.2,
+                 glaettung: float = 5.0) -> "FahrzeitModell":
+        """Kleinste Quadrate für a + b·km, danach Median-Korrekturfaktor pro Rasterzelle"""
+        starts, ziele = _als_array(starts), _als_array(ziele)
+        dauern = np.asarray(dauern_min, dtype=float)
+        km = luftlinie_km(starts[:, 0], starts[:, 1], ziele[:, 0], ziele[:, 1])
+        gueltig = (km > 0) & (dauern > 0)
+        starts, ziele, km, dauern = starts[gueltig], ziele[gueltig], km[gueltig], dauern[gueltig]
+
+        a, b = np.linalg.lstsq(np.column_stack([np.ones_like(km), km]), dauern, rcond=None)[0]
+        if b <= 0:
+            a, b = 0.0, float(np.median(dauern / km))
+        modell = cls(float(a), float(b), raster_grad, stichproben=int(len(dauern)))
+
+        # Regionalfaktoren über die Streckenmitte
+        mitte = (starts + ziele) / 2
+        modell.raster_ursprung = (float(mitte[:, 0].min()), float(mitte[:, 1].min()))
+        zeilen, spalten = modell._zellen(mitte[:, 0], mitte[:, 1])
+        faktoren = np.ones((zeilen.max() + 1, spalten.max() + 1))
+        verhaeltnis = dauern / (modell.achsenabschnitt + modell.min_pro_km * km)
+        zellen = zeilen * faktoren.shape[1] + spalten
+        for zelle in np.unique(zellen):
+            werte = verhaeltnis[zellen == zelle]
+            n = len(werte)
+            faktoren.flat[zelle] = (n * np.median(werte) + glaettung) / (n + glaettung)
+        modell.faktoren = faktoren
+        return modell
+
+    @classmethod
+    def aus_cache(cls, route_tabelle, quelle: str = "ors", min_stichproben: int = 20,
+                  **kwargs) -> Optional["FahrzeitModell"]:
+        """Kalibriert am Route-Cache; None, wenn zu wenige echte Fahrzeiten vorliegen"""
+        starts, ziele, dauern = cls._cache_stichproben(route_tabelle, quelle)
+        if len(dauern) < min_stichproben:
+            return None
+        return cls.anpassen(starts, ziele, dauern, **kwargs)
+
+    @staticmethod
+    def _cache_stichproben(route_tabelle, quelle: str = "ors"):
+        starts, ziele, dauern = [], [], []
+        for _, dauer, meta in route_tabelle.eintraege(quelle):
+            if 'start' in meta and 'ende' in meta and dauer is not None:
+                starts.append(meta['start'])
+                ziele.append(meta['ende'])
+                dauern.append(dauer)
+        return starts, ziele, dauern
+
+    # --- Auswertung ---
+
+    def _zellen(self, lat: np.ndarray, lon: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        zeilen = np.floor((lat - self.raster_ursprung[0]) / self.raster_grad).astype(int)
+        spalten = np.floor((lon - self.raster_ursprung[1]) / self.raster_grad).astype(int)
+        return zeilen, spalten
+
+    def _regionalfaktor(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        zeilen, spalten = self._zellen(lat, lon)
+        innen = ((zeilen >= 0) & (zeilen < self.faktoren.shape[0])
+                 & (spalten >= 0) & (spalten < self.faktoren.shape[1]))
+        faktor = np.ones(np.shape(lat))
+        faktor[innen] = self.faktoren[zeilen[innen], spalten[innen]]
+        return faktor
+
+    def _schaetzen(self, lat1, lon1, lat2, lon2) -> np.ndarray:
+        km = luftlinie_km(lat1, lon1, lat2, lon2)
+        faktor = self._regionalfaktor((np.asarray(lat1) + lat2) / 2, (np.asarray(lon1) + lon2) / 2)
+        return np.where(km > 0, (self.achsenabschnitt + self.min_pro_km * km) * faktor, 0.0)
+
+    def schaetzen(self, start: Tuple[float, float], ende: Tuple[float, float]) -> float:
+        """Fahrzeit in Minuten für eine Strecke"""
+        return float(self._schaetzen(np.array([start[0]]), np.array([start[1]]),
+                                     np.array([ende[0]]), np.array([ende[1]]))[0])
+
+    def paarweise(self, starts: Sequence[Tuple[float, float]],
+                  ziele: Sequence[Tuple[float, float]]) -> np.ndarray:
+        """Fahrzeiten für gleich lange Listen (starts[i] → ziele[i])"""
+        starts, ziele = _als_array(starts), _als_array(ziele)
+        return self._schaetzen(starts[:, 0], starts[:, 1], ziele[:, 0], ziele[:, 1])
+
+    def matrix(self, starts: Sequence[Tuple[float, float]],
+               ziele: Sequence[Tuple[float, float]]) -> np.ndarray:
+        """Fahrzeit-Matrix len(starts) × len(ziele) in Minuten (vollständig vektorisiert)"""
+        starts, ziele = _als_array(starts), _als_array(ziele)
+        return self._schaetzen(starts[:, 0:1], starts[:, 1:2], ziele[None, :, 0], ziele[None, :, 1])
+
+    # --- Persistenz und Fehlerbericht ---
+
+    def als_dict(self) -> Dict:
+        return {'achsenabschnitt': self.achsenabschnitt, 'min_pro_km': self.min_pro_km,
+                'raster_grad': self.raster_grad, 'raster_ursprung': list(self.raster_ursprung),
+                'faktoren': self.faktoren.tolist(), 'stichproben': self.stichproben}
+
+    @classmethod
+    def aus_dict(cls, daten: Dict) -> "FahrzeitModell":
+        return cls(daten['achsenabschnitt'], daten['min_pro_km'], daten['raster_grad'],
+                   tuple(daten['raster_ursprung']), np.array(daten['faktoren'], dtype=float),
+                   daten.get('stichproben', 0))
+
+
+def fehlermasse(vorhersage: np.ndarray, wahr: np.ndarray) -> Dict[str, float]:
+    fehler = vorhersage - wahr
+    return {
+        'mae_min': float(np.mean(np.abs(fehler))),
+        'rmse_min': float(np.sqrt(np.mean(fehler ** 2))),
+        'mape_prozent': float(np.mean(np.abs(fehler) / np.maximum(wahr, 1e-9)) * 100),
+        'bias_min': float(np.mean(fehler)),
+    }
+
+
+def band(minuten: np.ndarray, grenzen: Dict[str, float]) -> np.ndarray:
+    """Fahrzeit-Band wie in der Bewertung: 0 exzellent, 1 gut, 2 akzeptabel, 3 ungünstig"""
+    return np.digitize(minuten, [grenzen['exzellent_max_min'], grenzen['gut_max_min'],
+                                 grenzen['akzeptabel_max_min']], right=True)
+
+
+def fehlerbericht(route_tabelle, grenzen: Dict[str, float], testanteil: int = 5) -> Optional[Dict]:
+    """
+    Vergleicht Modell und bisherige 1.5-min/km-Schätzung mit den gecachten ORS-Fahrzeiten.
+    Jede testanteil-te Strecke wird zurückgehalten und nur zum Testen verwendet.
+    """
+    starts, ziele, dauern = FahrzeitModell._cache_stichproben(route_tabelle)
+    if len(dauern) < 2 * testanteil:
+        return None
+    starts, ziele, dauern = _als_array(starts), _als_array(ziele), np.asarray(dauern, dtype=float)
+    test = np.zeros(len(dauern), dtype=bool)
+    test[::testanteil] = True
+
+    modell = FahrzeitModell.anpassen(starts[~test], ziele[~test], dauern[~test])
+    vorhersage = modell.paarweise(starts[test], ziele[test])
+    km = luftlinie_km(starts[test, 0], starts[test, 1], ziele[test, 0], ziele[test, 1])
+    alt = km * LUFTLINIE_MIN_PRO_KM
+    wahr = dauern[test]
+
+    # Hin- und Rückfahrt (wie in _calculate_detour) bestimmt das Band
+    wahres_band = band(2 * wahr, grenzen)
+    return {
+        'stichproben_training': int((~test).sum()),
+        'stichproben_test': int(test.sum()),
+        'modell': {'achsenabschnitt_min': modell.achsenabschnitt, 'min_pro_km': modell.min_pro_km,
+                   'rasterzellen': int(modell.faktoren.size)},
+        'fehler_modell': fehlermasse(vorhersage, wahr),
+        'fehler_luftlinie_1_5': fehlermasse(alt, wahr),
+        'band_treffer_modell': float(np.mean(band(2 * vorhersage, grenzen) == wahres_band)),
+        'band_treffer_luftlinie_1_5': float(np.mean(band(2 * alt, grenzen) == wahres_band)),
+    }
+
+
+def main():
+    from geo_cache import PersistentCache
+
+    parser = argparse.ArgumentParser(description="Fehlerbericht des Offline-Fahrzeitmodells")
+    parser.add_argument('--config', default="config.json")
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    cache = PersistentCache.aus_config(config)
+    bericht = fehlerbericht(cache.route, config['fahrzeit_grenzen'])
+    cache.close()
+
+    if bericht is None:
+        print("⚠️  Zu wenige ORS-Fahrzeiten im Cache für einen Fehlerbericht")
+        return
+
+    print(f"📊 Fahrzeitmodell: {bericht['stichproben_training']} Trainings-, "
+          f"{bericht['stichproben_test']} Teststrecken")
+    print(f"   Modell: {bericht['modell']['achsenabschnitt_min']:.2f} min + "
+          f"{bericht['modell']['min_pro_km']:.3f} min/km, {bericht['modell']['rasterzellen']} Rasterzellen")
+    for name, schluessel in (("Modell", 'fehler_modell'), ("1.5 min/km", 'fehler_luftlinie_1_5')):
+        fehler = bericht[schluessel]
+        print(f"   {name:>10}: MAE {fehler['mae_min']:.2f} min, RMSE {fehler['rmse_min']:.2f} min, "
+              f"MAPE {fehler['mape_prozent']:.1f} %, Bias {fehler['bias_min']:+.2f} min")
+    print(f"   Gleiches Fahrzeit-Band: Modell {bericht['band_treffer_modell']:.1%}, "
+          f"1.5 min/km {bericht['band_treffer_luftlinie_1_5']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistenter Geo-Cache
+SQLite-basierter Speicher für Geocodierungen und Fahrzeiten, der über
+mehrere Läufe hinweg wiederverwendet wird.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Herkunft eines Cache-Eintrags
+QUELLE_ORS = "ors"
+QUELLE_NOMINATIM = "nominatim"
+QUELLE_PLZ_FALLBACK = "plz_fallback"
+QUELLE_LUFTLINIE = "luftlinie"
+QUELLE_GRAPH = "graph"
+
+# Einträge aus diesen Quellen sind nur Näherungen und können später neu abgefragt werden
+FALLBACK_QUELLEN = (QUELLE_PLZ_FALLBACK, QUELLE_LUFTLINIE)
+
+TABELLEN = ("geocode", "route")
+
+
+class CacheTabelle:
+    """
+    Dict-ähnliche Sicht auf eine Tabelle des persistenten Caches.
+    Gelesen wird aus einem In-Memory-Spiegel, geschrieben wird direkt in SQLite.
+    """
+
+    def __init__(self, cache: "PersistentCache", tabelle: str):
+        self._cache = cache
+        self._tabelle = tabelle
+        self._daten: Dict[str, Any] = {}
+        self._zugriffe = set()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._daten
+
+    def __getitem__(self, key: str) -> Any:
+        wert = self._daten[key]
+        self._zugriffe.add(key)
+        return wert
+
+    def __setitem__(self, key: str, wert: Any):
+        self.set(key, wert)
+
+    def __delitem__(self, key: str):
+        del self._daten[key]
+        self._zugriffe.discard(key)
+        self._cache._loeschen(self._tabelle, key)
+
+    def __len__(self) -> int:
+        return len(self._daten)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._daten)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._daten:
+            return self[key]
+        return default
+
+    def set(self, key: str, wert: Any, quelle: str = None, meta: Dict = None):
+        """Speichert einen Wert mit Herkunft und optionalen Eingabedaten (für spätere Neuabfrage)"""
+        self._daten[key] = wert
+        self._cache._schreiben(self._tabelle, key, wert, quelle, meta)
+        for entfernt in self._cache._evict(self._tabelle):
+            self._daten.pop(entfernt, None)
+            self._zugriffe.discard(entfernt)
+
+    def quelle(self, key: str) -> Optional[str]:
+        """Gibt die Herkunft eines Eintrags zurück"""
+        return self._cache._quelle(self._tabelle, key)
+
+    def fallback_eintraege(self) -> List[Tuple[str, Dict]]:
+        """Liefert (key, meta) aller Einträge, die nur aus einer Fallback-Schätzung stammen"""
+        return self._cache._fallback_eintraege(self._tabelle)
+
+    def eintraege(self, quelle: str) -> List[Tuple[str, Any, Dict]]:
+        """Liefert (key, wert, meta) aller Einträge einer Quelle"""
+        return self._cache._eintraege(self._tabelle, quelle)
+
+
+class PersistentCache:
+    """
+    SQLite-Cache mit TTL pro Eintrag, Größenbegrenzung (LRU) und Herkunftsangabe.
+
+    Konfiguration (config.json, Abschnitt "cache"):
+    - pfad: Pfad der SQLite-Datei
+    - ttl_tage: Gültigkeit eines Eintrags in Tagen
+    - max_eintraege: Maximale Anzahl Einträge pro Tabelle (älteste Zugriffe werden verdrängt)
+    """
+
+    def __init__(self, pfad: str = "cache/geo_cache.sqlite", ttl_tage: float = 180,
+                 max_eintraege: int = 200000):
+        self.pfad = pfad
+        self.ttl_sekunden = ttl_tage * 86400 if ttl_tage else None
+        self.max_eintraege = max_eintraege
+
+        if pfad != ":memory:" and os.path.dirname(pfad):
+            os.makedirs(os.path.dirname(pfad), exist_ok=True)
+
+        # Zugriff aus mehreren Abruf-Threads → eine Verbindung, durch Lock geschützt
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(pfad, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for tabelle in TABELLEN:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {tabelle} ("
+                "key TEXT PRIMARY KEY, wert TEXT, quelle TEXT, meta TEXT, "
+                "erstellt REAL, zugriff REAL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {tabelle}_zugriff ON {tabelle}(zugriff)")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {tabelle}_quelle ON {tabelle}(quelle)")
+        self._conn.commit()
+
+        self.geocode = CacheTabelle(self, "geocode")
+        self.route = CacheTabelle(self, "route")
+        self._laden()
+
+    @classmethod
+    def aus_config(cls, config: Dict) -> "PersistentCache":
+        """Erzeugt den Cache aus dem Abschnitt "cache" der Konfiguration"""
+        cache_config = config.get('cache', {})
+        return cls(
+            pfad=cache_config.get('pfad', "cache/geo_cache.sqlite"),
+            ttl_tage=cache_config.get('ttl_tage', 180),
+            max_eintraege=cache_config.get('max_eintraege', 200000),
+        )
+
+    def _tabelle(self, name: str) -> CacheTabelle:
+        return self.geocode if name == "geocode" else self.route
+
+    def _laden(self):
+        """Lädt alle gültigen Einträge in den Speicher und entfernt abgelaufene"""
+        jetzt = time.time()
+        self._geladen_bis = jetzt
+        for name in TABELLEN:
+            if self.ttl_sekunden:
+                self._conn.execute(f"DELETE FROM {name} WHERE erstellt < ?",
+                                   (jetzt - self.ttl_sekunden,))
+            tabelle = self._tabelle(name)
+            for key, wert in self._conn.execute(f"SELECT key, wert FROM {name}"):
+                tabelle._daten[key] = _decode(json.loads(wert))
+        self._conn.commit()
+
+    def nachladen(self) -> int:
+        """
+        Übernimmt Einträge, die seit dem letzten Laden von anderen Prozessen in dieselbe
+        Datei geschrieben wurden (z.B. parallele Batch-Worker). Returns: Anzahl neuer Einträge
+        """
+        with self._lock:
+            stand = self._geladen_bis
+            self._geladen_bis = time.time()
+            neu = 0
+            for name in TABELLEN:
+                tabelle = self._tabelle(name)
+                for key, wert in self._conn.execute(
+                        f"SELECT key, wert FROM {name} WHERE erstellt >= ?", (stand,)):
+                    if key not in tabelle._daten:
+                        neu += 1
+                    tabelle._daten[key] = _decode(json.loads(wert))
+            return neu
+
+    def _schreiben(self, tabelle: str, key: str, wert: Any, quelle: str, meta: Dict):
+        with self._lock:
+            jetzt = time.time()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {tabelle} (key, wert, quelle, meta, erstellt, zugriff) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(wert), quelle, json.dumps(meta) if meta else None, jetzt, jetzt)
+            )
+            self._conn.commit()
+
+    def _loeschen(self, tabelle: str, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {tabelle} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _quelle(self, tabelle: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT quelle FROM {tabelle} WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _fallback_eintraege(self, tabelle: str) -> List[Tuple[str, Dict]]:
+        platzhalter = ", ".join("?" for _ in FALLBACK_QUELLEN)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, meta FROM {tabelle} WHERE quelle IN ({platzhalter})", FALLBACK_QUELLEN
+            ).fetchall()
+        return [(key, json.loads(meta) if meta else {}) for key, meta in rows]
+
+    def _eintraege(self, tabelle: str, quelle: str) -> List[Tuple[str, Any, Dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, wert, meta FROM {tabelle} WHERE quelle = ?", (quelle,)
+            ).fetchall()
+        return [(key, _decode(json.loads(wert)), json.loads(meta) if meta else {})
+                for key, wert, meta in rows]
+
+    def _evict(self, tabelle: str) -> List[str]:
+        """Verdrängt die am längsten nicht genutzten Einträge, wenn die Tabelle zu groß ist"""
+        with self._lock:
+            if not self.max_eintraege:
+                return []
+            anzahl = len(self._tabelle(tabelle)._daten)
+            if anzahl <= self.max_eintraege:
+                return []
+
+            self._zugriffe_speichern(tabelle)
+            ueberschuss = anzahl - self.max_eintraege
+            keys = [row[0] for row in self._conn.execute(
+                f"SELECT key FROM {tabelle} ORDER BY zugriff ASC LIMIT ?", (ueberschuss,)
+            )]
+            self._conn.executemany(f"DELETE FROM {tabelle} WHERE key = ?", [(k,) for k in keys])
+            self._conn.commit()
+            return keys
+
+    def _zugriffe_speichern(self, tabelle: str):
+        with self._lock:
+            cache_tabelle = self._tabelle(tabelle)
+            if not cache_tabelle._zugriffe:
+                return
+            jetzt = time.time()
+            self._conn.executemany(
+                f"UPDATE {tabelle} SET zugriff = ? WHERE key = ?",
+                [(jetzt, key) for key in list(cache_tabelle._zugriffe)]
+            )
+            cache_tabelle._zugriffe.clear()
+
+    def speichern(self):
+        """Schreibt Zugriffszeiten zurück (für die LRU-Verdrängung)"""
+        with self._lock:
+            for name in TABELLEN:
+                self._zugriffe_speichern(name)
+            self._conn.commit()
+
+    def statistik(self) -> Dict[str, Dict[str, int]]:
+        """Anzahl Einträge pro Tabelle und Quelle"""
+        with self._lock:
+            ergebnis = {}
+            for name in TABELLEN:
+                ergebnis[name] = {
+                    quelle or "unbekannt": anzahl for quelle, anzahl in self._conn.execute(
+                        f"SELECT quelle, COUNT(*) FROM {name} GROUP BY quelle"
+                    )
+                }
+            return ergebnis
+
+    def close(self):
+        self.speichern()
+        with self._lock:
+            self._conn.close()
+
+
+def _decode(wert: Any) -> Any:
+    """JSON kennt keine Tupel - Koordinaten wieder als (lat, lon) herstellen"""
+    if isinstance(wert, list):
+        return tuple(wert)
+    return wert
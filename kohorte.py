@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Internes Modell einer Kohorte
+Die Eingabetabellen werden einmalig in kompakte Arrays übersetzt: ganzzahlige IDs
+für Klassen, Einrichtungen und Lehrkraft-Gruppen, eine boolesche Matrix
+Lehrkraft × Klasse, Soll-/Ist-Zähler und Koordinaten. Scoring und Zuteilung
+arbeiten nur auf diesem Modell; pandas bleibt auf Ein- und Ausgabe beschränkt.
+"""
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+Koordinaten = Tuple[float, float]
+
+
+class Kohorte:
+    """
+    Schülerinnen (Position s) und Lehrkräfte (Position l) einer Zuteilung.
+    Lehrkräfte mit gleichem Namen bilden eine Gruppe und teilen sich Ist-Zähler
+    und betreute Einrichtungen (wie bisher über den Namen zusammengefasst).
+    """
+
+    __slots__ = (
+        'schueler_namen', 'klassen', 'klasse_ids', 'einrichtungen', 'einrichtung_ids', 'einrichtung_index',
+        'strassen', 'orte', 'adressen', 'geo_adressen', 'schueler_plz', 'schueler_coords',
+        'lehrkraft_namen', 'lehrkraft_plz', 'lehrkraft_coords', 'gruppen', 'soll', 'klassen_matrix',
+        'ist', 'betreut',
+    )
+
+    def __init__(self, schueler_df: pd.DataFrame, lehrkraefte_df: pd.DataFrame):
+        # Schülerinnen
+        self.schueler_namen: List = schueler_df['Name'].tolist()
+        self.klasse_ids, klassen = pd.factorize(schueler_df['Klasse'])
+        self.klassen: List = list(klassen)
+        self.einrichtung_ids, einrichtungen = pd.factorize(schueler_df['Einrichtung'])
+        self.einrichtungen: List = list(einrichtungen)
+        self.einrichtung_index: Dict[str, int] = {name: i for i, name in enumerate(self.einrichtungen)}
+        self.schueler_plz: List[str] = [str(plz) for plz in schueler_df['PLZ']]
+        self.strassen: List = schueler_df['Straße'].tolist()
+        self.orte: List = schueler_df['Ort'].tolist()
+        self.adressen: List[str] = [f"{strasse}, {plz} {ort}" for strasse, plz, ort in
+                                    zip(self.strassen, schueler_df['PLZ'], self.orte)]
+        # Adresse für Geocodierung und Routing (vereinheitlicht, siehe adressen.py); Ausgabe nutzt adressen
+        self.geo_adressen: List[str] = list(self.adressen)
+        self.schueler_coords: List[Optional[Koordinaten]] = [None] * len(self.schueler_namen)
+
+        # Lehrkräfte
+        self.lehrkraft_namen: List = lehrkraefte_df['Name'].tolist()
+        self.lehrkraft_plz: List = lehrkraefte_df['PLZ_Wohnort'].tolist()
+        self.lehrkraft_coords: List[Optional[Koordinaten]] = [None] * len(self.lehrkraft_namen)
+        self.gruppen = pd.factorize(lehrkraefte_df['Name'])[0]
+        self.soll = lehrkraefte_df['Soll_Anzahl_Betreuungen'].to_numpy()
+
+        # Klassenzugehörigkeit: "FSP23a, FSP23b" wird nur einmal pro Lehrkraft zerlegt
+        self.klassen_matrix = np.zeros((len(self.lehrkraft_namen), len(self.klassen)), dtype=bool)
+        for l_pos, eintrag in enumerate(lehrkraefte_df['Klassen']):
+            unterrichtet = {k.strip() for k in str(eintrag).split(',')}
+            for k_id, klasse in enumerate(self.klassen):
+                self.klassen_matrix[l_pos, k_id] = klasse in unterrichtet
+
+        self.zuruecksetzen()
+
+    @property
+    def n_schueler(self) -> int:
+        return len(self.schueler_namen)
+
+    @property
+    def n_lehrkraefte(self) -> int:
+        return len(self.lehrkraft_namen)
+
+    def zuruecksetzen(self):
+        """Leert Ist-Zähler und betreute Einrichtungen (vor einer neuen Zuteilung)"""
+        n_gruppen = int(self.gruppen.max()) + 1 if len(self.gruppen) else 0
+        self.ist = np.zeros(n_gruppen, dtype=int)
+        self.betreut: List[Set[int]] = [set() for _ in range(n_gruppen)]
+
+    def klassen_match(self) -> np.ndarray:
+        """Boolesche Matrix Schülerin × Lehrkraft: Lehrkraft unterrichtet die Klasse"""
+        return self.klassen_matrix[:, self.klasse_ids].T
+
+    def region(self, praefix: str) -> Tuple[np.ndarray, np.ndarray]:
+        """PLZ-Präfix-Treffer (Schülerin-Einrichtungen, Lehrkraft-Wohnorte)"""
+        return (np.array([plz.startswith(praefix) for plz in self.schueler_plz], dtype=bool),
+                np.array([str(plz).startswith(praefix) for plz in self.lehrkraft_plz], dtype=bool))
+
+    def ist_anzahl(self, l_pos: int) -> int:
+        return int(self.ist[self.gruppen[l_pos]])
+
+    def betreut_einrichtung(self, l_pos: int, s_pos: int) -> bool:
+        return int(self.einrichtung_ids[s_pos]) in self.betreut[self.gruppen[l_pos]]
+
+    def vorbelegen(self, l_pos: int, einrichtung: str) -> Optional[int]:
+        """
+        Zählt eine bestehende Zuteilung außerhalb des Modells (Reparatur-Modus).
+        Returns: ID der Einrichtung, falls sie im Modell vorkommt (sonst None)
+        """
+        gruppe = self.gruppen[l_pos]
+        self.ist[gruppe] += 1
+        einrichtung_id = self.einrichtung_index.get(einrichtung)
+        if einrichtung_id is not None:
+            self.betreut[gruppe].add(einrichtung_id)
+        return einrichtung_id
+
+    def zuteilen(self, s_pos: int, l_pos: int):
+        gruppe = self.gruppen[l_pos]
+        self.ist[gruppe] += 1
+        self.betreut[gruppe].add(int(self.einrichtung_ids[s_pos]))
+
+
+def orte_indizieren(coords: Sequence[Optional[Koordinaten]]) -> Tuple[List[Koordinaten], np.ndarray]:
+    """
+    Fasst gleiche Koordinaten zusammen. Returns: (eindeutige Orte, Index je Eintrag; -1 = keine Koordinaten)
+    """
+    orte: Dict[Koordinaten, int] = {}
+    index = np.full(len(coords), -1, dtype=int)
+    for pos, c in enumerate(coords):
+        # pandas liefert fehlende Koordinaten teils als NaN statt None
+        if isinstance(c, tuple):
+            index[pos] = orte.setdefault(c, len(orte))
+    return list(orte), index
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Laufzeit-Metriken
+Erfasst pro Zuteilungslauf, wo die Zeit verbracht wird: Phasen-Timer,
+API-Aufrufe pro Anbieter/Endpunkt, Wartezeiten durch Rate-Limits,
+Cache-Trefferquoten, Luftlinien-Fallbacks und Score-Berechnungen.
+Optional lässt sich ein Lauf mit cProfile aufzeichnen.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from rate_limit import TokenBucket
+
+# Token-Bucket → (Anbieter, Endpunkt); jede Anfrage holt genau ein Token
+ENDPUNKTE = {
+    'nominatim': ('nominatim', 'geocode'),
+    'ors_directions': ('ors', 'directions'),
+    'ors_matrix': ('ors', 'matrix'),
+}
+
+
+class Laufzeitmetriken:
+    """
+    Metriken eines Laufs. Zähler der Token-Buckets und des Route-Caches sind
+    kumulativ über die Lebensdauer des Tools; gemeldet wird die Differenz
+    seit Beginn des Laufs.
+    """
+
+    def __init__(self, rate_limiter: Dict[str, TokenBucket] = None, routing=None):
+        self.start = time.perf_counter()
+        self.phasen: Dict[str, float] = {}
+        self.zaehler = Counter()
+        self._lock = threading.Lock()
+        self._rate_limiter = rate_limiter or {}
+        self._routing = routing
+        self._stand_limits = {name: (bucket.anfragen, bucket.wartezeit_gesamt, bucket.pausen)
+                              for name, bucket in self._rate_limiter.items()}
+        self._stand_routing = self._routing_stand()
+
+    def _routing_stand(self) -> Tuple[int, int, int, int, int, int]:
+        if self._routing is None:
+            return (0, 0, 0, 0, 0, 0)
+        return (self._routing.treffer, self._routing.fehlschlaege,
+                self._routing.aufrufe_einzeln, self._routing.aufrufe_matrix,
+                self._routing.symmetrie_treffer, len(self._routing.symmetrie_vergleiche))
+
+    @contextmanager
+    def timer(self, phase: str):
+        """Misst eine Phase; mehrfach gemessene Phasen werden addiert"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            dauer = time.perf_counter() - start
+            with self._lock:
+                self.phasen[phase] = self.phasen.get(phase, 0.0) + dauer
+
+    def zaehlen(self, name: str, anzahl: int = 1):
+        with self._lock:
+            self.zaehler[name] += anzahl
+
+    def bericht(self) -> Dict:
+        """Metriken als verschachteltes Dict (JSON-serialisierbar)"""
+        api_aufrufe: Dict[str, Dict[str, int]] = {}
+        wartezeit: Dict[str, float] = {}
+        pausen: Dict[str, int] = {}
+        for name, bucket in self._rate_limiter.items():
+            anfragen_start, wartezeit_start, pausen_start = self._stand_limits[name]
+            anbieter, endpunkt = ENDPUNKTE.get(name, (name, 'anfragen'))
+            api_aufrufe.setdefault(anbieter, {})[endpunkt] = bucket.anfragen - anfragen_start
+            wartezeit[name] = round(bucket.wartezeit_gesamt - wartezeit_start, 3)
+            pausen[name] = bucket.pausen - pausen_start
+
+        treffer, fehlschlaege, einzeln, matrix, symmetrie_treffer, _ = (
+            jetzt - vorher for jetzt, vorher in zip(self._routing_stand(), self._stand_routing)
+        )
+        if self._routing is not None:
+            api_aufrufe.setdefault('routing_backend', {}).update({
+                'backend': self._routing.name, 'einzeln': einzeln, 'matrix': matrix,
+            })
+
+        # Symmetrie-Regel: wiederverwendete Gegenrichtungen und Abweichung zu echten Werten
+        symmetrie = {'aktiv': False, 'wiederverwendet': 0}
+        if self._routing is not None:
+            symmetrie = {'aktiv': self._routing.symmetrisch, 'wiederverwendet': symmetrie_treffer,
+                         **self._routing.symmetrie_fehler(self._stand_routing[5])}
+
+        return {
+            'gesamt_s': round(time.perf_counter() - self.start, 3),
+            'phasen_s': {phase: round(dauer, 3) for phase, dauer in self.phasen.items()},
+            'api_aufrufe': api_aufrufe,
+            'rate_limit': {
+                'wartezeit_s': wartezeit,
+                'wartezeit_gesamt_s': round(sum(wartezeit.values()), 3),
+                'pausen_nach_429': pausen,
+            },
+            'cache': {
+                'geocode': _quote(self.zaehler['geocode_cache_treffer'],
+                                  self.zaehler['geocode_cache_fehlschlaege']),
+                'route': _quote(treffer, fehlschlaege),
+            },
+            'adressen': {
+                'schreibweisen': self.zaehler['adressen_varianten'],
+                'geocodiert': self.zaehler['adressen_geocodiert'],
+                'zusammengefuehrt': self.zaehler['adressen_varianten'] - self.zaehler['adressen_geocodiert'],
+            },
+            'symmetrie': symmetrie,
+            'vorfilter': {
+                'ortspaare': self.zaehler['vorfilter_ortspaare'],
+                'verworfen': self.zaehler['vorfilter_verworfen'],
+                'nachgeladen': self.zaehler['vorfilter_nachgeladen'],
+            },
+            'bei_bedarf': {
+                'offene_ortspaare': self.zaehler['bedarf_offen'],
+                'aufgeloest': self.zaehler['bedarf_aufgeloest'],
+                'nie_geroutet': self.zaehler['bedarf_offen'] - self.zaehler['bedarf_aufgeloest'],
+            },
+            'luftlinien_fallbacks': self.zaehler['luftlinien_fallback'],
+            'score_aufrufe': {
+                'calculate_score': self.zaehler['score_calculate'],
+                'static_score': self.zaehler['score_statisch'],
+                'dynamic_score': self.zaehler['score_dynamisch'],
+                'load_score': self.zaehler['score_last'],
+            },
+        }
+
+    def als_json(self) -> str:
+        return json.dumps(self.bericht(), indent=2, ensure_ascii=False)
+
+    def als_tabelle(self) -> List[Tuple[str, object]]:
+        """Flache (Metrik, Wert)-Zeilen, z.B. für das Excel-Sheet "Laufzeit" """
+        return _flach(self.bericht())
+
+
+def _quote(treffer: int, fehlschlaege: int) -> Dict:
+    gesamt = treffer + fehlschlaege
+    return {'treffer': treffer, 'fehlschlaege': fehlschlaege,
+            'trefferquote': round(treffer / gesamt, 4) if gesamt else None}
+
+
+def _flach(daten: Dict, praefix: str = "") -> List[Tuple[str, object]]:
+    zeilen = []
+    for key, wert in daten.items():
+        name = f"{praefix}.{key}" if praefix else key
+        if isinstance(wert, dict):
+            zeilen.extend(_flach(wert, name))
+        else:
+            zeilen.append((name, wert))
+    return zeilen
+
+
+def dauer_text(sekunden: float) -> str:
+    """Dauer für die Konsole, z.B. "45 s", "12 min" oder "1 h 05 min" """
+    sekunden = int(round(sekunden))
+    if sekunden < 60:
+        return f"{sekunden} s"
+    minuten = (sekunden + 30) // 60
+    if minuten < 60:
+        return f"{minuten} min"
+    return f"{minuten // 60} h {minuten % 60:02d} min"
+
+
+class Fortschritt:
+    """
+    Fortschritt einer Abrufphase: noch offene Schlüssel (nicht im Cache) und die
+    Restzeit nach dem aktuellen Budget des Token-Buckets, inklusive laufender Pause
+    nach HTTP 429. Ausgabe zu Beginn und danach höchstens alle intervall_s Sekunden.
+    """
+
+    def __init__(self, bezeichnung: str, offen: int, bucket: Optional[TokenBucket] = None,
+                 intervall_s: float = 10.0):
+        self.bezeichnung = bezeichnung
+        self.offen = offen
+        self.bucket = bucket
+        self.intervall_s = intervall_s
+        self._lock = threading.Lock()
+        self._letzte_ausgabe = time.monotonic()
+        if offen:
+            self._ausgeben()
+
+    def _ausgeben(self):
+        restzeit = ""
+        if self.bucket is not None and self.bucket.intervall:
+            restzeit = f", noch ca. {dauer_text(self.bucket.restzeit(self.offen))}"
+        print(f"   ⏱️  {self.bezeichnung}: {self.offen} offen{restzeit}")
+
+    def schritt(self, anzahl: int = 1):
+        """Ein Schlüssel ist abgeschlossen (geladen oder endgültig fehlgeschlagen)"""
+        with self._lock:
+            self.offen = max(0, self.offen - anzahl)
+            jetzt = time.monotonic()
+            if self.offen and jetzt - self._letzte_ausgabe >= self.intervall_s:
+                self._letzte_ausgabe = jetzt
+                self._ausgeben()
+
+
+@contextmanager
+def profilieren(pfad: Optional[str] = None, top: int = 20):
+    """
+    cProfile-Hook: zeichnet den Block auf, gibt die teuersten Funktionen
+    (kumulative Zeit) aus und speichert die Rohdaten optional für snakeviz/pstats.
+    """
+    profil = cProfile.Profile()
+    profil.enable()
+    try:
+        yield profil
+    finally:
+        profil.disable()
+        if pfad:
+            profil.dump_stats(pfad)
+        ausgabe = io.StringIO()
+        pstats.Stats(profil, stream=ausgabe).sort_stats('cumulative').print_stats(top)
+        print(f"\n🔬 cProfile (Top {top} nach kumulativer Zeit)"
+              f"{f', Rohdaten: {pfad}' if pfad else ''}:")
+        print(ausgabe.getvalue())
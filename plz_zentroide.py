@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline-Geocodierung von Postleitzahlen
+Kompakte, array-basierte Tabelle mit dem Mittelpunkt jeder deutschen PLZ.
+PLZ-Abfragen (z.B. Wohnorte der Lehrkräfte) werden lokal in Mikrosekunden
+beantwortet, Nominatim wird nur noch für vollständige Adressen benötigt.
+
+Import einer Quelle (GeoNames-Postleitzahlen "DE.txt" oder CSV mit PLZ/Lat/Lon):
+    python plz_zentroide.py DE.txt --ziel daten/plz_zentroide.csv
+"""
+
+import argparse
+import csv
+import os
+import re
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+PLZ_MUSTER = re.compile(r"(?<!\d)(\d{5})(?!\d)")
+
+
+def parse_plz(wert) -> Optional[str]:
+    """
+    Extrahiert eine fünfstellige PLZ aus einer Zelle.
+    Versteht "24111", "24111 Kiel", 24111, 24111.0 und von Excel gekürzte
+    PLZ ohne führende Null (z.B. 1067 → "01067").
+    """
+    if wert is None:
+        return None
+    if isinstance(wert, float):
+        if wert != wert:  # NaN
+            return None
+        if wert.is_integer():
+            wert = int(wert)
+    if isinstance(wert, int):
+        return f"{wert:05d}" if 0 < wert < 100000 else None
+
+    text = str(wert).strip()
+    treffer = PLZ_MUSTER.search(text)
+    if treffer:
+        return treffer.group(1)
+    if re.fullmatch(r"\d{4}", text):
+        return text.zfill(5)
+    return None
+
+
+class PLZZentroide:
+    """
+    Sortierte PLZ mit Koordinaten in drei parallelen Arrays (kein pandas, kein dict):
+    ca. 8.200 deutsche PLZ belegen so weniger als 200 KB.
+    """
+
+    __slots__ = ('_plz', '_lat', '_lon')
+
+    def __init__(self, eintraege: Dict[int, Tuple[float, float]]):
+        self._plz = array('i')
+        self._lat = array('d')
+        self._lon = array('d')
+        for plz in sorted(eintraege):
+            lat, lon = eintraege[plz]
+            self._plz.append(plz)
+            self._lat.append(lat)
+            self._lon.append(lon)
+
+    @classmethod
+    def laden(cls, pfad: str) -> Optional["PLZZentroide"]:
+        """Lädt die Tabelle (CSV mit Spalten plz,lat,lon); None, wenn die Datei fehlt"""
+        if not pfad or not os.path.exists(pfad):
+            return None
+        eintraege = {}
+        with open(pfad, 'r', encoding='utf-8', newline='') as f:
+            for zeile in csv.DictReader(f):
+                eintraege[int(zeile['plz'])] = (float(zeile['lat']), float(zeile['lon']))
+        return cls(eintraege)
+
+    def __len__(self) -> int:
+        return len(self._plz)
+
+    def __contains__(self, plz) -> bool:
+        return self.koordinaten(plz) is not None
+
+    def koordinaten(self, plz) -> Optional[Tuple[float, float]]:
+        """(lat, lon) des PLZ-Mittelpunkts oder None; akzeptiert auch Zellen wie "24111 Kiel" """
+        plz_str = parse_plz(plz)
+        if plz_str is None:
+            return None
+        schluessel = int(plz_str)
+        pos = bisect_left(self._plz, schluessel)
+        if pos < len(self._plz) and self._plz[pos] == schluessel:
+            return (self._lat[pos], self._lon[pos])
+        return None
+
+    def speichern(self, pfad: str):
+        if os.path.dirname(pfad):
+            os.makedirs(os.path.dirname(pfad), exist_ok=True)
+        with open(pfad, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['plz', 'lat', 'lon'])
+            for plz, lat, lon in zip(self._plz, self._lat, self._lon):
+                writer.writerow([f"{plz:05d}", f"{lat:.5f}", f"{lon:.5f}"])
+
+
+def _quelle_lesen(pfad: str) -> List[Tuple[str, float, float]]:
+    """
+    Liest (plz, lat, lon) aus einer Quelldatei:
+    - GeoNames-Postleitzahlen (Tab-getrennt, ohne Kopfzeile, Lat/Lon in Spalte 10/11)
+    - CSV mit Kopfzeile und Spalten plz/postcode, lat/latitude, lon/lng/longitude
+    """
+    with open(pfad, 'r', encoding='utf-8', newline='') as f:
+        erste_zeile = f.readline()
+        f.seek(0)
+
+        if '\t' in erste_zeile and not re.search(r"[A-Za-z]{3,}", erste_zeile.split('\t')[1]):
+            return [(felder[1], float(felder[9]), float(felder[10]))
+                    for felder in csv.reader(f, delimiter='\t') if len(felder) > 10]
+
+        trennzeichen = ';' if erste_zeile.count(';') > erste_zeile.count(',') else ','
+        reader = csv.DictReader(f, delimiter=trennzeichen)
+        spalten = {name.lower().strip(): name for name in reader.fieldnames or []}
+
+        def spalte(*kandidaten):
+            for kandidat in kandidaten:
+                if kandidat in spalten:
+                    return spalten[kandidat]
+            raise ValueError(f"Spalte fehlt: eine von {kandidaten} (vorhanden: {list(spalten)})")
+
+        plz_spalte = spalte('plz', 'postcode', 'postal_code', 'zipcode', 'zip')
+        lat_spalte = spalte('lat', 'latitude', 'breite')
+        lon_spalte = spalte('lon', 'lng', 'longitude', 'laenge', 'länge')
+        return [(zeile[plz_spalte], float(zeile[lat_spalte].replace(',', '.')),
+                 float(zeile[lon_spalte].replace(',', '.'))) for zeile in reader]
+
+
+def importieren(quelle: str, ziel: str) -> int:
+    """Erzeugt die Zentroid-Tabelle; mehrere Orte pro PLZ werden gemittelt. Returns: Anzahl PLZ"""
+    summen: Dict[int, List[float]] = {}
+    for plz, lat, lon in _quelle_lesen(quelle):
+        plz_str = parse_plz(plz)
+        if plz_str is None:
+            continue
+        eintrag = summen.setdefault(int(plz_str), [0.0, 0.0, 0])
+        eintrag[0] += lat
+        eintrag[1] += lon
+        eintrag[2] += 1
+
+    tabelle = PLZZentroide({plz: (lat / n, lon / n) for plz, (lat, lon, n) in summen.items()})
+    tabelle.speichern(ziel)
+    return len(tabelle)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PLZ-Zentroid-Tabelle importieren")
+    parser.add_argument('quelle', help="GeoNames DE.txt oder CSV mit PLZ/Lat/Lon")
+    parser.add_argument('--ziel', default="daten/plz_zentroide.csv", help="Ausgabedatei")
+    args = parser.parse_args()
+
+    anzahl = importieren(args.quelle, args.ziel)
+    print(f"✓ {anzahl} PLZ-Mittelpunkte gespeichert: {args.ziel}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,23 +6,60 @@ Automatische Zuteilung von Lehrkräften zu Schülerinnen-Praktika
 """
 
 import json
+import math
 import os
 import sys
+import time
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
+import numpy as np
 import pandas as pd
-import openrouteservice
-from openrouteservice import client
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
-import time
+import threading
+
+from adressen import adressen_vereinheitlichen
+from bewertung import fahrzeit_punkte, komponenten_berechnen, lastverteilung, statischer_score
+from fahrzeit_matrix import STRECKEN, matrix_speichern
+from fahrzeit_modell import FahrzeitModell
+from geo_cache import (PersistentCache, QUELLE_NOMINATIM,
+                       QUELLE_PLZ_FALLBACK, QUELLE_LUFTLINIE)
+from kohorte import Kohorte, orte_indizieren
+from laufzeit_metriken import Fortschritt, Laufzeitmetriken, dauer_text, profilieren
+from plz_zentroide import PLZZentroide, parse_plz
+from rate_limit import ParallelerAbruf, TokenBucket, retry_after_sekunden
+from reparatur import aenderungen, zuteilung_abgleichen, zuteilung_laden
+from routing_backends import (CachedBackend, Geocoder, GraphBackend, LuftlinienBackend, NominatimGeocoder,
+                              OfflineGeocoder, OrsBackend, RoutingBackend)
+from strassengraph import Strassengraph
+from tabellen_io import StreamingArbeitsmappe, lehrkraft_gruppen, lehrkraft_statistik, tabelle_laden
+from vorfilter import bandgrenzen, effektive_fahrzeit, raumordnung, schranken, untere_schranke, verwerfbar
+from zuteilung_engines import (ENGINES, BedarfsEngine, GreedyEngine, HeapEngine, LokaleSucheEngine, MilpEngine,
+                               ZuteilungsZustand)
+
+# Ergebnis von assign_praktika: Score und seine Komponenten je Zuteilung; die Begründung
+# wird erst in save_results daraus erzeugt (siehe begruendungen)
+SCORE_KOMPONENTEN = ['Klasse_Punkte', 'Fahrzeit_min', 'Fahrzeit_Punkte', 'Fahrzeit_Malus', 'Region_Punkte',
+                     'Konsistenz_Punkte', 'Last_Punkte', 'Ist_vorher', 'Soll']
+# Eingaben des letzten Laufs (siehe lauf_datei); Geocodierungen und Fahrzeiten selbst liegen im Cache
+LAUF_DATEI = "letzter_lauf.json"
+
+ERGEBNIS_SPALTEN = ['Schülerin', 'Klasse', 'Einrichtung', 'Adresse', 'Lehrkraft', 'Score'] + SCORE_KOMPONENTEN
 
 
 class PraktikumszuteilungTool:
-    def __init__(self, config_path: str = "config.json"):
-        """Initialisiert das Tool mit Konfiguration"""
-        with open(config_path, 'r', encoding='utf-8') as f:
-            self.config = json.load(f)
+    def __init__(self, config_path: str = "config.json", geocoder: Geocoder = None,
+                 routing_backend: RoutingBackend = None, config: Dict = None):
+        """
+        Initialisiert das Tool mit Konfiguration
+        geocoder/routing_backend ersetzen optional die Backends aus der Konfiguration
+        (z.B. deterministische Fake-Backends im Benchmark, siehe benchmark.py)
+        config: bereits geladene Konfiguration statt config_path (z.B. im Batch-Betrieb)
+        """
+        if config is not None:
+            self.config = config
+        else:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                self.config = json.load(f)
 
         self.api_key = self.config['api_key']
         if self.api_key == "HIER_IHREN_OPENROUTESERVICE_API_KEY_EINTRAGEN":
@@ -30,16 +67,159 @@ class PraktikumszuteilungTool:
             print("   Registrierung: https://openrouteservice.org/dev/#/signup")
             sys.exit(1)
 
-        # ORS Client mit deaktiviertem Retry (wir behandeln Rate-Limits selbst)
-        self.ors_client = client.Client(key=self.api_key, retry_over_query_limit=False)
-        self.geolocator = Nominatim(user_agent="praktikumszuteilung_tool")
-        self.geocode_cache = {}
-        self.route_cache = {}
-
-        # Schule geocodieren
+        # ORS- und Nominatim-Client entstehen erst bei der ersten Anfrage (siehe ors_client,
+        # geolocator): Läufe aus dem Cache, lokale Backends und --probelauf brauchen sie nicht
+        self.routing_config = self.config.get('routing', {})
+        self._ors_client = None
+        self._geolocator = None
+        self._client_lock = threading.Lock()
+        # Antwort-Header pro Thread merken (für Retry-After bei HTTP 429)
+        self._antwort_header = threading.local()
+
+        # Rate-Limits pro Anbieter (Anfragen pro Minute) und paralleler Abruf
+        limits = self.config.get('rate_limits', {})
+        self.rate_limiter = {
+            'nominatim': TokenBucket(limits.get('nominatim_pro_minute', 60)),
+            'ors_directions': TokenBucket(limits.get('ors_directions_pro_minute', 40)),
+            'ors_matrix': TokenBucket(limits.get('ors_matrix_pro_minute', 40)),
+        }
+        self.abruf = ParallelerAbruf(limits.get('parallele_anfragen', 4))
+
+        # Persistenter Cache (SQLite) für Geocodierungen und Fahrzeiten, über Läufe hinweg
+        self.cache = PersistentCache.aus_config(self.config)
+        self.geocode_cache = self.cache.geocode
+        self.route_cache = self.cache.route
+
+        # Offline-Modus: keine Anfragen an ORS/Nominatim, Fahrzeiten aus dem Fahrzeitmodell
+        self.offline = self.routing_config.get('offline', False)
+        # Luftlinien-Fallback, kalibriert an den ORS-Fahrzeiten im Cache (siehe fahrzeit_modell.py)
+        self.fahrzeit_modell = None
+        if self.routing_config.get('fahrzeit_modell', True):
+            self.fahrzeit_modell = FahrzeitModell.aus_cache(
+                self.route_cache, min_stichproben=self.routing_config.get('modell_min_stichproben', 20)
+            )
+        if self.fahrzeit_modell is not None:
+            print(f"✓ Fahrzeitmodell kalibriert: {self.fahrzeit_modell.achsenabschnitt:.1f} min + "
+                  f"{self.fahrzeit_modell.min_pro_km:.2f} min/km ({self.fahrzeit_modell.stichproben} Strecken)")
+
+        # Backends für Geocodierung und Routing (siehe routing_backends.py)
+        if geocoder is not None:
+            self.geocoder = geocoder
+        elif self.offline:
+            self.geocoder = OfflineGeocoder()
+        else:
+            self.geocoder = NominatimGeocoder(lambda: self.geolocator, self.rate_limiter['nominatim'])
+        self.luftlinie = LuftlinienBackend(self.fahrzeit_modell)
+        # Cache-Schlüssel optional auf ein Raster eingerastet, Gegenrichtung optional wiederverwendet
+        self.routing = CachedBackend(
+            routing_backend or self._routing_backend(), self.route_cache,
+            raster_m=self.routing_config.get('raster_m'),
+            symmetrisch=self.routing_config.get('symmetrisch', False),
+            stichprobe=self.routing_config.get('symmetrie_stichprobe', 0.0),
+        )
+        # Räumlicher Vorfilter (siehe vorfilter.py); verworfene Paare des letzten Laufs
+        self.vorfilter_config = self.config.get('vorfilter', {})
+        self.vorfilter_df: Optional[pd.DataFrame] = None
+        # Adress-Normalisierung (siehe adressen.py); zusammengeführte Adressen des letzten Laufs
+        self.adressen_config = self.config.get('adressen', {})
+        self.adressen_df: Optional[pd.DataFrame] = None
+        # Einzelstrecken des letzten Laufs pro Ort (für den Export der Fahrzeit-Matrix)
+        self.strecken: Optional[Dict[str, np.ndarray]] = None
+        # routing.bei_bedarf: Wohnort → Einrichtung erst anfragen, wenn die Zuteilung das Paar
+        # wählen würde. Nur für Einzelanfragen; eine Matrix-Anfrage liefert ganze Blöcke günstiger.
+        self.bei_bedarf = self.routing_config.get('bei_bedarf', False)
+        if self.bei_bedarf and (self.routing_config.get('matrix_prefetch', True) or self.routing.name != "ors"):
+            print("⚠️  routing.bei_bedarf wirkt nur ohne Matrix-Prefetch (ORS-Einzelanfragen) → ignoriert")
+            self.bei_bedarf = False
+        # Metriken des aktuellen Laufs (wird von assign_praktika neu begonnen)
+        self.metriken = Laufzeitmetriken(self.rate_limiter, self.routing)
+        if self.offline:
+            print(f"✓ Offline-Modus: Fahrzeiten aus Cache und Backend '{self.routing.name}', "
+                  f"keine API-Anfragen")
+
+        # Offline-Tabelle der PLZ-Mittelpunkte (optional, siehe plz_zentroide.py)
+        self.plz_zentroide = PLZZentroide.laden(self.config.get('plz_zentroide', "daten/plz_zentroide.csv"))
+        if self.plz_zentroide is not None:
+            print(f"✓ PLZ-Tabelle geladen: {len(self.plz_zentroide)} PLZ (offline)")
+
+        # Schule: erst beim ersten Zugriff geocodieren, ab dem zweiten Lauf aus dem Cache
         self.schule_adresse = self.config['schule_adresse']
-        self.schule_coords = self._geocode(self.schule_adresse)
-        print(f"✓ Schule geocodiert: {self.schule_coords}")
+        self._schule_coords: Optional[Tuple[float, float]] = None
+        self._schule_geocodiert = False
+
+    @property
+    def schule_coords(self) -> Optional[Tuple[float, float]]:
+        """Koordinaten der Schule (einmal geocodiert, danach im persistenten Cache)"""
+        if not self._schule_geocodiert:
+            self._schule_coords = self._geocode(self.schule_adresse, parse_plz(self.schule_adresse))
+            self._schule_geocodiert = True
+            print(f"✓ Schule geocodiert: {self._schule_coords}")
+        return self._schule_coords
+
+    @property
+    def ors_client(self):
+        """
+        ORS-Client mit deaktiviertem Retry (wir behandeln Rate-Limits selbst), beim ersten
+        Zugriff erzeugt. Optional eigene Server-URL (z.B. lokale ORS-Instanz oder Test-Server)
+        """
+        with self._client_lock:
+            if self._ors_client is None:
+                from openrouteservice import client
+                ors_kwargs = {'requests_kwargs': {'hooks': {'response': self._merke_antwort_header}}}
+                if self.routing_config.get('ors_base_url'):
+                    ors_kwargs['base_url'] = self.routing_config['ors_base_url']
+                self._ors_client = client.Client(key=self.api_key, retry_over_query_limit=False, **ors_kwargs)
+            return self._ors_client
+
+    @property
+    def geolocator(self):
+        """Nominatim-Client, beim ersten Zugriff erzeugt"""
+        with self._client_lock:
+            if self._geolocator is None:
+                from geopy.geocoders import Nominatim
+                self._geolocator = Nominatim(user_agent="praktikumszuteilung_tool")
+            return self._geolocator
+
+    @property
+    def laufzeiten(self) -> Dict[str, float]:
+        """Laufzeit pro Phase in Sekunden (aus den Metriken des letzten Laufs)"""
+        return self.metriken.phasen
+
+    def _routing_backend(self) -> RoutingBackend:
+        """
+        Wählt das Routing-Backend laut routing.backend:
+        "ors" (Standard), "graph" (lokaler Straßengraph) oder "luftlinie" (Fahrzeitmodell).
+        Im Offline-Modus wird statt ORS die Luftlinien-Schätzung verwendet.
+        """
+        name = self.routing_config.get('backend', "ors")
+        if name not in ("ors", "graph", "luftlinie"):
+            raise ValueError(f"Unbekanntes Routing-Backend '{name}' (erlaubt: ors, graph, luftlinie)")
+
+        if name == "graph":
+            pfad = self.routing_config.get('graph_pfad', "daten/strassengraph.npz")
+            graph = Strassengraph.laden(pfad)
+            if graph is not None:
+                print(f"✓ Straßengraph geladen: {len(graph)} Knoten, {graph.anzahl_kanten} Kanten (lokales Routing)")
+                return GraphBackend(graph)
+            print(f"⚠️  Straßengraph nicht gefunden: {pfad} → nutze "
+                  f"{'Luftlinien-Schätzung' if self.offline else 'OpenRouteService'}")
+
+        if name == "luftlinie" or self.offline:
+            return self.luftlinie
+        return OrsBackend(
+            lambda: self.ors_client, self.rate_limiter['ors_directions'], self.rate_limiter['ors_matrix'],
+            self._ors_rate_limit_wartezeit,
+            max_orte=self.routing_config.get('matrix_max_orte', 50),
+            max_routen=self.routing_config.get('matrix_max_routen', 3500),
+        )
+
+    def _merke_antwort_header(self, response, *args, **kwargs):
+        """requests-Hook: Header der letzten ORS-Antwort dieses Threads"""
+        self._antwort_header.headers = response.headers
+
+    def _ors_rate_limit_wartezeit(self) -> float:
+        """Wartezeit nach HTTP 429 laut Retry-After bzw. x-ratelimit-reset (Standard 65 s)"""
+        return retry_after_sekunden(getattr(self._antwort_header, 'headers', None))
 
     def _geocode(self, adresse: str, plz: str = None) -> Tuple[float, float]:
         """
@@ -47,25 +227,25 @@ class PraktikumszuteilungTool:
         Mit Fallback auf PLZ-basierte Suche bei Fehlern
         """
         if adresse in self.geocode_cache:
+            self.metriken.zaehlen('geocode_cache_treffer')
             return self.geocode_cache[adresse]
+        self.metriken.zaehlen('geocode_cache_fehlschlaege')
 
         try:
-            time.sleep(1)  # Nominatim rate limit
-            location = self.geolocator.geocode(adresse)
-            if location:
-                coords = (location.latitude, location.longitude)
-                self.geocode_cache[adresse] = coords
+            coords = self.geocoder.geocode(adresse)
+            if coords:
+                self.geocode_cache.set(adresse, coords, QUELLE_NOMINATIM,
+                                       {'adresse': adresse, 'plz': plz})
                 return coords
             else:
                 # Fallback: Versuche nur mit PLZ
                 if plz:
                     print(f"⚠️  Adresse nicht gefunden: {adresse}")
                     print(f"   → Fallback: Versuche nur PLZ {plz}")
-                    time.sleep(1)
-                    plz_location = self.geolocator.geocode(f"{plz}, Deutschland")
-                    if plz_location:
-                        coords = (plz_location.latitude, plz_location.longitude)
-                        self.geocode_cache[adresse] = coords
+                    coords = self._geocode_plz(plz)
+                    if coords:
+                        self.geocode_cache.set(adresse, coords, QUELLE_PLZ_FALLBACK,
+                                               {'adresse': adresse, 'plz': plz})
                         print(f"   ✓ PLZ-basierte Geocodierung erfolgreich")
                         return coords
                 print(f"⚠️  Adresse und PLZ nicht gefunden: {adresse}")
@@ -76,85 +256,185 @@ class PraktikumszuteilungTool:
             if plz:
                 try:
                     print(f"   → Fallback: Versuche nur PLZ {plz}")
-                    time.sleep(1)
-                    plz_location = self.geolocator.geocode(f"{plz}, Deutschland")
-                    if plz_location:
-                        coords = (plz_location.latitude, plz_location.longitude)
-                        self.geocode_cache[adresse] = coords
+                    coords = self._geocode_plz(plz)
+                    if coords:
+                        self.geocode_cache.set(adresse, coords, QUELLE_PLZ_FALLBACK,
+                                               {'adresse': adresse, 'plz': plz})
                         print(f"   ✓ PLZ-basierte Geocodierung erfolgreich")
                         return coords
                 except Exception as plz_error:
                     print(f"   ⚠️  Auch PLZ-Geocoding fehlgeschlagen: {plz_error}")
             return None
 
+    def _geocode_plz(self, plz) -> Optional[Tuple[float, float]]:
+        """
+        Geocodiert einen Wohnort, der nur als PLZ vorliegt (auch Zellen wie "24111 Kiel").
+        Ohne Netzwerk, wenn die PLZ in der Zentroid-Tabelle steht; sonst wie bisher über
+        Nominatim mit "PLZ, Deutschland" (gecacht).
+        """
+        if self.plz_zentroide is not None:
+            coords = self.plz_zentroide.koordinaten(plz)
+            if coords:
+                return coords
+        return self._geocode(f"{parse_plz(plz) or plz}, Deutschland")
+
+    def _geocode_offen(self, modell: Kohorte) -> set:
+        """Abruf-Schlüssel (siehe _geocodieren) der Orte, die noch nicht im Cache stehen"""
+        offen = {('geocode', adresse) for adresse in modell.geo_adressen if adresse not in self.geocode_cache}
+        for plz in modell.lehrkraft_plz:
+            if self.plz_zentroide is not None and self.plz_zentroide.koordinaten(plz):
+                continue
+            if f"{parse_plz(plz) or plz}, Deutschland" not in self.geocode_cache:
+                offen.add(('plz', str(plz)))
+        return offen
+
+    def _bucket(self, name: str) -> Optional[TokenBucket]:
+        """Token-Bucket für die Restzeit im Fortschritt; None, wenn das Backend keine Anfragen stellt"""
+        if name == 'nominatim':
+            return self.rate_limiter[name] if isinstance(self.geocoder, NominatimGeocoder) else None
+        return self.rate_limiter[name] if self.routing.name == "ors" else None
+
     def _get_route_duration(self, start_coords: Tuple[float, float],
-                           end_coords: Tuple[float, float], retry_on_rate_limit: bool = True) -> Optional[float]:
+                           end_coords: Tuple[float, float]) -> Optional[float]:
         """
-        Berechnet Fahrtzeit in Minuten zwischen zwei Koordinaten
+        Berechnet Fahrtzeit in Minuten zwischen zwei Koordinaten (Cache, dann Routing-Backend)
         Mit Fallback auf Luftlinien-Schätzung bei Routing-Fehlern
         """
-        cache_key = f"{start_coords}_{end_coords}"
-        if cache_key in self.route_cache:
-            return self.route_cache[cache_key]
-
-        try:
-            # OpenRouteService erwartet (lon, lat) statt (lat, lon)
-            coords = [[start_coords[1], start_coords[0]],
-                     [end_coords[1], end_coords[0]]]
-
-            route = self.ors_client.directions(
-                coordinates=coords,
-                profile='driving-car',
-                format='geojson'
-            )
-
-            # Dauer in Sekunden, umrechnen in Minuten
-            duration_min = route['features'][0]['properties']['segments'][0]['duration'] / 60
-            self.route_cache[cache_key] = duration_min
-            time.sleep(1.6)  # Rate limiting: 40 req/min → 1.5s + Puffer
-            return duration_min
-
-        except openrouteservice.exceptions.ApiError as e:
-            error_str = str(e)
-
-            # Behandlung von Rate-Limit (HTTP 429)
-            if '429' in error_str or 'rate limit' in error_str.lower():
-                if retry_on_rate_limit:
-                    print(f"⚠️  Rate-Limit erreicht! Warte 65 Sekunden...")
-                    time.sleep(65)
-                    print(f"   → Setze Verarbeitung fort...")
-                    # Rekursiver Aufruf ohne weiteres Retry
-                    return self._get_route_duration(start_coords, end_coords, retry_on_rate_limit=False)
-                else:
-                    print(f"⚠️  Rate-Limit bleibt, nutze Luftlinien-Schätzung")
-
-            # Stille Behandlung von bekannten Routing-Problemen
-            elif '404' in error_str and '2010' in error_str:
-                # Koordinate nicht routingfähig (z.B. auf Wiese/im Wasser) → stiller Fallback
-                pass
-            elif '2099' in error_str:
-                # Keine Route gefunden → stiller Fallback
-                pass
-            else:
-                # Nur bei unerwarteten Fehlern ausgeben
-                print(f"⚠️  Routing-Fehler: {e}")
-
+        duration_min = self.routing.fahrzeit(start_coords, end_coords)
+        if duration_min is None:
             # Fallback auf Luftlinie
-            dist_km = geodesic(start_coords, end_coords).kilometers
-            duration_min = dist_km * 1.5  # Schätzung: 1km ≈ 1.5min
-            self.route_cache[cache_key] = duration_min
-            return duration_min
+            self.metriken.zaehlen('luftlinien_fallback')
+            duration_min = self.luftlinie.fahrzeit(start_coords, end_coords)
+            self.routing.speichern(start_coords, end_coords, duration_min, QUELLE_LUFTLINIE)
+        return duration_min
 
-        except Exception as e:
-            # Nur unerwartete Fehler ausgeben
-            if 'rate limit' not in str(e).lower():
-                print(f"⚠️  Unerwarteter Routing-Fehler: {e}")
-
-            # Fallback auf Luftlinie
-            dist_km = geodesic(start_coords, end_coords).kilometers
-            duration_min = dist_km * 1.5  # Schätzung: 1km ≈ 1.5min
-            self.route_cache[cache_key] = duration_min
-            return duration_min
+    def _prefetch_matrix(self, quellen: List[Tuple[float, float]], ziele: List[Tuple[float, float]],
+                         benoetigt: Callable[[Tuple[float, float], Tuple[float, float]], bool] = None) -> int:
+        """
+        Lädt alle noch fehlenden Fahrzeiten quellen × ziele über den Matrix-Aufruf des
+        Routing-Backends in den Cache. Bei ORS werden die Anfragen in Blöcke zerlegt,
+        die die Grenzen für Orte und Routen pro Anfrage einhalten.
+        benoetigt: optional nur Blöcke anfragen, die mindestens ein solches Paar enthalten
+        Returns: Anzahl der Matrix-Anfragen
+        """
+        def fehlt(q, z) -> bool:
+            return q != z and not self.routing.bekannt(q, z) and (benoetigt is None or benoetigt(q, z))
+
+        # Nur Quellen mit fehlenden Paaren anfragen (z.B. bei routing.symmetrisch nur die
+        # Stichprobe statt jedes Blocks, in dem eine Stichproben-Strecke liegt)
+        quellen = [q for q in quellen if any(fehlt(q, z) for z in ziele)]
+        if not quellen:
+            return 0
+
+        quellen_block, ziele_block = self._blockgroesse(len(quellen), len(ziele))
+
+        # Blöcke mit fehlenden Paaren sammeln (nur diese werden angefragt)
+        bloecke = []
+        for q_start in range(0, len(quellen), quellen_block):
+            q_teil = quellen[q_start:q_start + quellen_block]
+            for z_start in range(0, len(ziele), ziele_block):
+                z_teil = ziele[z_start:z_start + ziele_block]
+                if any(fehlt(q, z) for q in q_teil for z in z_teil):
+                    bloecke.append((tuple(q_teil), tuple(z_teil)))
+
+        # Parallel abrufen, das Rate-Limit gilt für alle Threads gemeinsam; routbare Paare
+        # landen im Cache, nicht routbare bleiben offen → späterer Fallback in _get_route_duration
+        erledigt = None
+        if self.routing.max_orte:
+            fortschritt = Fortschritt("Matrix-Anfragen", len(bloecke), self._bucket('ors_matrix'))
+            erledigt = lambda _: fortschritt.schritt()
+        self.abruf.alle({
+            ('matrix', block): (self.routing.matrix, list(block[0]), list(block[1]))
+            for block in bloecke
+        }, erledigt)
+        anfragen = len(bloecke)
+        return anfragen
+
+    def _blockgroesse(self, n_quellen: int, n_ziele: int) -> Tuple[int, int]:
+        """Quellen und Ziele pro Matrix-Anfrage"""
+        if self.routing.max_orte:
+            max_orte, max_routen = self.routing.max_orte, self.routing.max_routen
+            # Blockgröße: Quellen und Ziele teilen sich das Orte-Limit, Produkt ≤ Routen-Limit
+            quellen_block = max(1, min(n_quellen, max_orte // 2, max_routen))
+            ziele_block = max(1, min(n_ziele, max_orte - quellen_block, max_routen // quellen_block))
+            return quellen_block, ziele_block
+        # Lokale Backends ohne Größenlimit: die gesamte Matrix in einem Aufruf
+        return max(1, n_quellen), max(1, n_ziele)
+
+    def prefetch_fahrzeiten(self, lehrkraft_coords: List[Tuple[float, float]],
+                            einrichtung_coords: List[Tuple[float, float]]):
+        """
+        Lädt alle Fahrzeiten, die _calculate_detour benötigt, vorab per ORS-Matrix:
+        - Schule → Einrichtung, Wohnort → Einrichtung, Wohnort → Schule (ein Block)
+        - Einrichtung → Schule (zweiter Block; mit routing.symmetrisch entfällt er bis
+          auf die Stichprobe, weil Schule → Einrichtung bereits vorliegt)
+        """
+        # Ein Ort pro Cache-Schlüssel (bei routing.raster_m: pro Rasterzelle)
+        lehrkraft_coords = self.routing.orte([c for c in lehrkraft_coords if isinstance(c, tuple)])
+        einrichtung_coords = self.routing.orte([c for c in einrichtung_coords if isinstance(c, tuple)])
+        if not einrichtung_coords or not self.schule_coords:
+            return
+
+        print(f"\n🗺️  Lade Fahrzeiten per Matrix ({len(lehrkraft_coords)} Wohnorte, "
+              f"{len(einrichtung_coords)} Einrichtungen, Backend: {self.routing.name})...")
+        schule = self.schule_coords
+        if not self.vorfilter_config.get('aktiv', False):
+            anfragen = self._prefetch_matrix([schule] + lehrkraft_coords, einrichtung_coords + [schule])
+            anfragen += self._prefetch_matrix(einrichtung_coords, [schule])
+        else:
+            # Vorfilter: zuerst die Blöcke mit Strecken von/zur Schule, danach nur Blöcke mit
+            # Paaren, die der Vorfilter nicht verwirft. Räumlich sortiert, damit verworfene
+            # Paare ganze Blöcke füllen.
+            lehrkraft_coords, einrichtung_coords = raumordnung(lehrkraft_coords), raumordnung(einrichtung_coords)
+            quellen, ziele = [schule] + lehrkraft_coords, einrichtung_coords + [schule]
+            anfragen = self._prefetch_matrix(quellen, ziele, lambda q, z: q == schule or z == schule)
+            anfragen += self._prefetch_matrix(einrichtung_coords, [schule])
+            dauer = self._get_route_duration
+            verworfen = self._verworfene_paare(
+                einrichtung_coords, lehrkraft_coords,
+                np.array([dauer(schule, e) for e in einrichtung_coords]),
+                np.array([dauer(e, schule) for e in einrichtung_coords]),
+                np.array([dauer(w, schule) for w in lehrkraft_coords]),
+            )[0]
+            verworfene_paare = {(lehrkraft_coords[j], einrichtung_coords[i]) for i, j in zip(*np.nonzero(verworfen))}
+            anfragen += self._prefetch_matrix(quellen, ziele, lambda q, z: (q, z) not in verworfene_paare)
+            print(f"   ✓ Vorfilter: {len(verworfene_paare)} von {verworfen.size} Wohnort-Einrichtungs-Paaren "
+                  f"ohne Routing")
+        print(f"   ✓ {anfragen} Matrix-Anfragen, {len(self.route_cache)} Fahrzeiten im Cache")
+
+    def aktualisiere_fallbacks(self) -> Dict[str, int]:
+        """
+        Fragt alle Cache-Einträge erneut ab, die nur aus einem Fallback stammen
+        (PLZ-Geocodierung bzw. Luftlinien-Schätzung). Exakte Einträge bleiben unberührt.
+        Returns: Anzahl der verbesserten Einträge pro Tabelle
+        """
+        verbessert = {'geocode': 0, 'route': 0}
+        if self.offline:
+            print("⚠️  Offline-Modus: Fallback-Einträge können nur online neu abgefragt werden")
+            return verbessert
+        print("\n🔁 Aktualisiere Fallback-Einträge im Cache...")
+
+        geocode_fallbacks = self.geocode_cache.fallback_eintraege()
+        print(f"   → {len(geocode_fallbacks)} Geocodierungen mit PLZ-Fallback")
+        for adresse, meta in geocode_fallbacks:
+            del self.geocode_cache[adresse]
+            self._geocode(adresse, meta.get('plz'))
+            if self.geocode_cache.quelle(adresse) == QUELLE_NOMINATIM:
+                verbessert['geocode'] += 1
+
+        route_fallbacks = self.route_cache.fallback_eintraege()
+        print(f"   → {len(route_fallbacks)} Fahrzeiten mit Luftlinien-Schätzung")
+        for cache_key, meta in route_fallbacks:
+            if 'start' not in meta or 'ende' not in meta:
+                continue
+            del self.route_cache[cache_key]
+            self._get_route_duration(tuple(meta['start']), tuple(meta['ende']))
+            if self.route_cache.quelle(cache_key) == self.routing.quelle:
+                verbessert['route'] += 1
+
+        self.cache.speichern()
+        print(f"   ✓ {verbessert['geocode']} Geocodierungen und {verbessert['route']} Fahrzeiten verbessert")
+        return verbessert
 
     def _calculate_detour(self, lehrkraft_coords: Tuple[float, float],
                          einrichtung_coords: Tuple[float, float]) -> float:
@@ -167,7 +447,8 @@ class PraktikumszuteilungTool:
         Nimmt die günstigste Option als Bewertung.
         WICHTIG: Alle Zeiten sind Gesamt-Fahrzeiten (round-trip), nicht nur Hinweg!
         """
-        if not lehrkraft_coords or not einrichtung_coords:
+        # pandas liefert fehlende Koordinaten beim Zeilenzugriff teils als NaN statt None
+        if not isinstance(lehrkraft_coords, tuple) or not isinstance(einrichtung_coords, tuple):
             return 999  # Ungültige Koordinaten
 
         # Berechne relevante Fahrzeiten (einzelne Strecken)
@@ -202,287 +483,933 @@ class PraktikumszuteilungTool:
 
         return effective_time
 
-    def _is_within_capacity(self, lehrkraft: pd.Series, current_assignments: Dict[str, List[str]]) -> bool:
+    def _is_within_capacity(self, modell: Kohorte, l_pos: int) -> bool:
         """
         Prüft, ob Lehrkraft noch Kapazität hat (harte Grenze: Soll +1)
         """
-        current_count = len(current_assignments.get(lehrkraft['Name'], []))
-        soll_anzahl = lehrkraft['Soll_Anzahl_Betreuungen']
-        return current_count < soll_anzahl + 1
+        return modell.ist_anzahl(l_pos) < modell.soll[l_pos] + 1
 
-    def _calculate_score(self, lehrkraft: pd.Series, schueler: pd.Series,
-                        einrichtung_coords: Tuple[float, float],
-                        current_assignments: Dict[str, List[str]]) -> Tuple[float, str]:
+    def _verworfene_paare(self, einrichtungen: List[Tuple[float, float]], wohnorte: List[Tuple[float, float]],
+                          schule_to_einrichtung: np.ndarray, einrichtung_to_schule: np.ndarray,
+                          wohnort_to_schule: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Berechnet Score für Lehrkraft-Schüler-Paarung
-        Returns: (score, begründung)
+        Vorfilter (vorfilter.aktiv oder routing.bei_bedarf): Paare Einrichtung × Wohnort, deren
+        Fahrzeit Wohnort → Einrichtung den Score nicht ändern kann. Returns: (verworfen, untere,
+        obere Schranke der effektiven Fahrzeit); ohne Vorfilter ist nichts verworfen
         """
-        score = 0
-        reasons = []
+        schranke = untere_schranke(einrichtungen, wohnorte, einrichtung_to_schule, wohnort_to_schule,
+                                   self.vorfilter_config.get('max_kmh', 130))
+        untere, obere = schranken(schule_to_einrichtung, einrichtung_to_schule, wohnort_to_schule, schranke)
+        if not self.vorfilter_config.get('aktiv', False) and not self.bei_bedarf:
+            return np.zeros(schranke.shape, dtype=bool), untere, obere
+        return verwerfbar(untere, obere, bandgrenzen(self.config['fahrzeit_grenzen'])), untere, obere
+
+    def _fahrzeiten(self, modell: Kohorte) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Effektive Fahrzeit (siehe _calculate_detour) für alle Paare Schülerin × Lehrkraft.
+        Jede Strecke wird nur einmal pro Ortspaar nachgeschlagen (gleiche Einrichtungen
+        bzw. Wohnorte teilen sich die Fahrzeiten). NaN, wenn Koordinaten fehlen.
+        Vom Vorfilter verworfene Paare werden nicht geroutet; sie erhalten die Rundfahrt ab
+        Schule (gleiches Fahrzeit-Band wie die tatsächliche Fahrzeit).
+        Mit routing.bei_bedarf werden nur bereits bekannte Strecken verwendet; die übrigen
+        Paare bleiben offen und erhalten die untere Schranke (bester möglicher Score).
+        Returns: (Fahrzeiten, verworfen, offen) - alle Schülerin × Lehrkraft
+        """
+        zeiten = np.full((modell.n_schueler, modell.n_lehrkraefte), np.nan)
+        vorgefiltert = np.zeros(zeiten.shape, dtype=bool)
+        offen = np.zeros(zeiten.shape, dtype=bool)
+        self.vorfilter_df = None
+        self.strecken = None
+        einrichtungen, e_index = orte_indizieren(modell.schueler_coords)
+        wohnorte, w_index = orte_indizieren(modell.lehrkraft_coords)
+        if not einrichtungen or not wohnorte or not self.schule_coords:
+            return zeiten, vorgefiltert, offen
+
+        schule, n_einrichtungen = self.schule_coords, len(einrichtungen)
+        schulwege = self._strecken([(schule, e) for e in einrichtungen] + [(e, schule) for e in einrichtungen]
+                                   + [(w, schule) for w in wohnorte], "Fahrzeiten Schule")
+        schule_to_einrichtung = schulwege[:n_einrichtungen]
+        einrichtung_to_schule = schulwege[n_einrichtungen:2 * n_einrichtungen]
+        wohnort_to_schule = schulwege[2 * n_einrichtungen:]
+        verworfen, untere, obere = self._verworfene_paare(
+            einrichtungen, wohnorte, schule_to_einrichtung, einrichtung_to_schule, wohnort_to_schule
+        )
+        # Einrichtung × Wohnort (verworfene und bei Bedarf noch unbekannte Paare ohne Routing)
+        ungeroutet = verworfen.copy()
+        if self.bei_bedarf:
+            ungeroutet |= np.array([[not self.routing.bekannt(w, e) for w in wohnorte] for e in einrichtungen])
+        wohnort_to_einrichtung = np.full(ungeroutet.shape, np.nan)
+        zeilen, spalten = np.nonzero(~ungeroutet)
+        wohnort_to_einrichtung[zeilen, spalten] = self._strecken(
+            [(wohnorte[j], einrichtungen[i]) for i, j in zip(zeilen, spalten)], "Fahrzeiten Wohnort → Einrichtung"
+        )
 
-        # Kriterium 3 (Prio 1): Klassenübereinstimmung
-        lehrkraft_klassen = [k.strip() for k in str(lehrkraft['Klassen']).split(',')]
-        if schueler['Klasse'] in lehrkraft_klassen:
-            score += self.config['scoring']['klassen_match']
-            reasons.append(f"Unterrichtet in {schueler['Klasse']}")
-
-        # Kriterium 2 (Prio 2): Fahrzeit/Erreichbarkeit
-        lehrkraft_plz = str(lehrkraft['PLZ_Wohnort'])
-        lehrkraft_adresse = f"{lehrkraft_plz}, Deutschland"
-        lehrkraft_coords = self._geocode(lehrkraft_adresse)
-
-        if lehrkraft_coords and einrichtung_coords:
-            # _calculate_detour gibt jetzt die beste Gesamt-Fahrzeit zurück (round-trip!)
-            effective_travel_time = self._calculate_detour(lehrkraft_coords, einrichtung_coords)
-
-            # Bonus für kurze Fahrzeiten
-            if effective_travel_time <= self.config['fahrzeit_grenzen']['exzellent_max_min']:
-                score += self.config['scoring']['fahrzeit_exzellent']
-                reasons.append(f"Fahrzeit: {effective_travel_time:.1f} min (exzellent)")
-            elif effective_travel_time <= self.config['fahrzeit_grenzen']['gut_max_min']:
-                score += self.config['scoring']['fahrzeit_gut']
-                reasons.append(f"Fahrzeit: {effective_travel_time:.1f} min (gut)")
-            elif effective_travel_time <= self.config['fahrzeit_grenzen']['akzeptabel_max_min']:
-                score += self.config['scoring']['fahrzeit_akzeptabel']
-                reasons.append(f"Fahrzeit: {effective_travel_time:.1f} min (akzeptabel)")
-            else:
-                reasons.append(f"Fahrzeit: {effective_travel_time:.1f} min (ungünstig)")
-
-            # Malus für sehr lange Fahrzeiten
-            if effective_travel_time > self.config['fahrzeit_grenzen']['sehr_lang_min']:
-                malus = self.config['scoring']['fahrzeit_sehr_lang_malus']
-                score -= malus
-                reasons.append(f"Sehr lange Fahrt >{self.config['fahrzeit_grenzen']['sehr_lang_min']}min (-{malus})")
-            elif effective_travel_time > self.config['fahrzeit_grenzen']['lang_min']:
-                malus = self.config['scoring']['fahrzeit_lang_malus']
-                score -= malus
-                reasons.append(f"Lange Fahrt >{self.config['fahrzeit_grenzen']['lang_min']}min (-{malus})")
-
-            # Rendsburg-Bonus: Lehrkräfte aus Rendsburg-Umgebung erhalten Bonus für Rendsburg-Einrichtungen
-            einrichtung_plz = str(schueler['PLZ'])
-            if (lehrkraft_plz.startswith(self.config['rendsburg_plz_praefix']) and
-                einrichtung_plz.startswith(self.config['rendsburg_plz_praefix'])):
-                bonus = self.config['scoring']['rendsburg_bonus']
-                score += bonus
-                reasons.append(f"Rendsburg-Region (+{bonus})")
+        self.strecken = {
+            'einrichtung_index': e_index, 'wohnort_index': w_index,
+            'schule_einrichtung': schule_to_einrichtung, 'einrichtung_schule': einrichtung_to_schule,
+            'wohnort_schule': wohnort_to_schule, 'wohnort_einrichtung': wohnort_to_einrichtung,
+        }
+
+        # Gleiche Rechnung wie _calculate_detour, für alle Ortspaare auf einmal
+        effective_time = effektive_fahrzeit(schule_to_einrichtung[:, None], einrichtung_to_schule[:, None],
+                                            wohnort_to_schule[None, :], wohnort_to_einrichtung)
+        effective_time[verworfen] = obere[verworfen]
+        offen_orte = ungeroutet & ~verworfen
+        effective_time[offen_orte] = untere[offen_orte]
+
+        gueltig = (e_index >= 0)[:, None] & (w_index >= 0)[None, :]
+        zeiten[gueltig] = effective_time[e_index][:, w_index][gueltig]
+        vorgefiltert[gueltig] = verworfen[e_index][:, w_index][gueltig]
+        offen[gueltig] = offen_orte[e_index][:, w_index][gueltig]
+        self.metriken.zaehlen('vorfilter_ortspaare', verworfen.size)
+        self.metriken.zaehlen('vorfilter_verworfen', int(verworfen.sum()))
+        self.metriken.zaehlen('bedarf_offen', int(offen_orte.sum()))
+        if vorgefiltert.any():
+            self.vorfilter_df = self._vorfilter_protokoll(modell, vorgefiltert, e_index, w_index, untere, obere)
+        return zeiten, vorgefiltert, offen
+
+    def _strecken(self, paare: List[Tuple[Tuple[float, float], Tuple[float, float]]],
+                  bezeichnung: str) -> np.ndarray:
+        """
+        Fahrzeiten einer Liste von Strecken über _get_route_duration (Einzelanfragen).
+        Fehlen Strecken im Cache, wird der Fortschritt mit Restzeit ausgegeben.
+        """
+        offen = [not self.routing.bekannt(start, ende) for start, ende in paare]
+        fortschritt = Fortschritt(bezeichnung, sum(offen), self._bucket('ors_directions'))
+        zeiten = np.empty(len(paare))
+        for i, (start, ende) in enumerate(paare):
+            zeiten[i] = self._get_route_duration(start, ende)
+            if offen[i]:
+                fortschritt.schritt()
+        return zeiten
+
+    def _vorfilter_protokoll(self, modell: Kohorte, vorgefiltert: np.ndarray, e_index: np.ndarray,
+                             w_index: np.ndarray, untere: np.ndarray, obere: np.ndarray) -> pd.DataFrame:
+        """Verworfene Paare je Einrichtung und Lehrkraft (Sheet "Vorfilter")"""
+        # Eine Schülerin pro Einrichtung genügt: alle teilen sich die Koordinaten
+        _, erste = np.unique(modell.einrichtung_ids, return_index=True)
+        s_pos, l_pos = np.nonzero(vorgefiltert[erste])
+        s_pos = erste[s_pos]
+        e, w = e_index[s_pos], w_index[l_pos]
+        return pd.DataFrame({
+            'Einrichtung': [modell.einrichtungen[i] for i in modell.einrichtung_ids[s_pos]],
+            'Lehrkraft': [modell.lehrkraft_namen[l] for l in l_pos],
+            'Fahrzeit_min_untere_Schranke': np.round(untere[e, w], 1),
+            'Fahrzeit_min_obere_Schranke': np.round(obere[e, w], 1),
+            'Fahrzeit_Kategorie': [self._fahrzeit_band(t) for t in obere[e, w]],
+        })
+
+    def _static_scores(self, modell: Kohorte) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Zuteilungsunabhängiger Teil des Scores (Klasse, Fahrzeit, Rendsburg-Bonus) für alle Paare.
+        Ändert sich während der Zuteilung nicht und wird daher nur einmal berechnet.
+        Returns: (Score-Matrix, Komponenten klasse/fahrzeit_min/fahrzeit/malus/region) -
+        Punkte je Komponente, Malus negativ; fahrzeit_min ist NaN, wenn Koordinaten fehlen;
+        dazu 'vorgefiltert' und 'offen': Paare, deren fahrzeit_min nur eine Schranke ist
+        (siehe _fahrzeiten; für offene Paare ist der Score eine obere Schranke)
+        """
+        self.metriken.zaehlen('score_statisch', modell.n_schueler * modell.n_lehrkraefte)
+        fahrzeit_min, vorgefiltert, offen = self._fahrzeiten(modell)
+        einrichtung_region, lehrkraft_region = modell.region(self.config['rendsburg_plz_praefix'])
+        komponenten = komponenten_berechnen(
+            modell.klassen_match(), np.outer(einrichtung_region, lehrkraft_region) & ~np.isnan(fahrzeit_min),
+            fahrzeit_min, self.config['scoring'], self.config['fahrzeit_grenzen']
+        )
+        komponenten.update(vorgefiltert=vorgefiltert, offen=offen)
+        return statischer_score(komponenten), komponenten
 
-        # Kriterium 1 (Prio 3): Einrichtungskonsistenz
-        einrichtung = schueler['Einrichtung']
-        if lehrkraft['Name'] in current_assignments:
-            assigned_einrichtungen = set([e for _, e in current_assignments[lehrkraft['Name']]])
-            if einrichtung in assigned_einrichtungen:
-                score += self.config['scoring']['einrichtung_konsistenz']
-                reasons.append("Betreut bereits diese Einrichtung")
-
-        # Lastverteilung - nur Abweichungen außerhalb von Soll ±1 bestrafen
-        current_count = len(current_assignments.get(lehrkraft['Name'], []))
-        soll_anzahl = lehrkraft['Soll_Anzahl_Betreuungen']
-
-        # Bonus für Lehrkräfte, die unter Soll sind (je weiter unter Soll, desto höher der Bonus)
-        if current_count < soll_anzahl:
-            # Positiver Bonus für Lehrkräfte unter Soll (ausgeglichene Verteilung fördern)
-            bonus = (soll_anzahl - current_count) * 5
-            score += bonus
-            reasons.append(f"Ist/Soll: {current_count}/{soll_anzahl} (+{bonus})")
-        elif current_count == soll_anzahl:
-            # Exakt am Soll: leichter Malus, damit andere bevorzugt werden
-            score -= 10
-            reasons.append(f"Ist/Soll: {current_count}/{soll_anzahl} (-10)")
-        else:
-            # Über Soll: Malus
-            abweichung = current_count - soll_anzahl
-            malus = abweichung * self.config['scoring']['abweichung_soll_malus']
-            score -= malus
-            reasons.append(f"Ist/Soll: {current_count}/{soll_anzahl} (-{malus})")
+    def _fahrzeit_punkte(self, fahrzeit_min: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Fahrzeit-Bonus und -Malus (negativ) je Fahrzeit; 0 ohne Koordinaten (NaN)"""
+        return fahrzeit_punkte(fahrzeit_min, self.config['scoring'], self.config['fahrzeit_grenzen'])
+
+    def _load_score(self, current_count: int, soll_anzahl: int) -> float:
+        """
+        Lastverteilung - nur Abweichungen außerhalb von Soll ±1 bestrafen (siehe bewertung.py)
+        """
+        self.metriken.zaehlen('score_last')
+        return lastverteilung(current_count, soll_anzahl, self.config['scoring']['abweichung_soll_malus'])
 
-        return score, " | ".join(reasons)
+    def _dynamic_score(self, modell: Kohorte, s_pos: int, l_pos: int) -> Tuple[float, float]:
+        """
+        Zuteilungsabhängiger Teil des Scores (Einrichtungskonsistenz, Ist/Soll).
+        Ändert sich nur, wenn der Lehrkraft jemand zugeteilt wird.
+        Returns: (konsistenz, last) in Punkten
+        """
+        self.metriken.zaehlen('score_dynamisch')
+        # Kriterium 1 (Prio 3): Einrichtungskonsistenz
+        konsistenz = 0
+        if modell.betreut_einrichtung(l_pos, s_pos):
+            konsistenz = self.config['scoring']['einrichtung_konsistenz']
+        return konsistenz, self._load_score(modell.ist_anzahl(l_pos), modell.soll[l_pos])
+
+    def _fahrzeit_band(self, fahrzeit_min: float) -> Optional[str]:
+        """Fahrzeit-Kategorie wie im Scoring (None ohne Koordinaten)"""
+        grenzen = self.config['fahrzeit_grenzen']
+        if pd.isna(fahrzeit_min):
+            return None
+        if fahrzeit_min <= grenzen['exzellent_max_min']:
+            return "exzellent"
+        if fahrzeit_min <= grenzen['gut_max_min']:
+            return "gut"
+        if fahrzeit_min <= grenzen['akzeptabel_max_min']:
+            return "akzeptabel"
+        return "ungünstig"
+
+    def _begruendung(self, klasse: str, klasse_punkte: float, fahrzeit_min: float, malus: float,
+                     region: float, konsistenz: float, ist: int, soll: int) -> str:
+        """Lesbare Begründung aus den Score-Komponenten (nur für gewählte Zuteilungen)"""
+        reasons = []
+        if klasse_punkte:
+            reasons.append(f"Unterrichtet in {klasse}")
+        band = self._fahrzeit_band(fahrzeit_min)
+        if band is not None:
+            reasons.append(f"Fahrzeit: {fahrzeit_min:.1f} min ({band})")
+            grenzen = self.config['fahrzeit_grenzen']
+            if malus and fahrzeit_min > grenzen['sehr_lang_min']:
+                reasons.append(f"Sehr lange Fahrt >{grenzen['sehr_lang_min']}min (-{-malus:g})")
+            elif malus:
+                reasons.append(f"Lange Fahrt >{grenzen['lang_min']}min (-{-malus:g})")
+            if region:
+                reasons.append(f"Rendsburg-Region (+{region:g})")
+        if konsistenz:
+            reasons.append("Betreut bereits diese Einrichtung")
+        last = self._load_score(ist, soll)
+        reasons.append(f"Ist/Soll: {ist}/{soll} ({'+' if last > 0 else '-'}{abs(last):g})")
+        return " | ".join(reasons)
+
+    def begruendungen(self, results_df: pd.DataFrame) -> List[str]:
+        """
+        Begründungen aller Zeilen eines Ergebnisses (Komponenten-Spalten aus assign_praktika).
+        Zeilen ohne Komponenten (übernommen aus einer älteren Zuteilungsdatei) behalten
+        ihre vorhandene Begründung.
+        """
+        vorhanden = results_df['Begründung'] if 'Begründung' in results_df.columns else [""] * len(results_df)
+        return [
+            self._begruendung(*zeile) if not pd.isna(zeile[1]) else (alt if isinstance(alt, str) else "")
+            for zeile, alt in zip(zip(
+                results_df['Klasse'], results_df['Klasse_Punkte'], results_df['Fahrzeit_min'],
+                results_df['Fahrzeit_Malus'], results_df['Region_Punkte'],
+                results_df['Konsistenz_Punkte'], results_df['Ist_vorher'], results_df['Soll']
+            ), vorhanden)
+        ]
+
+    def _calculate_score(self, modell: Kohorte, komponenten: Dict[str, np.ndarray],
+                         s_pos: int, l_pos: int) -> Tuple[float, str]:
+        """
+        Berechnet Score für Lehrkraft-Schüler-Paarung (Komponenten aus _static_scores)
+        Returns: (score, begründung)
+        """
+        self.metriken.zaehlen('score_calculate')
+        klasse, fahrzeit_min, fahrzeit, malus, region = (
+            komponenten[name][s_pos, l_pos] for name in ('klasse', 'fahrzeit_min', 'fahrzeit', 'malus', 'region')
+        )
+        konsistenz, last = self._dynamic_score(modell, s_pos, l_pos)
+        begruendung = self._begruendung(
+            modell.klassen[modell.klasse_ids[s_pos]], klasse, fahrzeit_min, malus, region, konsistenz,
+            modell.ist_anzahl(l_pos), modell.soll[l_pos]
+        )
+        return klasse + fahrzeit + malus + region + konsistenz + last, begruendung
 
     def load_data(self, schueler_path: str, lehrkraefte_path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        """Lädt Excel-Dateien"""
+        """
+        Lädt die Eingabedateien (Excel, CSV oder Parquet, siehe tabellen_io.py).
+        Die Pflichtspalten werden vor dem Einlesen anhand der Kopfzeilen geprüft.
+        """
         print("\n📂 Lade Daten...")
-        schueler_df = pd.read_excel(schueler_path)
-        lehrkraefte_df = pd.read_excel(lehrkraefte_path)
+        schueler_df = tabelle_laden(schueler_path, ERFORDERLICHE_SPALTEN_SCHUELER, "Schülerinnen-Datei")
+        lehrkraefte_df = tabelle_laden(lehrkraefte_path, ERFORDERLICHE_SPALTEN_LEHRKRAEFTE, "Lehrkräfte-Datei")
 
         print(f"   ✓ {len(schueler_df)} Schülerinnen geladen")
         print(f"   ✓ {len(lehrkraefte_df)} Lehrkräfte geladen")
 
         return schueler_df, lehrkraefte_df
 
-    def assign_praktika(self, schueler_df: pd.DataFrame,
-                       lehrkraefte_df: pd.DataFrame) -> pd.DataFrame:
+    def _adressen_vereinheitlichen(self, modell: Kohorte):
         """
-        Führt optimale Zuteilung durch mit harten Kapazitätsgrenzen.
-        Strategie: Berechne alle Scores, sortiere nach Score, weise beste Matches zuerst zu.
+        Setzt modell.geo_adressen (siehe adressen.py): Schreibweisen vereinheitlicht, Tippvarianten
+        einer Einrichtung innerhalb der PLZ zusammengeführt. Die Ausgabe behält die Adresse aus
+        der Eingabedatei; die Zusammenführungen stehen in self.adressen_df (Sheet "Adressen").
         """
-        print("\n🔄 Starte Zuteilung...")
-
-        # Prüfe, ob genug Kapazität vorhanden ist
-        total_capacity = lehrkraefte_df['Soll_Anzahl_Betreuungen'].sum() + len(lehrkraefte_df)  # +1 pro Lehrkraft
-        total_students = len(schueler_df)
-        if total_capacity < total_students:
-            print(f"⚠️  WARNUNG: Nicht genug Kapazität!")
-            print(f"   Schülerinnen: {total_students}, Max. Kapazität: {total_capacity}")
-            print(f"   Einige Zuweisungen können fehlschlagen.")
-
-        # Geocodiere alle Einrichtungen
-        print("\n📍 Geocodiere Einrichtungen...")
-        schueler_df['Adresse_voll'] = schueler_df.apply(
-            lambda x: f"{x['Straße']}, {x['PLZ']} {x['Ort']}", axis=1
+        self.adressen_df = None
+        if not self.adressen_config.get('normalisieren', True):
+            return
+        einrichtungen = [modell.einrichtungen[e_id] if e_id >= 0 else None for e_id in modell.einrichtung_ids]
+        modell.geo_adressen, self.adressen_df = adressen_vereinheitlichen(
+            modell.strassen, modell.schueler_plz, modell.orte, einrichtungen,
+            self.adressen_config.get('aehnlichkeit', 0.85),
         )
-        schueler_df['PLZ_str'] = schueler_df['PLZ'].astype(str)
-        schueler_df['Coords'] = schueler_df.apply(
-            lambda x: self._geocode(x['Adresse_voll'], x['PLZ_str']), axis=1
+        varianten, adressen = len(set(modell.adressen)), len(set(modell.geo_adressen))
+        self.metriken.zaehlen('adressen_varianten', varianten)
+        self.metriken.zaehlen('adressen_geocodiert', adressen)
+        if not self.adressen_df.empty:
+            print(f"   ✓ {len(self.adressen_df)} Adressen vereinheitlicht: {varianten} Schreibweisen → "
+                  f"{adressen} Adressen (Sheet \"Adressen\")")
+
+    def _geocodieren(self, modell: Kohorte):
+        """Koordinaten aller Einrichtungen und Lehrkraft-Wohnorte des Modells"""
+        # Jede Adresse nur einmal (vereinheitlicht), parallel im Rahmen des Nominatim-Limits
+        self._adressen_vereinheitlichen(modell)
+        offen = self._geocode_offen(modell)
+        fortschritt = Fortschritt("Geocodierung", len(offen), self._bucket('nominatim'))
+
+        def erledigt(key):
+            if key in offen:
+                fortschritt.schritt()
+
+        geocodierungen = self.abruf.alle({
+            ('geocode', adresse): (self._geocode, adresse, plz)
+            for adresse, plz in zip(modell.geo_adressen, modell.schueler_plz)
+        }, erledigt)
+        modell.schueler_coords = [geocodierungen[('geocode', adresse)] for adresse in modell.geo_adressen]
+        wohnorte = self.abruf.alle({
+            ('plz', str(plz)): (self._geocode_plz, plz) for plz in modell.lehrkraft_plz
+        }, erledigt)
+        modell.lehrkraft_coords = [wohnorte[('plz', str(plz))] for plz in modell.lehrkraft_plz]
+
+    def fahrzeit_matrix_exportieren(self, modell: Kohorte, komponenten: Dict[str, np.ndarray],
+                                    verzeichnis: str) -> str:
+        """
+        Speichert die Fahrzeiten des Laufs als Matrix Lehrkraft × Einrichtung × Strecke
+        (siehe fahrzeit_matrix.py). Einzelstrecken aus _fahrzeiten, ohne neue Anfragen;
+        NaN, wo keine Koordinaten vorliegen oder eine Strecke nicht geroutet wurde (Vorfilter,
+        bei Bedarf). "effektiv" ist die Fahrzeit aus dem Scoring, je Einrichtung von der
+        ersten Schülerin (erste Adresse).
+        Returns: Pfad der Matrix-Datei
+        """
+        einrichtung_ids, erste = np.unique(modell.einrichtung_ids, return_index=True)
+        erste = erste[einrichtung_ids >= 0]
+        fahrzeiten = np.full((modell.n_lehrkraefte, len(modell.einrichtungen), len(STRECKEN)), np.nan,
+                             dtype=np.float32)
+        fahrzeiten[:, :, STRECKEN.index('effektiv')] = komponenten['fahrzeit_min'][erste].T
+        if self.strecken is not None:
+            e = self.strecken['einrichtung_index'][erste]
+            w = self.strecken['wohnort_index']
+            e_ok, w_ok = np.flatnonzero(e >= 0), np.flatnonzero(w >= 0)
+            for name in ('schule_einrichtung', 'einrichtung_schule'):
+                fahrzeiten[:, e_ok, STRECKEN.index(name)] = self.strecken[name][e[e_ok]][None, :]
+            fahrzeiten[w_ok, :, STRECKEN.index('wohnort_schule')] = self.strecken['wohnort_schule'][w[w_ok]][:, None]
+            fahrzeiten[np.ix_(w_ok, e_ok, [STRECKEN.index('wohnort_einrichtung')])] = (
+                self.strecken['wohnort_einrichtung'][np.ix_(e[e_ok], w[w_ok])].T[:, :, None])
+
+        lehrkraefte = pd.DataFrame({'ID': np.arange(modell.n_lehrkraefte), 'Name': modell.lehrkraft_namen,
+                                    'PLZ_Wohnort': [str(plz) for plz in modell.lehrkraft_plz]})
+        einrichtungen = pd.DataFrame({'ID': np.arange(len(modell.einrichtungen)),
+                                      'Einrichtung': modell.einrichtungen,
+                                      'Adresse': [modell.geo_adressen[s_pos] for s_pos in erste]})
+        pfad = matrix_speichern(verzeichnis, fahrzeiten, lehrkraefte, einrichtungen,
+                                {'schule_adresse': self.schule_adresse, 'routing_backend': self.routing.name})
+        print(f"\n🗂️  Fahrzeit-Matrix gespeichert: {pfad} "
+              f"({modell.n_lehrkraefte} × {len(modell.einrichtungen)} × {len(STRECKEN)}, float32)")
+        return pfad
+
+    def offene_abrufe(self, schueler_df: pd.DataFrame, lehrkraefte_df: pd.DataFrame) -> Dict[str, int]:
+        """
+        Stand im Cache ohne Netzwerk-Anfragen (für --resume und --probelauf): Geocodierungen
+        und Fahrzeiten, die noch fehlen. Strecken von/zu noch nicht geocodierten Orten fehlen
+        immer; Wohnort → Einrichtung vollständig gezählt (ohne Vorfilter/bei_bedarf).
+        Zusätzlich für die Schätzung der Matrix-Anfragen: Quellen mit fehlenden Strecken
+        (Schule, Wohnorte), Anzahl Ziele (Einrichtungen + Schule), fehlende Einrichtung → Schule
+        """
+        modell = Kohorte(schueler_df, lehrkraefte_df)
+        self._adressen_vereinheitlichen(modell)
+        offen = self._geocode_offen(modell)
+        schule = self._schule_coords if self._schule_geocodiert else self.geocode_cache.get(self.schule_adresse)
+        bekannte_adressen = [adresse for adresse in dict.fromkeys(modell.geo_adressen) if ('geocode', adresse) not in offen]
+        einrichtungen = self.routing.orte([c for c in (self.geocode_cache[a] for a in bekannte_adressen) if c])
+        wohnorte = []
+        for plz in dict.fromkeys(modell.lehrkraft_plz):
+            if ('plz', str(plz)) not in offen:
+                coords = self.plz_zentroide.koordinaten(plz) if self.plz_zentroide is not None else None
+                wohnorte.append(coords or self.geocode_cache.get(f"{parse_plz(plz) or plz}, Deutschland"))
+        wohnorte = self.routing.orte([c for c in wohnorte if c])
+        einrichtungen_offen = sum(1 for art, _ in offen if art == 'geocode')
+        wohnorte_offen = len(offen) - einrichtungen_offen
+        n_einrichtungen = len(einrichtungen) + einrichtungen_offen
+        n_wohnorte = len(wohnorte) + wohnorte_offen
+
+        def fehlt(start, ende) -> bool:
+            return start != ende and not self.routing.bekannt(start, ende)
+
+        if schule:
+            schule_einrichtung = sum(fehlt(schule, e) for e in einrichtungen) + einrichtungen_offen
+            einrichtung_schule = sum(fehlt(e, schule) for e in einrichtungen) + einrichtungen_offen
+            wohnort_schule = [fehlt(w, schule) for w in wohnorte]
+        else:
+            schule_einrichtung = einrichtung_schule = n_einrichtungen
+            wohnort_schule = [True] * len(wohnorte)
+        wohnort_einrichtung = [sum(fehlt(w, e) for e in einrichtungen) + einrichtungen_offen for w in wohnorte]
+        return {
+            'geocodierungen': len(set(modell.geo_adressen)) + len({str(plz) for plz in modell.lehrkraft_plz}) + 1,
+            'geocodierungen_offen': len(offen) + (0 if schule else 1),
+            'fahrzeiten': 2 * n_einrichtungen + n_wohnorte + n_wohnorte * n_einrichtungen,
+            'fahrzeiten_offen': (schule_einrichtung + einrichtung_schule + sum(wohnort_schule) + wohnorte_offen
+                                 + sum(wohnort_einrichtung) + wohnorte_offen * n_einrichtungen),
+            'matrix_quellen_offen': (int(schule_einrichtung > 0) + wohnorte_offen
+                                     + sum(1 for a, b in zip(wohnort_schule, wohnort_einrichtung) if a or b)),
+            'matrix_ziele': n_einrichtungen + 1,
+            'einrichtung_schule_offen': einrichtung_schule,
+        }
+
+    def schaetzung(self, schueler_df: pd.DataFrame, lehrkraefte_df: pd.DataFrame) -> Dict[str, float]:
+        """
+        Probelauf ohne Netzwerk: geschätzte API-Anfragen und Wartezeit nach den Rate-Limits
+        (Obergrenze - Vorfilter, Symmetrie und bei_bedarf sparen weitere Anfragen;
+        PLZ-Fallbacks nicht geocodierbarer Adressen kommen hinzu)
+        """
+        stand = self.offene_abrufe(schueler_df, lehrkraefte_df)
+        geocodierungen = stand['geocodierungen_offen'] if isinstance(self.geocoder, NominatimGeocoder) else 0
+        matrix = directions = 0
+        if self.routing.name == "ors" and self.routing_config.get('matrix_prefetch', True):
+            # Blöcke wie in _prefetch_matrix: Schule/Wohnorte × Einrichtungen/Schule, Einrichtungen × Schule
+            if stand['matrix_quellen_offen']:
+                quellen_block, ziele_block = self._blockgroesse(stand['matrix_quellen_offen'], stand['matrix_ziele'])
+                matrix = (math.ceil(stand['matrix_quellen_offen'] / quellen_block)
+                          * math.ceil(stand['matrix_ziele'] / ziele_block))
+            if stand['einrichtung_schule_offen']:
+                matrix += math.ceil(stand['einrichtung_schule_offen']
+                                    / self._blockgroesse(stand['einrichtung_schule_offen'], 1)[0])
+        elif self.routing.name == "ors":
+            directions = stand['fahrzeiten_offen']
+        dauer_s = (self.rate_limiter['nominatim'].restzeit(geocodierungen)
+                   + self.rate_limiter['ors_matrix'].restzeit(matrix)
+                   + self.rate_limiter['ors_directions'].restzeit(directions))
+        return {**stand, 'anfragen_geocodierung': geocodierungen, 'anfragen_matrix': matrix,
+                'anfragen_directions': directions, 'dauer_s': dauer_s}
+
+    def _phase2(self, modell: Kohorte, static_scores: np.ndarray, komponenten: Dict[str, np.ndarray],
+                engine: str, vorbelegung: List[Tuple[int, str]] = None) -> List[Dict]:
+        """
+        Iterative Zuteilung auf der statischen Score-Matrix.
+        vorbelegung: bereits feste Zuteilungen (Lehrkraft-Position, Einrichtung), die Last
+        und Einrichtungskonsistenz beeinflussen, selbst aber nicht in der Matrix stehen
+        Returns: eine Zeile pro Zuteilung (Spalten ERGEBNIS_SPALTEN)
+        """
+        # Gesamt-Score = statische Matrix + Lastverteilung + Konsistenz-Bonus; die Engine
+        # hält diese Scores inkrementell aktuell (siehe zuteilung_engines.py).
+        print(f"\n📋 Weise beste Matches zu (mit dynamischen Score-Updates, Engine: {engine})...")
+        n_schueler, n_lehrkraefte = modell.n_schueler, modell.n_lehrkraefte
+        assignments = []
+        assigned_students = set()  # Set der bereits zugewiesenen Schüler-Positionen
+
+        zustand = ZuteilungsZustand(
+            static_matrix=static_scores,
+            einrichtung_ids=modell.einrichtung_ids,
+            soll=modell.soll,
+            gruppen=modell.gruppen,
+            load_score=self._load_score,
+            konsistenz_bonus=self.config['scoring']['einrichtung_konsistenz']
         )
-
-        # Phase 1: Berechne ALLE möglichen Paarungen mit initialen Scores
-        print("\n🎯 Berechne alle möglichen Zuordnungen...")
-        all_matches = []  # Liste von (score, schueler_idx, lehrkraft_idx, reason)
-
-        # Dummy current_assignments für initiale Score-Berechnung
-        # Wir berechnen Scores ohne Einrichtungskonsistenz-Bonus, da noch niemand zugeteilt ist
-        empty_assignments = {}
-
-        for s_idx, schueler in schueler_df.iterrows():
-            for l_idx, lehrkraft in lehrkraefte_df.iterrows():
-                score, reason = self._calculate_score(
-                    lehrkraft, schueler, schueler['Coords'], empty_assignments
+        # Bestehende Zuteilungen (Reparatur-Modus) zählen für Last und Einrichtungskonsistenz
+        for l_pos, einrichtung in vorbelegung or []:
+            zustand.vorbelegen(l_pos, modell.vorbelegen(l_pos, einrichtung))
+
+        # Optionale Verbesserungsstufe nach Greedy/Heap: die Engine läuft dann auf einer Kopie,
+        # ausgegeben wird die verbesserte Zuteilung (das MILP ist bereits exakt)
+        lokale_suche = self.config.get('zuteilung', {}).get('lokale_suche', {})
+        suchen = lokale_suche.get('aktiv', False) and engine != 'milp'
+        ausgabe_zustand = zustand
+        if suchen:
+            zustand = zustand.kopie()
+
+        if engine == 'heap' and vorbelegung:
+            # Startwerte hängen von der Vorbelegung ab → die Engine bewertet alle Paare selbst
+            zuteilung_engine = HeapEngine(zustand)
+        elif engine == 'heap':
+            # Startbelegung: noch niemand zugeteilt → kein Konsistenz-Bonus, Lastterm nur pro Lehrkraft
+            start_scores = static_scores + np.array([self._load_score(0, soll) for soll in modell.soll])
+            zuteilung_engine = HeapEngine(zustand, [
+                (start_scores[s_pos, l_pos], s_pos, l_pos)
+                for s_pos in range(n_schueler) for l_pos in range(n_lehrkraefte)
+            ])
+        elif engine == 'milp':
+            if komponenten['offen'].any():
+                # Das MILP bewertet alle Paare gleichzeitig → alle offenen Fahrzeiten laden
+                print("   → MILP benötigt alle Fahrzeiten, lade offene Paare...")
+                self._bedarfs_aufloeser(modell, static_scores, komponenten)(
+                    [(int(s_pos), int(l_pos)) for s_pos, l_pos in zip(*np.nonzero(komponenten['offen']))]
                 )
-                all_matches.append({
-                    'score': score,
-                    'schueler_idx': s_idx,
-                    'lehrkraft_idx': l_idx,
-                    'schueler_name': schueler['Name'],
-                    'lehrkraft_name': lehrkraft['Name'],
-                    'einrichtung': schueler['Einrichtung'],
-                    'reason': reason
-                })
-
-        # Sortiere alle Matches nach Score (höchster zuerst)
-        all_matches.sort(key=lambda x: x['score'], reverse=True)
-        print(f"   ✓ {len(all_matches)} mögliche Paarungen berechnet")
-
-        # Phase 2: Iterative Zuteilung mit Score-Updates
-        print("\n📋 Weise beste Matches zu (mit dynamischen Score-Updates)...")
-        assignments = []
-        current_assignments = {}  # Lehrkraft → [(Schüler, Einrichtung)]
-        assigned_students = set()  # Set der bereits zugewiesenen Schüler-Indizes
+            zeitlimit_s = self.config.get('zuteilung', {}).get('zeitlimit_s', 60)
+            print(f"   → Exakte Optimierung (Zeitlimit {zeitlimit_s} s, Greedy als Startlösung)...")
+            zuteilung_engine = MilpEngine(zustand, zeitlimit_s)
+            bericht = zuteilung_engine.bericht
+            print(f"   ✓ Greedy-Zielwert: {bericht['greedy_zielwert']:.1f}")
+            if bericht['milp_zielwert'] is not None:
+                gap = bericht['solver_gap']
+                print(f"   ✓ MILP-Zielwert: {bericht['milp_zielwert']:.1f} "
+                      f"(Verbesserung: {bericht['verbesserung']:+.1f}"
+                      f"{f', Solver-Gap: {gap:.2%}' if gap is not None else ''})")
+            print(f"   ✓ Solver: {bericht['status']} ({bericht['laufzeit_s']:.2f} s)"
+                  f"{'' if bericht['uebernommen'] else ' → Greedy-Lösung beibehalten'}")
+        else:
+            zuteilung_engine = GreedyEngine(zustand)
+
+        # routing.bei_bedarf: offene Paare erst auflösen, wenn die Engine sie wählen würde
+        aufloesen = None
+        if komponenten['offen'].any():
+            aufloesen = self._bedarfs_aufloeser(modell, static_scores, komponenten)
+            zuteilung_engine = BedarfsEngine(zuteilung_engine, komponenten['offen'], aufloesen)
+
+        if suchen:
+            zuteilung_engine = LokaleSucheEngine(
+                ausgabe_zustand, zuteilung_engine, lokale_suche.get('max_iterationen', 10000),
+                lokale_suche.get('zeitlimit_s', 0.5), komponenten['offen'] if aufloesen else None, aufloesen
+            )
+            bericht = zuteilung_engine.bericht
+            (einrichtungen_vorher, einrichtungen_nachher), (abweichung_vorher, abweichung_nachher) = (
+                bericht['einrichtungen_pro_lehrkraft'], bericht['soll_abweichung'])
+            print(f"   ✓ Lokale Suche: Zielwert {bericht['start_zielwert']:.1f} → {bericht['zielwert']:.1f} "
+                  f"({bericht['verbesserung']:+.1f}, {bericht['iterationen']} Verbesserungen, "
+                  f"{bericht['laufzeit_s']:.2f} s{', lokales Optimum' if bericht['lokales_optimum'] else ''})")
+            print(f"   ✓ Einrichtungen pro Lehrkraft: {einrichtungen_vorher:.2f} → {einrichtungen_nachher:.2f}, "
+                  f"Σ |Ist − Soll|: {abweichung_vorher} → {abweichung_nachher}")
 
         iteration = 0
-        max_iterations = len(schueler_df) * 10  # Sicherheit gegen Endlosschleife
+        max_iterations = n_schueler * 10  # Sicherheit gegen Endlosschleife
+        nachladen = []  # (Zeile, Schülerin, Lehrkraft) mit Fahrzeit nur aus dem Vorfilter
 
-        while len(assigned_students) < len(schueler_df) and iteration < max_iterations:
+        while len(assigned_students) < n_schueler and iteration < max_iterations:
             iteration += 1
 
-            # Neuberechnung aller Scores mit aktuellen Zuweisungen
-            available_matches = []
-            for s_idx, schueler in schueler_df.iterrows():
-                if s_idx in assigned_students:
-                    continue
-
-                for l_idx, lehrkraft in lehrkraefte_df.iterrows():
-                    # Prüfe Kapazität
-                    if not self._is_within_capacity(lehrkraft, current_assignments):
-                        continue
-
-                    # Berechne aktuellen Score (mit Einrichtungskonsistenz-Bonus!)
-                    score, reason = self._calculate_score(
-                        lehrkraft, schueler, schueler['Coords'], current_assignments
-                    )
-
-                    available_matches.append({
-                        'score': score,
-                        'schueler_idx': s_idx,
-                        'schueler_name': schueler['Name'],
-                        'klasse': schueler['Klasse'],
-                        'einrichtung': schueler['Einrichtung'],
-                        'adresse': schueler['Adresse_voll'],
-                        'lehrkraft_name': lehrkraft['Name'],
-                        'lehrkraft_soll': lehrkraft['Soll_Anzahl_Betreuungen'],
-                        'reason': reason
-                    })
-
-            if not available_matches:
+            # Wähle bestes verfügbares Match (bei Gleichstand: erste Schülerin, dann erste Lehrkraft)
+            match = zuteilung_engine.naechstes_match()
+            if match is None:
                 # Keine verfügbaren Matches mehr
                 break
 
-            # Wähle bestes verfügbares Match
-            available_matches.sort(key=lambda x: x['score'], reverse=True)
-            best_match = available_matches[0]
+            s_pos, l_pos = match
+            lehrkraft_name = modell.lehrkraft_namen[l_pos]
+            soll = modell.soll[l_pos]
+
+            # Dynamische Komponenten nur für das gewählte Match bestimmen
+            konsistenz, last = self._dynamic_score(modell, s_pos, l_pos)
+            ist = modell.ist_anzahl(l_pos)
 
-            # Zuteilung durchführen
+            # Zuteilung durchführen (Begründung wird in save_results aus den Komponenten erzeugt)
             assignments.append({
-                'Schülerin': best_match['schueler_name'],
-                'Klasse': best_match['klasse'],
-                'Einrichtung': best_match['einrichtung'],
-                'Adresse': best_match['adresse'],
-                'Lehrkraft': best_match['lehrkraft_name'],
-                'Score': best_match['score'],
-                'Begründung': best_match['reason']
+                'Schülerin': modell.schueler_namen[s_pos],
+                'Klasse': modell.klassen[modell.klasse_ids[s_pos]],
+                'Einrichtung': modell.einrichtungen[modell.einrichtung_ids[s_pos]],
+                'Adresse': modell.adressen[s_pos],
+                'Lehrkraft': lehrkraft_name,
+                'Score': static_scores[s_pos, l_pos] + konsistenz + last,
+                'Klasse_Punkte': komponenten['klasse'][s_pos, l_pos],
+                'Fahrzeit_min': komponenten['fahrzeit_min'][s_pos, l_pos],
+                'Fahrzeit_Punkte': komponenten['fahrzeit'][s_pos, l_pos],
+                'Fahrzeit_Malus': komponenten['malus'][s_pos, l_pos],
+                'Region_Punkte': komponenten['region'][s_pos, l_pos],
+                'Konsistenz_Punkte': konsistenz,
+                'Last_Punkte': last,
+                'Ist_vorher': ist,
+                'Soll': soll,
             })
 
-            # Update current assignments
-            if best_match['lehrkraft_name'] not in current_assignments:
-                current_assignments[best_match['lehrkraft_name']] = []
-            current_assignments[best_match['lehrkraft_name']].append(
-                (best_match['schueler_name'], best_match['einrichtung'])
-            )
+            if komponenten['vorgefiltert'][s_pos, l_pos]:
+                nachladen.append((len(assignments) - 1, s_pos, l_pos))
+
+            modell.zuteilen(s_pos, l_pos)
+            assigned_students.add(s_pos)
+            zuteilung_engine.zuteilen(s_pos, l_pos)
 
-            assigned_students.add(best_match['schueler_idx'])
+            print(f"   ✓ {modell.schueler_namen[s_pos]} → {lehrkraft_name} "
+                  f"(Score: {assignments[-1]['Score']:.1f}, {ist + 1}/{soll})")
 
-            current_count = len(current_assignments[best_match['lehrkraft_name']])
-            soll = best_match['lehrkraft_soll']
-            print(f"   ✓ {best_match['schueler_name']} → {best_match['lehrkraft_name']} "
-                  f"(Score: {best_match['score']:.1f}, {current_count}/{soll})")
+        if nachladen:
+            self._vorgefilterte_aufloesen(modell, assignments, nachladen)
 
         # Prüfe auf nicht zugewiesene Schülerinnen
-        if len(assigned_students) < len(schueler_df):
-            print(f"\n⚠️  WARNUNG: {len(schueler_df) - len(assigned_students)} Schülerinnen konnten nicht zugeteilt werden!")
-            for s_idx, schueler in schueler_df.iterrows():
-                if s_idx not in assigned_students:
-                    print(f"   ❌ Nicht zugeteilt: {schueler['Name']}")
+        if len(assigned_students) < n_schueler:
+            print(f"\n⚠️  WARNUNG: {n_schueler - len(assigned_students)} Schülerinnen konnten nicht zugeteilt werden!")
+            for s_pos, name in enumerate(modell.schueler_namen):
+                if s_pos not in assigned_students:
+                    print(f"   ❌ Nicht zugeteilt: {name}")
 
         # Abschließende Validierung
         print("\n📊 Validiere Kapazitätsgrenzen...")
-        for _, lehrkraft in lehrkraefte_df.iterrows():
-            count = len(current_assignments.get(lehrkraft['Name'], []))
-            soll = lehrkraft['Soll_Anzahl_Betreuungen']
+        for l_pos, name in enumerate(modell.lehrkraft_namen):
+            count = modell.ist_anzahl(l_pos)
+            soll = modell.soll[l_pos]
             if count < soll - 1:
-                print(f"   ⚠️  {lehrkraft['Name']}: {count}/{soll} (Unterlast: {soll - count})")
+                print(f"   ⚠️  {name}: {count}/{soll} (Unterlast: {soll - count})")
             elif count > soll + 1:
-                print(f"   ❌ {lehrkraft['Name']}: {count}/{soll} (ÜBERLAST: {count - soll})!")
+                print(f"   ❌ {name}: {count}/{soll} (ÜBERLAST: {count - soll})!")
             elif count != soll:
-                print(f"   ✓ {lehrkraft['Name']}: {count}/{soll} (Abweichung: {count - soll})")
+                print(f"   ✓ {name}: {count}/{soll} (Abweichung: {count - soll})")
             else:
-                print(f"   ✓ {lehrkraft['Name']}: {count}/{soll} (exakt)")
+                print(f"   ✓ {name}: {count}/{soll} (exakt)")
+
+        return assignments
+
+    def _bedarfs_aufloeser(self, modell: Kohorte, static_scores: np.ndarray,
+                           komponenten: Dict[str, np.ndarray]) -> Callable[[List[Tuple[int, int]]], List[int]]:
+        """
+        routing.bei_bedarf: Funktion für BedarfsEngine. Fragt Wohnort → Einrichtung für die
+        übergebenen offenen Paare an und trägt die exakten Werte für alle Paare mit denselben
+        Orten in Score-Matrix und Komponenten ein.
+        Returns: die Funktion; sie liefert die geänderten Lehrkraft-Spalten
+        """
+        einrichtungen, e_index = orte_indizieren(modell.schueler_coords)
+        wohnorte, w_index = orte_indizieren(modell.lehrkraft_coords)
+        schule, dauer = self.schule_coords, self._get_route_duration
+        schule_to_einrichtung = [dauer(schule, e) for e in einrichtungen]
+        einrichtung_to_schule = [dauer(e, schule) for e in einrichtungen]
+        wohnort_to_schule = [dauer(w, schule) for w in wohnorte]
+        schueler_pro_ort = [np.flatnonzero(e_index == i) for i in range(len(einrichtungen))]
+        lehrkraefte_pro_ort = [np.flatnonzero(w_index == j) for j in range(len(wohnorte))]
+        offen = komponenten['offen']
+
+        def aufloesen(paare: List[Tuple[int, int]]) -> List[int]:
+            spalten = set()
+            for s_pos, l_pos in paare:
+                if not offen[s_pos, l_pos]:
+                    continue  # Ortspaar bereits mit einem früheren Paar geklärt
+                i, j = e_index[s_pos], w_index[l_pos]
+                zeilen, lehrkraefte = np.ix_(schueler_pro_ort[i], lehrkraefte_pro_ort[j])
+                fahrzeit_min = effektive_fahrzeit(schule_to_einrichtung[i], einrichtung_to_schule[i],
+                                                  wohnort_to_schule[j], dauer(wohnorte[j], einrichtungen[i]))
+                fahrzeit, malus = self._fahrzeit_punkte(np.full(zeilen.shape[0], fahrzeit_min))
+                komponenten['fahrzeit_min'][zeilen, lehrkraefte] = fahrzeit_min
+                komponenten['fahrzeit'][zeilen, lehrkraefte] = fahrzeit[:, None]
+                komponenten['malus'][zeilen, lehrkraefte] = malus[:, None]
+                static_scores[zeilen, lehrkraefte] = (komponenten['klasse'][zeilen, lehrkraefte]
+                                                      + komponenten['fahrzeit'][zeilen, lehrkraefte]
+                                                      + komponenten['malus'][zeilen, lehrkraefte]
+                                                      + komponenten['region'][zeilen, lehrkraefte])
+                offen[zeilen, lehrkraefte] = False
+                spalten.update(lehrkraefte_pro_ort[j].tolist())
+                self.metriken.zaehlen('bedarf_aufgeloest')
+            return sorted(spalten)
+
+        return aufloesen
+
+    def _vorgefilterte_aufloesen(self, modell: Kohorte, assignments: List[Dict],
+                                 nachladen: List[Tuple[int, int, int]]):
+        """
+        Vorfilter: für die gewählten Zuteilungen die tatsächliche Fahrzeit nachladen
+        (Score und Fahrzeit-Band sind schon durch die Schranken bestimmt)
+        """
+        paare = {(modell.lehrkraft_coords[l_pos], modell.schueler_coords[s_pos]) for _, s_pos, l_pos in nachladen}
+        if self.routing_config.get('matrix_prefetch', True) or self.routing.name != "ors":
+            self._prefetch_matrix(sorted({w for w, _ in paare}), sorted({e for _, e in paare}),
+                                  lambda q, z: (q, z) in paare)
+        for zeile, s_pos, l_pos in nachladen:
+            row = assignments[zeile]
+            fahrzeit = self._calculate_detour(modell.lehrkraft_coords[l_pos], modell.schueler_coords[s_pos])
+            if self._fahrzeit_band(fahrzeit) != self._fahrzeit_band(row['Fahrzeit_min']):
+                print(f"   ⚠️  Vorfilter: {row['Schülerin']} → {row['Lehrkraft']} liegt mit {fahrzeit:.1f} min "
+                      f"nicht im erwarteten Fahrzeit-Band (vorfilter.max_kmh zu niedrig?)")
+            row['Fahrzeit_min'] = fahrzeit
+        self.metriken.zaehlen('vorfilter_nachgeladen', len(paare))
+
+    def assign_praktika(self, schueler_df: pd.DataFrame,
+                       lehrkraefte_df: pd.DataFrame, engine: str = None) -> pd.DataFrame:
+        """
+        Führt optimale Zuteilung durch mit harten Kapazitätsgrenzen.
+        Strategie: Berechne alle Scores, sortiere nach Score, weise beste Matches zuerst zu.
+
+        engine: "greedy" (inkrementelle Score-Matrix), "heap" (Lazy Greedy mit
+        Prioritätswarteschlange) oder "milp" (exakte Optimierung, Greedy als Startlösung);
+        Standard aus config.json ("zuteilung" → "engine")
+        """
+        engine = engine or self.config.get('zuteilung', {}).get('engine', 'greedy')
+        if engine not in ENGINES:
+            raise ValueError(f"Unbekannte Engine: {engine} (verfügbar: {', '.join(ENGINES)})")
+
+        print("\n🔄 Starte Zuteilung...")
+        # Metriken pro Lauf: Phasen, API-Aufrufe, Cache, Fallbacks, Score-Aufrufe
+        self.metriken = Laufzeitmetriken(self.rate_limiter, self.routing)
+        phase_start = time.perf_counter()
+
+        # Eingabetabellen einmalig in das interne Modell übersetzen (IDs, Klassen-Matrix, Soll/Ist)
+        modell = Kohorte(schueler_df, lehrkraefte_df)
+        n_schueler, n_lehrkraefte = modell.n_schueler, modell.n_lehrkraefte
+
+        # Prüfe, ob genug Kapazität vorhanden ist
+        total_capacity = modell.soll.sum() + n_lehrkraefte  # +1 pro Lehrkraft
+        if total_capacity < n_schueler:
+            print(f"⚠️  WARNUNG: Nicht genug Kapazität!")
+            print(f"   Schülerinnen: {n_schueler}, Max. Kapazität: {total_capacity}")
+            print(f"   Einige Zuweisungen können fehlschlagen.")
+
+        # Geocodiere alle Einrichtungen und Wohnorte
+        print("\n📍 Geocodiere Einrichtungen...")
+        self._geocodieren(modell)
+        self.metriken.phasen['geocodierung'] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
+        # Fahrzeiten vorab gebündelt laden (statt einzelner Directions-Anfragen pro Paar)
+        # Lokale Backends (Graph, Luftlinie) berechnen die Matrix immer vorab - ohne Anfragen
+        if self.routing_config.get('matrix_prefetch', True) or self.routing.name != "ors":
+            self.prefetch_fahrzeiten(modell.lehrkraft_coords, modell.schueler_coords)
+        self.metriken.phasen['routing'] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
+        # Phase 1: Berechne ALLE möglichen Paarungen mit initialen Scores
+        # Der zuteilungsunabhängige Teil (Klasse, Fahrzeit, Region) wird hier einmalig
+        # als Score-Matrix berechnet und in Phase 2 wiederverwendet. Pro Paar werden nur
+        # die numerischen Komponenten gespeichert; Begründungen entstehen erst beim Speichern.
+        print("\n🎯 Berechne alle möglichen Zuordnungen...")
+        static_scores, komponenten = self._static_scores(modell)
 
-        return pd.DataFrame(assignments)
+        print(f"   ✓ {n_schueler * n_lehrkraefte} mögliche Paarungen berechnet")
+        self.metriken.phasen['phase1'] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
 
-    def save_results(self, results_df: pd.DataFrame, schueler_df: pd.DataFrame):
-        """Speichert Ergebnisse als Excel"""
+        # Phase 2: Iterative Zuteilung mit Score-Updates
+        assignments = self._phase2(modell, static_scores, komponenten, engine)
+
+        matrix_config = self.config.get('fahrzeit_matrix', {})
+        if matrix_config.get('export', False):
+            self.fahrzeit_matrix_exportieren(modell, komponenten, matrix_config.get('verzeichnis', "fahrzeit_matrix"))
+
+        self.cache.speichern()
+        self.metriken.phasen['phase2'] = time.perf_counter() - phase_start
+        return pd.DataFrame(assignments, columns=ERGEBNIS_SPALTEN)
+
+    def repariere_zuteilung(self, vorher_df: pd.DataFrame, schueler_df: pd.DataFrame,
+                            lehrkraefte_df: pd.DataFrame, engine: str = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Reparatur-Modus: übernimmt eine frühere Zuteilung (Sheet "Zuteilungen", siehe
+        reparatur.zuteilung_laden) und teilt nur die betroffenen Schülerinnen neu zu.
+        Geocodiert und geroutet werden nur deren Einrichtungen; bestehende Zuteilungen
+        zählen für Last und Einrichtungskonsistenz der Lehrkräfte.
+        Returns: (vollständige Zuteilung, Änderungen gegenüber vorher_df)
+        """
+        engine = engine or self.config.get('zuteilung', {}).get('engine', 'greedy')
+        if engine not in ENGINES:
+            raise ValueError(f"Unbekannte Engine: {engine} (verfügbar: {', '.join(ENGINES)})")
+        if engine == 'milp':
+            # Das MILP optimiert die gesamte Kohorte und kennt keine festen Zuteilungen
+            print("   → Reparatur-Modus: MILP unterstützt keine Vorbelegung, verwende Greedy")
+            engine = 'greedy'
+
+        print("\n🔧 Aktualisiere bestehende Zuteilung...")
+        self.metriken = Laufzeitmetriken(self.rate_limiter, self.routing)
+        phase_start = time.perf_counter()
+
+        abgleich = zuteilung_abgleichen(vorher_df, schueler_df, lehrkraefte_df)
+        print(f"   ✓ {len(abgleich.behalten)} Zuteilungen bleiben bestehen")
+        print(f"   ✓ {len(abgleich.betroffen)} Schülerinnen werden neu zugeteilt")
+        if abgleich.entfernt:
+            print(f"   ✓ {len(abgleich.entfernt)} Schülerinnen nicht mehr in der Eingabe")
+
+        # Modell nur aus den betroffenen Schülerinnen; Lehrkräfte vollständig
+        modell = Kohorte(schueler_df.iloc[abgleich.betroffen], lehrkraefte_df)
+        l_pos_von = {}
+        for l_pos, name in enumerate(modell.lehrkraft_namen):
+            l_pos_von.setdefault(name, l_pos)
+        behalten_df = vorher_df.iloc[abgleich.behalten]
+        vorbelegung = [(l_pos_von[lehrkraft], einrichtung)
+                       for lehrkraft, einrichtung in zip(behalten_df['Lehrkraft'], behalten_df['Einrichtung'])]
+        self.metriken.phasen['abgleich'] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
+        print("\n📍 Geocodiere Einrichtungen...")
+        self._geocodieren(modell)
+        self.metriken.phasen['geocodierung'] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
+        if self.routing_config.get('matrix_prefetch', True) or self.routing.name != "ors":
+            self.prefetch_fahrzeiten(modell.lehrkraft_coords, modell.schueler_coords)
+        self.metriken.phasen['routing'] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
+        print("\n🎯 Berechne Zuordnungen der betroffenen Schülerinnen...")
+        static_scores, komponenten = self._static_scores(modell)
+        print(f"   ✓ {modell.n_schueler * modell.n_lehrkraefte} mögliche Paarungen berechnet")
+        self.metriken.phasen['phase1'] = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+
+        assignments = self._phase2(modell, static_scores, komponenten, engine, vorbelegung)
+        self.cache.speichern()
+        self.metriken.phasen['phase2'] = time.perf_counter() - phase_start
+
+        # Bestehende Zeilen in der bisherigen Reihenfolge, danach die neuen Zuteilungen;
+        # die Begründung früherer Zeilen bleibt erhalten, falls Komponenten-Spalten fehlen
+        spalten = ERGEBNIS_SPALTEN + (['Begründung'] if 'Begründung' in vorher_df.columns else [])
+        results_df = pd.concat([behalten_df.reindex(columns=spalten),
+                                pd.DataFrame(assignments, columns=ERGEBNIS_SPALTEN)], ignore_index=True)
+        results_df[['Ist_vorher', 'Soll']] = results_df[['Ist_vorher', 'Soll']].astype('Int64')
+        return results_df, aenderungen(vorher_df, results_df, abgleich)
+
+    def szenario_basis(self, schueler_df: pd.DataFrame, lehrkraefte_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Gewichtsunabhängige Eingaben für den Szenario-Vergleich (szenarien.py): effektive
+        Fahrzeiten aller Paare, Klassen- und Regionstreffer, Einrichtungen, Soll und Gruppen.
+        Die Fahrzeiten werden vollständig geladen (ohne Vorfilter und routing.bei_bedarf),
+        da die Fahrzeit-Bänder je Variante andere sein können.
+        """
+        self.metriken = Laufzeitmetriken(self.rate_limiter, self.routing)
+        modell = Kohorte(schueler_df, lehrkraefte_df)
+        print("\n📍 Geocodiere Einrichtungen...")
+        self._geocodieren(modell)
+
+        vorfilter_config, bei_bedarf = self.vorfilter_config, self.bei_bedarf
+        self.vorfilter_config, self.bei_bedarf = {}, False
+        try:
+            if self.routing_config.get('matrix_prefetch', True) or self.routing.name != "ors":
+                self.prefetch_fahrzeiten(modell.lehrkraft_coords, modell.schueler_coords)
+            fahrzeit_min = self._fahrzeiten(modell)[0]
+        finally:
+            self.vorfilter_config, self.bei_bedarf = vorfilter_config, bei_bedarf
+        self.cache.speichern()
+
+        einrichtung_region, lehrkraft_region = modell.region(self.config['rendsburg_plz_praefix'])
+        return {
+            'fahrzeit_min': fahrzeit_min,
+            'klassen_match': modell.klassen_match(),
+            'region_match': np.outer(einrichtung_region, lehrkraft_region) & ~np.isnan(fahrzeit_min),
+            'einrichtung_ids': np.asarray(modell.einrichtung_ids),
+            'soll': np.asarray(modell.soll),
+            'gruppen': np.asarray(modell.gruppen),
+        }
+
+    def save_results(self, results_df: pd.DataFrame, schueler_df: pd.DataFrame,
+                     ausgabe_verzeichnis: str = None, aenderungen_df: pd.DataFrame = None):
+        """
+        Speichert Ergebnisse als Excel (im aktuellen Verzeichnis oder in ausgabe_verzeichnis),
+        inkl. Sheet "Laufzeit" mit den Metriken des Laufs; die Metriken zusätzlich als JSON.
+        Mit aenderungen_df (Reparatur-Modus) zusätzlich das Sheet "Änderungen"; der Dateiname
+        erhält dann den Zusatz "_aktualisiert", damit die frühere Zuteilung erhalten bleibt.
+        """
+        save_start = time.perf_counter()
         # Ermittle beteiligte Klassen
         klassen = sorted(schueler_df['Klasse'].unique())
         klassen_str = "_".join(klassen)
+        if len(klassen_str) > 80:
+            # Viele Klassen: Dateiname sonst länger als vom Dateisystem erlaubt
+            klassen_str = f"{klassen[0]}_bis_{klassen[-1]}_{len(klassen)}_Klassen"
         jahr = datetime.now().year
 
-        output_filename = f"Zuteilung_{jahr}_{klassen_str}.xlsx"
+        zusatz = "_aktualisiert" if aenderungen_df is not None else ""
+        output_filename = f"Zuteilung_{jahr}_{klassen_str}{zusatz}.xlsx"
+        if ausgabe_verzeichnis:
+            output_filename = os.path.join(ausgabe_verzeichnis, output_filename)
 
         print(f"\n💾 Speichere Ergebnisse: {output_filename}")
 
         # Erstelle Excel mit formatiertem Output
-        with pd.ExcelWriter(output_filename, engine='openpyxl') as writer:
-            results_df.to_excel(writer, sheet_name='Zuteilungen', index=False)
-
-            # Statistik-Sheet
-            stats = results_df.groupby('Lehrkraft').agg({
-                'Schülerin': 'count',
-                'Einrichtung': lambda x: x.nunique()
-            }).rename(columns={'Schülerin': 'Anzahl_Schüler', 'Einrichtung': 'Anzahl_Einrichtungen'})
-            stats.to_excel(writer, sheet_name='Statistik')
+        # Begründungen nur für die gewählten Zuteilungen erzeugen, Komponenten als eigene Spalten
+        ausgabe_df = results_df.drop(columns=['Begründung', 'Fahrzeit_Kategorie'], errors='ignore')
+        position = ausgabe_df.columns.get_loc('Score') + 1
+        ausgabe_df.insert(position, 'Begründung', self.begruendungen(results_df))
+        ausgabe_df.insert(position + 1, 'Fahrzeit_Kategorie',
+                          [self._fahrzeit_band(t) for t in results_df['Fahrzeit_min']])
+
+        # Write-only-Arbeitsmappe: Zeilen werden direkt in die Datei gestreamt (siehe tabellen_io.py)
+        arbeitsmappe = StreamingArbeitsmappe(output_filename)
+        arbeitsmappe.dataframe('Zuteilungen', ausgabe_df)
+
+        # Statistik-Sheet
+        arbeitsmappe.blatt('Statistik', ['Lehrkraft', 'Anzahl_Schüler', 'Anzahl_Einrichtungen'],
+                           lehrkraft_statistik(results_df))
+
+        if aenderungen_df is not None:
+            arbeitsmappe.dataframe('Änderungen', aenderungen_df)
+
+        # Optional ein Blatt pro Lehrkraft (z.B. zum Weitergeben an die Betreuenden)
+        if self.config.get('ausgabe', {}).get('blatt_pro_lehrkraft', False):
+            gruppen = lehrkraft_gruppen(ausgabe_df)
+            for lehrkraft in sorted(gruppen):
+                zeilen = gruppen[lehrkraft]
+                arbeitsmappe.dataframe(lehrkraft, ausgabe_df.iloc[zeilen])
+
+        # Vom Vorfilter verworfene Paare (nur wenn vorfilter.aktiv)
+        if self.vorfilter_df is not None and not self.vorfilter_df.empty:
+            arbeitsmappe.dataframe('Vorfilter', self.vorfilter_df)
+
+        # Zusammengeführte Adress-Schreibweisen (siehe adressen.py)
+        if self.adressen_df is not None and not self.adressen_df.empty:
+            arbeitsmappe.dataframe('Adressen', self.adressen_df)
+
+        # Laufzeit-Sheet (save_results bis zu diesem Zeitpunkt)
+        self.metriken.phasen['save_results'] = time.perf_counter() - save_start
+        arbeitsmappe.blatt('Laufzeit', ['Metrik', 'Wert'], self.metriken.als_tabelle())
+        arbeitsmappe.speichern()
+
+        self.metriken.phasen['save_results'] = time.perf_counter() - save_start
+        metriken_datei = os.path.splitext(output_filename)[0] + "_laufzeit.json"
+        with open(metriken_datei, 'w', encoding='utf-8') as f:
+            f.write(self.metriken.als_json())
 
         print(f"   ✓ Datei gespeichert: {output_filename}")
+        print(f"   ✓ Laufzeit-Metriken: {metriken_datei}")
         return output_filename
 
 
+ERFORDERLICHE_SPALTEN_SCHUELER = ['Name', 'Klasse', 'Einrichtung', 'Straße', 'PLZ', 'Ort']
+ERFORDERLICHE_SPALTEN_LEHRKRAEFTE = ['Name', 'PLZ_Wohnort', 'Klassen', 'Soll_Anzahl_Betreuungen']
+
+
+def fehlende_spalten(schueler_df: pd.DataFrame, lehrkraefte_df: pd.DataFrame) -> List[str]:
+    """Prüft die Pflichtspalten beider Eingabedateien. Returns: Fehlermeldungen (leer = gültig)"""
+    fehler = []
+    fehlende_schueler = [s for s in ERFORDERLICHE_SPALTEN_SCHUELER if s not in schueler_df.columns]
+    fehlende_lehrkraefte = [s for s in ERFORDERLICHE_SPALTEN_LEHRKRAEFTE if s not in lehrkraefte_df.columns]
+    if fehlende_schueler:
+        fehler.append(f"Fehlende Spalten in Schülerinnen-Datei: {fehlende_schueler}")
+    if fehlende_lehrkraefte:
+        fehler.append(f"Fehlende Spalten in Lehrkräfte-Datei: {fehlende_lehrkraefte}")
+    return fehler
+
+
+def lauf_datei(cache: PersistentCache) -> str:
+    """Eingaben des letzten Laufs (für --resume), neben der Cache-Datei"""
+    verzeichnis = os.path.dirname(cache.pfad) if cache.pfad != ":memory:" else ""
+    return os.path.join(verzeichnis, LAUF_DATEI)
+
+
+def lauf_merken(pfad: str, lauf: Dict):
+    with open(pfad, 'w', encoding='utf-8') as f:
+        json.dump(lauf, f, indent=2, ensure_ascii=False)
+
+
+def unterbrochener_lauf(pfad: str) -> Optional[Dict]:
+    """Eingaben des letzten Laufs, wenn er nicht abgeschlossen wurde; sonst None"""
+    try:
+        with open(pfad, 'r', encoding='utf-8') as f:
+            lauf = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return None if lauf.get('abgeschlossen') else lauf
+
+
+def drucke_stand(stand: Dict):
+    """Geocodierungen und Fahrzeiten im Cache bzw. noch offen (siehe offene_abrufe)"""
+    print(f"   Geocodierungen: {stand['geocodierungen'] - stand['geocodierungen_offen']} im Cache, "
+          f"{stand['geocodierungen_offen']} offen")
+    print(f"   Fahrzeiten: {stand['fahrzeiten'] - stand['fahrzeiten_offen']} im Cache, "
+          f"{stand['fahrzeiten_offen']} offen")
+
+
+def drucke_metriken(bericht: Dict):
+    """Kurzfassung der Laufzeit-Metriken auf der Konsole"""
+    print("\n⏱️  Laufzeit:")
+    print("   " + ", ".join(f"{phase}: {dauer:.2f} s" for phase, dauer in bericht['phasen_s'].items()))
+    aufrufe = [f"{anbieter}.{endpunkt}: {anzahl}" for anbieter, endpunkte in bericht['api_aufrufe'].items()
+               for endpunkt, anzahl in endpunkte.items() if endpunkt != 'backend']
+    print(f"   API-Aufrufe: {', '.join(aufrufe)}")
+    print(f"   Wartezeit Rate-Limits: {bericht['rate_limit']['wartezeit_gesamt_s']:.1f} s")
+    for name, cache in bericht['cache'].items():
+        quote = f"{cache['trefferquote']:.1%}" if cache['trefferquote'] is not None else "-"
+        print(f"   Cache {name}: {cache['treffer']} Treffer, {cache['fehlschlaege']} Fehlschläge ({quote})")
+    symmetrie = bericht.get('symmetrie', {})
+    if symmetrie.get('wiederverwendet') or symmetrie.get('vergleiche'):
+        abweichung = (f"{symmetrie['mittlere_abweichung_min']:.1f} min mittlere Abweichung "
+                      f"(max. {symmetrie['max_abweichung_min']:.1f} min, {symmetrie['vergleiche']} Vergleiche)"
+                      if symmetrie['vergleiche'] else "keine Vergleichswerte")
+        print(f"   Gegenrichtung wiederverwendet: {symmetrie['wiederverwendet']}, {abweichung}")
+    vorfilter = bericht.get('vorfilter', {})
+    if vorfilter.get('verworfen'):
+        print(f"   Vorfilter: {vorfilter['verworfen']}/{vorfilter['ortspaare']} Ortspaare ohne Routing, "
+              f"{vorfilter['nachgeladen']} für gewählte Zuteilungen nachgeladen")
+    bei_bedarf = bericht.get('bei_bedarf', {})
+    if bei_bedarf.get('offene_ortspaare'):
+        print(f"   Fahrzeiten bei Bedarf: {bei_bedarf['aufgeloest']}/{bei_bedarf['offene_ortspaare']} "
+              f"offene Ortspaare geladen, {bei_bedarf['nie_geroutet']} nie geroutet")
+    print(f"   Luftlinien-Fallbacks: {bericht['luftlinien_fallbacks']}, "
+          f"Score-Berechnungen: {sum(bericht['score_aufrufe'].values())}")
+
+
 def main():
     """Interaktive Hauptfunktion"""
     print("=" * 60)
@@ -497,10 +1424,28 @@ def main():
         print(f"❌ Fehler beim Laden der Konfiguration: {e}")
         return
 
+    # Nur Fallback-Einträge im Cache neu abfragen
+    if '--fallbacks-aktualisieren' in sys.argv:
+        tool.aktualisiere_fallbacks()
+        return
+
+    # Unterbrochenen Lauf fortsetzen: gleiche Eingaben, bereits geladene Geocodierungen
+    # und Fahrzeiten kommen aus dem Cache (jeder Eintrag wird beim Eintreffen gespeichert)
+    pfad_lauf = lauf_datei(tool.cache)
+    lauf = unterbrochener_lauf(pfad_lauf) if '--resume' in sys.argv else None
+    if '--resume' in sys.argv and lauf is None:
+        print("⚠️  Kein unterbrochener Lauf gefunden - bitte Dateipfade eingeben")
+
     # Dateiauswahl
-    print("\n📋 Bitte geben Sie die Dateipfade ein:")
-    schueler_path = input("   Schülerinnen-Datei (Excel): ").strip().strip('"')
-    lehrkraefte_path = input("   Lehrkräfte-Datei (Excel): ").strip().strip('"')
+    if lauf is not None:
+        schueler_path, lehrkraefte_path = lauf['schueler'], lauf['lehrkraefte']
+        print(f"\n🔁 Setze Lauf vom {lauf['gestartet']} fort:")
+        print(f"   Schülerinnen: {schueler_path}")
+        print(f"   Lehrkräfte: {lehrkraefte_path}")
+    else:
+        print("\n📋 Bitte geben Sie die Dateipfade ein:")
+        schueler_path = input("   Schülerinnen-Datei (Excel/CSV/Parquet): ").strip().strip('"')
+        lehrkraefte_path = input("   Lehrkräfte-Datei (Excel/CSV/Parquet): ").strip().strip('"')
 
     if not os.path.exists(schueler_path):
         print(f"❌ Datei nicht gefunden: {schueler_path}")
@@ -517,29 +1462,69 @@ def main():
         return
 
     # Validierung
-    erforderliche_spalten_schueler = ['Name', 'Klasse', 'Einrichtung', 'Straße', 'PLZ', 'Ort']
-    erforderliche_spalten_lehrkraefte = ['Name', 'PLZ_Wohnort', 'Klassen', 'Soll_Anzahl_Betreuungen']
-
-    fehlende_schueler = [s for s in erforderliche_spalten_schueler if s not in schueler_df.columns]
-    fehlende_lehrkraefte = [s for s in erforderliche_spalten_lehrkraefte if s not in lehrkraefte_df.columns]
-
-    if fehlende_schueler:
-        print(f"❌ Fehlende Spalten in Schülerinnen-Datei: {fehlende_schueler}")
+    fehler = fehlende_spalten(schueler_df, lehrkraefte_df)
+    if fehler:
+        for meldung in fehler:
+            print(f"❌ {meldung}")
         return
-    if fehlende_lehrkraefte:
-        print(f"❌ Fehlende Spalten in Lehrkräfte-Datei: {fehlende_lehrkraefte}")
+
+    # Probelauf: nur Eingaben prüfen und Anfragen/Dauer aus dem Cache-Stand schätzen
+    if '--probelauf' in sys.argv:
+        print("\n🔬 Probelauf (ohne Netzwerk):")
+        schaetzung = tool.schaetzung(schueler_df, lehrkraefte_df)
+        drucke_stand(schaetzung)
+        print(f"   API-Anfragen (geschätzt, höchstens): Nominatim {schaetzung['anfragen_geocodierung']}, "
+              f"ORS-Matrix {schaetzung['anfragen_matrix']}, ORS-Directions {schaetzung['anfragen_directions']}")
+        print(f"   Dauer nach Rate-Limits: ca. {dauer_text(schaetzung['dauer_s'])}")
         return
 
-    # Zuteilung durchführen
+    if lauf is not None:
+        drucke_stand(tool.offene_abrufe(schueler_df, lehrkraefte_df))
+
+    # Reparatur-Modus: frühere Zuteilung übernehmen (--reparieren Zuteilung_....xlsx)
+    vorher_df = None
+    vorher_path = lauf.get('reparieren') if lauf is not None else None
+    if '--reparieren' in sys.argv:
+        position = sys.argv.index('--reparieren') + 1
+        vorher_path = sys.argv[position] if position < len(sys.argv) else ""
+    if vorher_path is not None:
+        try:
+            vorher_df = zuteilung_laden(vorher_path)
+        except Exception as e:
+            print(f"❌ Frühere Zuteilung nicht lesbar ({vorher_path or 'kein Pfad angegeben'}): {e}")
+            return
+
+    # Zuteilung durchführen (optional mit cProfile: --profil)
+    profil = profilieren("laufzeit_profil.prof") if '--profil' in sys.argv else nullcontext()
+    eingaben = {
+        'schueler': os.path.abspath(schueler_path), 'lehrkraefte': os.path.abspath(lehrkraefte_path),
+        'reparieren': os.path.abspath(vorher_path) if vorher_path else None,
+        'gestartet': lauf['gestartet'] if lauf is not None else datetime.now().strftime("%d.%m.%Y %H:%M"),
+    }
+    lauf_merken(pfad_lauf, {**eingaben, 'abgeschlossen': False})
     try:
-        results_df = tool.assign_praktika(schueler_df, lehrkraefte_df)
-        output_file = tool.save_results(results_df, schueler_df)
+        with profil:
+            if vorher_df is not None:
+                results_df, aenderungen_df = tool.repariere_zuteilung(vorher_df, schueler_df, lehrkraefte_df)
+                output_file = tool.save_results(results_df, schueler_df, aenderungen_df=aenderungen_df)
+            else:
+                results_df = tool.assign_praktika(schueler_df, lehrkraefte_df)
+                output_file = tool.save_results(results_df, schueler_df)
+        drucke_metriken(tool.metriken.bericht())
+        lauf_merken(pfad_lauf, {**eingaben, 'abgeschlossen': True})
 
         print("\n" + "=" * 60)
         print("✅ ZUTEILUNG ERFOLGREICH ABGESCHLOSSEN!")
         print(f"   Ausgabedatei: {output_file}")
         print("=" * 60)
 
+    except KeyboardInterrupt:
+        # Wartende Anfragen verwerfen; alles bereits Geladene steht schon im Cache
+        tool.abruf.abbrechen()
+        tool.cache.speichern()
+        print("\n⚠️  Abgebrochen - geladene Geocodierungen und Fahrzeiten bleiben im Cache")
+        print("   Fortsetzen mit: python praktikumszuteilung.py --resume")
+
     except Exception as e:
         print(f"\n❌ Fehler bei der Zuteilung: {e}")
         import traceback
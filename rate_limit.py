@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rate-Limiting und parallele Abfragen
+Token-Bucket pro Anbieter und ein Thread-Pool, der gleichzeitige Anfragen für
+denselben Schlüssel zusammenfasst. Netzwerk-Latenz überlappt so mit den
+Wartezeiten, statt sich zu ihnen zu addieren.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Hashable, Mapping, Tuple
+
+
+class TokenBucket:
+    """
+    Verteilt Anfragen gleichmäßig auf das erlaubte Limit (Anfragen pro Minute).
+    Jeder Aufruf von acquire() reserviert den nächsten freien Zeitpunkt; mit
+    burst=1 liegen zwischen zwei Anfragen immer mindestens 60/pro_minute Sekunden.
+    """
+
+    def __init__(self, pro_minute: float, burst: int = 1):
+        self.intervall = 60.0 / pro_minute if pro_minute else 0.0
+        self.burst = max(1, burst)
+        self._naechster = time.monotonic() - self.intervall * (self.burst - 1)
+        self._lock = threading.Lock()
+        self.wartezeit_gesamt = 0.0
+        self.anfragen = 0
+        self.pausen = 0
+
+    def acquire(self) -> float:
+        """Blockiert bis zum nächsten erlaubten Zeitpunkt. Returns: Wartezeit in Sekunden"""
+        with self._lock:
+            jetzt = time.monotonic()
+            # Nicht genutzte Zeit verfällt bis auf den erlaubten Burst
+            start = max(self._naechster, jetzt - self.intervall * (self.burst - 1))
+            self._naechster = start + self.intervall
+            self.anfragen += 1
+        wartezeit = max(0.0, start - jetzt)
+        if wartezeit > 0:
+            time.sleep(wartezeit)
+            with self._lock:
+                self.wartezeit_gesamt += wartezeit
+        return wartezeit
+
+    def pausieren(self, sekunden: float):
+        """Sperrt den Bucket für alle Threads (z.B. nach HTTP 429 mit Retry-After)"""
+        with self._lock:
+            self._naechster = max(self._naechster, time.monotonic() + sekunden)
+            self.pausen += 1
+
+    def restzeit(self, anfragen: int) -> float:
+        """Geschätzte Sekunden, bis weitere Anfragen im Rahmen des Limits gestellt sind (inkl. Pause)"""
+        if anfragen <= 0:
+            return 0.0
+        with self._lock:
+            wartend = max(0.0, self._naechster - time.monotonic())
+        return wartend + (anfragen - 1) * self.intervall
+
+
+def retry_after_sekunden(headers: Mapping[str, str], standard: float = 65) -> float:
+    """
+    Liest die empfohlene Wartezeit aus den Antwort-Headern:
+    Retry-After (Sekunden oder HTTP-Datum) bzw. x-ratelimit-reset (Unix-Zeit) von ORS.
+    """
+    if not headers:
+        return standard
+    wert = headers.get('Retry-After') or headers.get('retry-after')
+    if wert:
+        try:
+            return max(0.0, float(wert))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(wert).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    reset = headers.get('x-ratelimit-reset') or headers.get('X-Ratelimit-Reset')
+    if reset:
+        try:
+            return max(0.0, float(reset) - time.time())
+        except ValueError:
+            pass
+    return standard
+
+
+class ParallelerAbruf:
+    """
+    Thread-Pool für Netzwerk-Abfragen. Läuft für einen Schlüssel bereits eine Anfrage,
+    wird deren Future zurückgegeben statt eine zweite zu starten.
+    """
+
+    def __init__(self, max_parallel: int = 4):
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_parallel),
+                                        thread_name_prefix="abruf")
+        self._laufend: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def abrufen(self, key: Hashable, funktion: Callable, *args) -> Future:
+        with self._lock:
+            future = self._laufend.get(key)
+            if future is not None:
+                return future
+            future = self._pool.submit(funktion, *args)
+            self._laufend[key] = future
+        future.add_done_callback(lambda _: self._entfernen(key))
+        return future
+
+    def _entfernen(self, key: Hashable):
+        with self._lock:
+            self._laufend.pop(key, None)
+
+    def alle(self, auftraege: Mapping[Hashable, Tuple],
+             erledigt: Callable[[Hashable], None] = None) -> Dict[Hashable, Any]:
+        """
+        Führt {key: (funktion, *args)} parallel aus und liefert {key: ergebnis}
+        erledigt: optional nach jedem abgeschlossenen Schlüssel aufgerufen (z.B. Fortschritt)
+        """
+        futures = {key: self.abrufen(key, *auftrag) for key, auftrag in auftraege.items()}
+        if erledigt is not None:
+            for key, future in futures.items():
+                future.add_done_callback(lambda _, key=key: erledigt(key))
+        return {key: future.result() for key, future in futures.items()}
+
+    def abbrechen(self):
+        """Verwirft wartende Anfragen (z.B. nach Strg+C); laufende werden noch beendet"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
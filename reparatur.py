@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reparatur-Modus
+Gleicht eine frühere Zuteilung (Zuteilung_*.xlsx) mit geänderten Eingabedateien ab:
+gültige Zuteilungen bleiben bestehen, nur betroffene Schülerinnen werden neu
+zugeteilt. Betroffen sind neue Schülerinnen, geänderte Einrichtung/Adresse/Klasse,
+entfallene Lehrkräfte und Lehrkräfte, deren Soll unter die bisherige Zahl gesunken ist.
+"""
+
+from typing import Dict, List
+
+import pandas as pd
+
+# Gründe für eine Neuzuteilung (Spalte "Grund" im Sheet "Änderungen")
+GRUND_NEU = "Neu oder bisher nicht zugeteilt"
+GRUND_EINRICHTUNG = "Einrichtung/Adresse geändert"
+GRUND_KLASSE = "Klasse geändert"
+GRUND_LEHRKRAFT = "Lehrkraft entfällt"
+GRUND_KAPAZITAET = "Kapazität der Lehrkraft gesunken"
+GRUND_NAME = "Name nicht eindeutig"
+GRUND_ENTFERNT = "Nicht mehr in der Schülerinnen-Datei"
+
+
+class Abgleich:
+    """
+    Ergebnis des Abgleichs:
+    - behalten: Zeilen der früheren Zuteilung, die unverändert gültig sind
+    - betroffen: Zeilen der Schülerinnen-Datei, die neu zugeteilt werden
+    - gruende: Schülerin → Grund der Neuzuteilung
+    - entfernt: Zeilen der früheren Zuteilung, deren Schülerin nicht mehr vorkommt
+    """
+
+    __slots__ = ('behalten', 'betroffen', 'gruende', 'entfernt')
+
+    def __init__(self):
+        self.behalten: List[int] = []
+        self.betroffen: List[int] = []
+        self.gruende: Dict[str, str] = {}
+        self.entfernt: List[int] = []
+
+
+def zuteilung_laden(pfad: str) -> pd.DataFrame:
+    """Liest das Sheet "Zuteilungen" einer früheren Ergebnisdatei"""
+    vorher = pd.read_excel(pfad, sheet_name='Zuteilungen')
+    fehlend = [s for s in ('Schülerin', 'Klasse', 'Einrichtung', 'Adresse', 'Lehrkraft') if s not in vorher.columns]
+    if fehlend:
+        raise ValueError(f"Keine gültige Zuteilungsdatei ({pfad}), fehlende Spalten: {fehlend}")
+    return vorher
+
+
+def zuteilung_abgleichen(vorher: pd.DataFrame, schueler_df: pd.DataFrame,
+                         lehrkraefte_df: pd.DataFrame) -> Abgleich:
+    """Bestimmt, welche früheren Zuteilungen gültig bleiben und wer neu zugeteilt wird"""
+    abgleich = Abgleich()
+    namen = schueler_df['Name'].tolist()
+    doppelt = set(schueler_df['Name'][schueler_df['Name'].duplicated(keep=False)])
+    doppelt |= set(vorher['Schülerin'][vorher['Schülerin'].duplicated(keep=False)])
+    aktuell = {name: pos for pos, name in enumerate(namen)}
+    adressen = [f"{strasse}, {plz} {ort}" for strasse, plz, ort in
+                zip(schueler_df['Straße'], schueler_df['PLZ'], schueler_df['Ort'])]
+
+    # Soll pro Lehrkraft-Name (bei doppelten Namen wie in der Engine: erste Zeile)
+    soll = {}
+    for name, anzahl in zip(lehrkraefte_df['Name'], lehrkraefte_df['Soll_Anzahl_Betreuungen']):
+        soll.setdefault(name, anzahl)
+
+    kandidaten: Dict[str, List[int]] = {}  # Lehrkraft → gültige frühere Zeilen
+    for zeile, (name, klasse, einrichtung, adresse, lehrkraft) in enumerate(zip(
+            vorher['Schülerin'], vorher['Klasse'], vorher['Einrichtung'], vorher['Adresse'], vorher['Lehrkraft'])):
+        pos = aktuell.get(name)
+        if pos is None:
+            abgleich.entfernt.append(zeile)
+            continue
+        if name in doppelt:
+            abgleich.gruende[name] = GRUND_NAME
+        elif (einrichtung != schueler_df['Einrichtung'].iat[pos]
+              or str(adresse) != adressen[pos]):
+            abgleich.gruende[name] = GRUND_EINRICHTUNG
+        elif klasse != schueler_df['Klasse'].iat[pos]:
+            abgleich.gruende[name] = GRUND_KLASSE
+        elif lehrkraft not in soll:
+            abgleich.gruende[name] = GRUND_LEHRKRAFT
+        else:
+            kandidaten.setdefault(lehrkraft, []).append(zeile)
+
+    # Harte Grenze Soll +1: bei gesunkenem Soll die Zuteilungen mit dem niedrigsten Score lösen
+    scores = vorher['Score'] if 'Score' in vorher.columns else pd.Series(0, index=vorher.index)
+    for lehrkraft, zeilen in kandidaten.items():
+        ueberschuss = len(zeilen) - (soll[lehrkraft] + 1)
+        if ueberschuss > 0:
+            nach_score = sorted(zeilen, key=lambda z: (scores.iat[z], -z))
+            for zeile in nach_score[:ueberschuss]:
+                abgleich.gruende[vorher['Schülerin'].iat[zeile]] = GRUND_KAPAZITAET
+                zeilen.remove(zeile)
+        abgleich.behalten.extend(zeilen)
+    abgleich.behalten.sort()
+
+    behalten = set(vorher['Schülerin'].iloc[abgleich.behalten])
+    for pos, name in enumerate(namen):
+        if name in behalten and name not in doppelt:
+            continue
+        abgleich.betroffen.append(pos)
+        abgleich.gruende.setdefault(name, GRUND_NEU)
+    return abgleich
+
+
+def aenderungen(vorher: pd.DataFrame, ergebnis: pd.DataFrame, abgleich: Abgleich) -> pd.DataFrame:
+    """Sheet "Änderungen": eine Zeile pro betroffener oder entfernter Schülerin"""
+    vorher_zeile = {name: zeile for zeile, name in enumerate(vorher['Schülerin'])}
+    neu_zeile = {name: zeile for zeile, name in enumerate(ergebnis['Schülerin'])}
+    zeilen = []
+    for name, grund in abgleich.gruende.items():
+        alt = vorher.iloc[vorher_zeile[name]] if name in vorher_zeile else None
+        neu = ergebnis.iloc[neu_zeile[name]] if name in neu_zeile else None
+        if neu is None:
+            aenderung = "nicht zugeteilt"
+        elif alt is None:
+            aenderung = "neu zugeteilt"
+        elif alt['Lehrkraft'] == neu['Lehrkraft']:
+            aenderung = "Lehrkraft unverändert"
+        else:
+            aenderung = "umgeteilt"
+        zeilen.append(_aenderung(name, aenderung, grund, alt, neu))
+    for zeile in abgleich.entfernt:
+        alt = vorher.iloc[zeile]
+        zeilen.append(_aenderung(alt['Schülerin'], "entfernt", GRUND_ENTFERNT, alt, None))
+    return pd.DataFrame(zeilen, columns=['Schülerin', 'Änderung', 'Grund', 'Lehrkraft_vorher', 'Lehrkraft_neu',
+                                         'Einrichtung_vorher', 'Einrichtung_neu', 'Score_vorher', 'Score_neu'])
+
+
+def _aenderung(name: str, aenderung: str, grund: str, alt, neu) -> Dict:
+    return {
+        'Schülerin': name,
+        'Änderung': aenderung,
+        'Grund': grund,
+        'Lehrkraft_vorher': alt['Lehrkraft'] if alt is not None else None,
+        'Lehrkraft_neu': neu['Lehrkraft'] if neu is not None else None,
+        'Einrichtung_vorher': alt['Einrichtung'] if alt is not None else None,
+        'Einrichtung_neu': neu['Einrichtung'] if neu is not None else None,
+        'Score_vorher': alt.get('Score') if alt is not None else None,
+        'Score_neu': neu['Score'] if neu is not None else None,
+    }
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Routing- und Geocoding-Backends
+Gemeinsame Schnittstelle für die Fahrzeit- und Koordinatenquellen des Tools:
+- OrsBackend: OpenRouteService (Directions und Matrix, mit Rate-Limit)
+- GraphBackend: lokales Routing auf einem Straßengraphen (siehe strassengraph.py)
+- LuftlinienBackend: Schätzung aus der Luftlinie (kalibriertes Fahrzeitmodell)
+- CachedBackend: Route-Cache vor einem der obigen Backends
+- NominatimGeocoder / OfflineGeocoder
+
+Alle Fahrzeiten sind in Minuten; None bedeutet "nicht routbar".
+"""
+
+import math
+import threading
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fahrzeit_modell import LUFTLINIE_MIN_PRO_KM, FahrzeitModell
+from geo_cache import FALLBACK_QUELLEN, QUELLE_GRAPH, QUELLE_LUFTLINIE, QUELLE_ORS
+from rate_limit import TokenBucket
+
+Koordinaten = Tuple[float, float]
+Matrix = List[List[Optional[float]]]
+
+# Meter pro Breitengrad (für das Raster der Cache-Schlüssel)
+METER_PRO_GRAD = 111320.0
+
+
+def route_key(start: Koordinaten, ende: Koordinaten) -> str:
+    """Schlüssel einer Strecke im Route-Cache"""
+    return f"{start}_{ende}"
+
+
+def rasterpunkt(coords: Koordinaten, raster_m: float) -> Koordinaten:
+    """Rastet Koordinaten auf ein Gitter mit ca. raster_m Metern Kantenlänge ein"""
+    schritt_lat = raster_m / METER_PRO_GRAD
+    lat = round(coords[0] / schritt_lat) * schritt_lat
+    schritt_lon = raster_m / (METER_PRO_GRAD * max(math.cos(math.radians(lat)), 0.01))
+    lon = round(coords[1] / schritt_lon) * schritt_lon
+    # Gerundet, damit der Schlüssel-Text stabil bleibt
+    return (round(lat, 6), round(lon, 6))
+
+
+class RoutingBackend:
+    """
+    Basisklasse: liefert Fahrzeiten für einzelne Strecken und Matrizen.
+    max_orte/max_routen begrenzen die Größe einer Matrix-Anfrage (None = unbegrenzt).
+    """
+
+    name = "basis"
+    quelle: Optional[str] = None
+    max_orte: Optional[int] = None
+    max_routen: Optional[int] = None
+
+    def fahrzeit(self, start: Koordinaten, ende: Koordinaten) -> Optional[float]:
+        raise NotImplementedError
+
+    def matrix(self, quellen: Sequence[Koordinaten], ziele: Sequence[Koordinaten]) -> Optional[Matrix]:
+        """Fahrzeiten quellen × ziele; Standard: Einzelabfragen. None bei Fehlern der gesamten Anfrage"""
+        return [[self.fahrzeit(q, z) for z in ziele] for q in quellen]
+
+
+class OrsBackend(RoutingBackend):
+    """OpenRouteService mit Token-Bucket und einmaliger Wiederholung bei HTTP 429"""
+
+    name = "ors"
+    quelle = QUELLE_ORS
+
+    def __init__(self, client_fabrik: Callable[[], Any], directions_limit: TokenBucket, matrix_limit: TokenBucket,
+                 wartezeit_nach_429: Callable[[], float], max_orte: int = 50, max_routen: int = 3500):
+        # Client (und das Paket openrouteservice) erst bei der ersten Anfrage
+        self.client_fabrik = client_fabrik
+        self.directions_limit = directions_limit
+        self.matrix_limit = matrix_limit
+        self.wartezeit_nach_429 = wartezeit_nach_429
+        self.max_orte = max_orte
+        self.max_routen = max_routen
+
+    @property
+    def client(self):
+        return self.client_fabrik()
+
+    def fahrzeit(self, start: Koordinaten, ende: Koordinaten,
+                 retry_on_rate_limit: bool = True) -> Optional[float]:
+        from openrouteservice.exceptions import ApiError
+        try:
+            # OpenRouteService erwartet (lon, lat) statt (lat, lon)
+            coords = [[start[1], start[0]],
+                      [ende[1], ende[0]]]
+
+            self.directions_limit.acquire()
+            route = self.client.directions(
+                coordinates=coords,
+                profile='driving-car',
+                format='geojson'
+            )
+
+            # Dauer in Sekunden, umrechnen in Minuten
+            return route['features'][0]['properties']['segments'][0]['duration'] / 60
+
+        except ApiError as e:
+            error_str = str(e)
+
+            # Behandlung von Rate-Limit (HTTP 429)
+            if '429' in error_str or 'rate limit' in error_str.lower():
+                if retry_on_rate_limit:
+                    wartezeit = self.wartezeit_nach_429()
+                    print(f"⚠️  Rate-Limit erreicht! Warte {wartezeit:.0f} Sekunden...")
+                    self.directions_limit.pausieren(wartezeit)
+                    # Rekursiver Aufruf ohne weiteres Retry (wartet im Rate-Limiter)
+                    return self.fahrzeit(start, ende, retry_on_rate_limit=False)
+                else:
+                    print(f"⚠️  Rate-Limit bleibt, nutze Luftlinien-Schätzung")
+
+            # Stille Behandlung von bekannten Routing-Problemen
+            elif '404' in error_str and '2010' in error_str:
+                # Koordinate nicht routingfähig (z.B. auf Wiese/im Wasser) → stiller Fallback
+                pass
+            elif '2099' in error_str:
+                # Keine Route gefunden → stiller Fallback
+                pass
+            else:
+                # Nur bei unerwarteten Fehlern ausgeben
+                print(f"⚠️  Routing-Fehler: {e}")
+            return None
+
+        except Exception as e:
+            # Nur unerwartete Fehler ausgeben
+            if 'rate limit' not in str(e).lower():
+                print(f"⚠️  Unerwarteter Routing-Fehler: {e}")
+            return None
+
+    def matrix(self, quellen: Sequence[Koordinaten], ziele: Sequence[Koordinaten],
+               retry_on_rate_limit: bool = True) -> Optional[Matrix]:
+        """Eine Matrix-Anfrage, None bei Fehlern"""
+        # OpenRouteService erwartet (lon, lat) statt (lat, lon)
+        from openrouteservice.exceptions import ApiError
+        locations = [[c[1], c[0]] for c in quellen] + [[c[1], c[0]] for c in ziele]
+        try:
+            self.matrix_limit.acquire()
+            matrix = self.client.distance_matrix(
+                locations=locations,
+                profile='driving-car',
+                sources=list(range(len(quellen))),
+                destinations=list(range(len(quellen), len(locations))),
+                metrics=['duration']
+            )
+            return [[d / 60 if d is not None else None for d in zeile] for zeile in matrix['durations']]
+
+        except ApiError as e:
+            error_str = str(e)
+            if ('429' in error_str or 'rate limit' in error_str.lower()) and retry_on_rate_limit:
+                wartezeit = self.wartezeit_nach_429()
+                print(f"⚠️  Rate-Limit erreicht! Warte {wartezeit:.0f} Sekunden...")
+                self.matrix_limit.pausieren(wartezeit)
+                return self.matrix(quellen, ziele, retry_on_rate_limit=False)
+            print(f"⚠️  Matrix-Fehler: {e} → Einzelabfragen als Fallback")
+            return None
+
+        except Exception as e:
+            print(f"⚠️  Unerwarteter Matrix-Fehler: {e} → Einzelabfragen als Fallback")
+            return None
+
+
+class LuftlinienBackend(RoutingBackend):
+    """Schätzung ohne Routing: kalibriertes Fahrzeitmodell, sonst 1km ≈ 1.5min"""
+
+    name = "luftlinie"
+    quelle = QUELLE_LUFTLINIE
+
+    def __init__(self, modell: Optional[FahrzeitModell] = None):
+        self.modell = modell
+
+    def fahrzeit(self, start: Koordinaten, ende: Koordinaten) -> float:
+        if self.modell is not None:
+            return self.modell.schaetzen(start, ende)
+        from geopy.distance import geodesic
+        return geodesic(start, ende).kilometers * LUFTLINIE_MIN_PRO_KM
+
+    def matrix(self, quellen: Sequence[Koordinaten], ziele: Sequence[Koordinaten]) -> Matrix:
+        # Vektorisiert; ohne kalibriertes Modell reine Haversine-Distanz × 1.5 min/km
+        modell = self.modell or FahrzeitModell(0.0, LUFTLINIE_MIN_PRO_KM)
+        return modell.matrix(quellen, ziele).tolist()
+
+
+class GraphBackend(RoutingBackend):
+    """Lokales Routing auf einem Straßengraphen - ohne Netzwerk und ohne Rate-Limit"""
+
+    name = "graph"
+    quelle = QUELLE_GRAPH
+
+    def __init__(self, graph):
+        # Strassengraph.laden liefert None, wenn die Datei fehlt - sonst schlüge erst die erste Anfrage fehl
+        if graph is None:
+            raise ValueError("GraphBackend benötigt einen Straßengraphen (Datei nicht gefunden?)")
+        self.graph = graph
+
+    def fahrzeit(self, start: Koordinaten, ende: Koordinaten) -> Optional[float]:
+        return self.graph.matrix([start], [ende])[0][0]
+
+    def matrix(self, quellen: Sequence[Koordinaten], ziele: Sequence[Koordinaten]) -> Matrix:
+        return self.graph.matrix(quellen, ziele)
+
+
+class CachedBackend(RoutingBackend):
+    """
+    Route-Cache vor einem Backend. Exakte Fahrzeiten werden persistent gespeichert,
+    Schätzungen (Quelle luftlinie) nur für den laufenden Lauf im Speicher.
+    Zählt Cache-Treffer/-Fehlschläge und Aufrufe des Backends (kumulativ, auch aus den
+    Abruf-Threads von ParallelerAbruf - daher unter einem Lock).
+
+    raster_m: Schlüssel aus Koordinaten, die auf ein Gitter eingerastet sind - nahe
+    beieinander liegende Orte teilen sich einen Eintrag (None = exakte Koordinaten).
+    symmetrisch: fehlt eine Richtung, wird die Gegenrichtung verwendet. Ein Anteil
+    stichprobe dieser Paare wird trotzdem abgefragt; jedes Paar, für das beide
+    Richtungen exakt vorliegen, geht in den Fehlerbericht (symmetrie_vergleiche) ein.
+    """
+
+    def __init__(self, backend: RoutingBackend, route_cache, raster_m: Optional[float] = None,
+                 symmetrisch: bool = False, stichprobe: float = 0.0):
+        self.backend = backend
+        self.route_cache = route_cache
+        self.schaetzungen: Dict[str, float] = {}
+        self.name = backend.name
+        self.quelle = backend.quelle
+        self.max_orte = backend.max_orte
+        self.max_routen = backend.max_routen
+        self.raster_m = raster_m or None
+        self.symmetrisch = symmetrisch
+        self.stichprobe = stichprobe
+        self.treffer = 0
+        self.fehlschlaege = 0
+        self.aufrufe_einzeln = 0
+        self.aufrufe_matrix = 0
+        self.symmetrie_treffer = 0
+        self._lock = threading.Lock()
+        # (Gegenrichtung, tatsächliche Fahrzeit) je Paar mit beiden Richtungen exakt
+        self.symmetrie_vergleiche: List[Tuple[float, float]] = []
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.route_cache or key in self.schaetzungen
+
+    def _zaehlen(self, *namen: str):
+        with self._lock:
+            for name in namen:
+                setattr(self, name, getattr(self, name) + 1)
+
+    def zelle(self, coords: Koordinaten) -> Koordinaten:
+        """Koordinaten, unter denen ein Ort im Cache geführt wird"""
+        return rasterpunkt(coords, self.raster_m) if self.raster_m else coords
+
+    def schluessel(self, start: Koordinaten, ende: Koordinaten) -> str:
+        return route_key(self.zelle(start), self.zelle(ende))
+
+    def orte(self, coords: Sequence[Koordinaten]) -> List[Koordinaten]:
+        """Eindeutige Orte, ein Vertreter pro Rasterzelle (in der Reihenfolge des Auftretens)"""
+        vertreter: Dict[Koordinaten, Koordinaten] = {}
+        for c in coords:
+            vertreter.setdefault(self.zelle(c), c)
+        return list(vertreter.values())
+
+    def _in_stichprobe(self, key: str) -> bool:
+        # Deterministisch (unabhängig von PYTHONHASHSEED), damit Läufe reproduzierbar bleiben
+        return self.stichprobe > 0 and zlib.crc32(key.encode('utf-8')) % 10000 < self.stichprobe * 10000
+
+    def _gegenrichtung(self, start: Koordinaten, ende: Koordinaten) -> Optional[float]:
+        """Fahrzeit der Gegenrichtung, falls die Symmetrie-Regel sie für dieses Paar zulässt"""
+        if not self.symmetrisch or self._in_stichprobe(self.schluessel(start, ende)):
+            return None
+        return self.route_cache.get(self.schluessel(ende, start))
+
+    def bekannt(self, start: Koordinaten, ende: Koordinaten) -> bool:
+        """Fahrzeit liegt vor (direkt oder über die Gegenrichtung) - keine Anfrage nötig"""
+        return self.schluessel(start, ende) in self or self._gegenrichtung(start, ende) is not None
+
+    def nachschlagen(self, start: Koordinaten, ende: Koordinaten) -> Optional[float]:
+        key = self.schluessel(start, ende)
+        if key in self.route_cache:
+            return self.route_cache[key]
+        if key in self.schaetzungen:
+            return self.schaetzungen[key]
+        dauer = self._gegenrichtung(start, ende)
+        if dauer is not None:
+            self._zaehlen('symmetrie_treffer')
+        return dauer
+
+    def speichern(self, start: Koordinaten, ende: Koordinaten, dauer: float, quelle: str = None):
+        quelle = quelle or self.quelle
+        key = self.schluessel(start, ende)
+        if quelle in FALLBACK_QUELLEN and self.quelle in FALLBACK_QUELLEN:
+            # Reines Schätz-Backend (Offline-Modus): nicht persistent cachen
+            self.schaetzungen[key] = dauer
+            return
+        self.route_cache.set(key, dauer, quelle, {'start': start, 'ende': ende})
+        if quelle not in FALLBACK_QUELLEN:
+            gegen_key = self.schluessel(ende, start)
+            if gegen_key != key and gegen_key in self.route_cache \
+                    and self.route_cache.quelle(gegen_key) not in FALLBACK_QUELLEN:
+                self.symmetrie_vergleiche.append((self.route_cache[gegen_key], dauer))
+
+    def symmetrie_fehler(self, ab: int = 0) -> Dict:
+        """Abweichung Gegenrichtung ↔ tatsächliche Fahrzeit (Vergleiche ab Index ab)"""
+        vergleiche = self.symmetrie_vergleiche[ab:]
+        if not vergleiche:
+            return {'vergleiche': 0, 'mittlere_abweichung_min': None,
+                    'max_abweichung_min': None, 'mittlere_abweichung_rel': None}
+        abweichungen = [abs(gegen - echt) for gegen, echt in vergleiche]
+        relativ = [abs(gegen - echt) / echt for gegen, echt in vergleiche if echt > 0]
+        return {
+            'vergleiche': len(vergleiche),
+            'mittlere_abweichung_min': round(sum(abweichungen) / len(abweichungen), 3),
+            'max_abweichung_min': round(max(abweichungen), 3),
+            'mittlere_abweichung_rel': round(sum(relativ) / len(relativ), 4) if relativ else None,
+        }
+
+    def fahrzeit(self, start: Koordinaten, ende: Koordinaten) -> Optional[float]:
+        dauer = self.nachschlagen(start, ende)
+        if dauer is not None:
+            self._zaehlen('treffer')
+            return dauer
+        self._zaehlen('fehlschlaege', 'aufrufe_einzeln')
+        dauer = self.backend.fahrzeit(start, ende)
+        if dauer is not None:
+            self.speichern(start, ende, dauer)
+        return dauer
+
+    def matrix(self, quellen: Sequence[Koordinaten], ziele: Sequence[Koordinaten]) -> Optional[Matrix]:
+        """Fragt das Backend an und speichert alle routbaren Paare, die noch fehlen"""
+        self._zaehlen('aufrufe_matrix')
+        matrix = self.backend.matrix(quellen, ziele)
+        if matrix is None:
+            return None
+        for i, q in enumerate(quellen):
+            for j, z in enumerate(ziele):
+                # Nicht routbare Paare bleiben offen → späterer Fallback
+                if q == z or matrix[i][j] is None or self.schluessel(q, z) in self:
+                    continue
+                self.speichern(q, z, matrix[i][j])
+        return matrix
+
+
+class Geocoder:
+    """Basisklasse: Freitext-Anfrage → (lat, lon) oder None"""
+
+    name = "basis"
+
+    def geocode(self, anfrage: str) -> Optional[Koordinaten]:
+        raise NotImplementedError
+
+
+class NominatimGeocoder(Geocoder):
+    """Nominatim (OpenStreetMap) innerhalb des Rate-Limits, bei HTTP 429 einmalige Wiederholung"""
+
+    name = "nominatim"
+
+    def __init__(self, geolocator_fabrik: Callable[[], Any], limit: TokenBucket):
+        # Client (und geopy.geocoders) erst bei der ersten Anfrage
+        self.geolocator_fabrik = geolocator_fabrik
+        self.limit = limit
+
+    @property
+    def geolocator(self):
+        return self.geolocator_fabrik()
+
+    def geocode(self, anfrage: str, retry_on_rate_limit: bool = True) -> Optional[Koordinaten]:
+        from geopy.exc import GeocoderRateLimited
+        self.limit.acquire()
+        try:
+            location = self.geolocator.geocode(anfrage)
+        except GeocoderRateLimited as e:
+            if not retry_on_rate_limit:
+                raise
+            wartezeit = e.retry_after if e.retry_after is not None else 65
+            print(f"⚠️  Nominatim Rate-Limit erreicht! Warte {wartezeit:.0f} Sekunden...")
+            self.limit.pausieren(wartezeit)
+            return self.geocode(anfrage, retry_on_rate_limit=False)
+        if location:
+            return (location.latitude, location.longitude)
+        return None
+
+
+class OfflineGeocoder(Geocoder):
+    """Keine Netzwerk-Anfragen: nur Cache und PLZ-Tabelle des Tools werden genutzt"""
+
+    name = "offline"
+
+    def geocode(self, anfrage: str) -> Optional[Koordinaten]:
+        return None
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lokaler Straßengraph für Fahrzeiten ohne ORS
+Gerichteter Graph mit Fahrzeiten pro Kante, erzeugt aus einem OSM-Extrakt
+(z.B. Schleswig-Holstein von Geofabrik). Fahrzeit-Matrizen werden mit
+Many-to-Many-Dijkstra (scipy.sparse.csgraph) berechnet - ohne Rate-Limit.
+
+Import eines OSM-Extrakts (XML; PBF vorher mit "osmium cat x.osm.pbf -o x.osm" umwandeln):
+    python strassengraph.py schleswig-holstein.osm --ziel daten/strassengraph.npz
+"""
+
+import argparse
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fahrzeit_modell import ERDRADIUS_KM, luftlinie_km
+
+# Richtgeschwindigkeiten in km/h pro Straßentyp (ohne maxspeed-Angabe)
+GESCHWINDIGKEITEN = {
+    'motorway': 110, 'motorway_link': 60,
+    'trunk': 90, 'trunk_link': 50,
+    'primary': 70, 'primary_link': 45,
+    'secondary': 60, 'secondary_link': 40,
+    'tertiary': 50, 'tertiary_link': 35,
+    'unclassified': 40, 'residential': 30,
+    'living_street': 10, 'service': 15, 'road': 30,
+}
+
+
+def _geschwindigkeit(tags: Dict[str, str]) -> Optional[float]:
+    """km/h einer Straße oder None, wenn sie nicht befahrbar ist"""
+    standard = GESCHWINDIGKEITEN.get(tags.get('highway'))
+    if standard is None or tags.get('access') in ('no', 'private') or tags.get('motor_vehicle') == 'no':
+        return None
+    treffer = re.match(r"\s*(\d+)", tags.get('maxspeed', ''))
+    if treffer:
+        # Tatsächliche Geschwindigkeit liegt im Mittel unter der zulässigen
+        return min(float(treffer.group(1)) * 0.9, standard * 1.2)
+    return standard
+
+
+def _richtung(tags: Dict[str, str]) -> int:
+    """1 = nur vorwärts, -1 = nur rückwärts, 0 = beide Richtungen"""
+    oneway = tags.get('oneway', '')
+    if oneway in ('yes', 'true', '1'):
+        return 1
+    if oneway == '-1':
+        return -1
+    if tags.get('highway') == 'motorway' or tags.get('junction') == 'roundabout':
+        return 1 if oneway != 'no' else 0
+    return 0
+
+
+class Strassengraph:
+    """
+    Knoten als parallele NumPy-Arrays (lat/lon), Kanten als CSR-Matrix mit Fahrzeit in Sekunden.
+
+    Koordinaten, die nicht auf dem Graphen liegen, werden an den nächsten Knoten
+    angebunden; die Luftlinie dorthin wird mit anbindung_kmh bewertet. Liegt der
+    nächste Knoten weiter als max_anbindung_km entfernt, gilt der Punkt als nicht routbar.
+    """
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, von: np.ndarray, nach: np.ndarray,
+                 sekunden: np.ndarray, anbindung_kmh: float = 30, max_anbindung_km: float = 5):
+        try:
+            from scipy.sparse import csr_matrix
+            from scipy.spatial import cKDTree
+        except ImportError:
+            raise ImportError("Lokales Routing benötigt SciPy (pip install scipy)")
+
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.anbindung_kmh = anbindung_kmh
+        self.max_anbindung_km = max_anbindung_km
+
+        # Parallele Kanten: nur die schnellste behalten (csr_matrix würde sie addieren)
+        von, nach, sekunden = (np.asarray(x) for x in (von, nach, sekunden))
+        reihenfolge = np.lexsort((sekunden, nach, von))
+        von, nach, sekunden = von[reihenfolge], nach[reihenfolge], sekunden[reihenfolge]
+        erste = np.ones(len(von), dtype=bool)
+        erste[1:] = (von[1:] != von[:-1]) | (nach[1:] != nach[:-1])
+        self.von, self.nach, self.sekunden = von[erste], nach[erste], sekunden[erste]
+        # Fahrzeit 0 wäre in einer dünnen Matrix "keine Kante"
+        n = len(self.lat)
+        self.kanten = csr_matrix((np.maximum(self.sekunden, 1e-3), (self.von, self.nach)), shape=(n, n))
+
+        # Nächster-Knoten-Suche in einer flächentreuen Projektion (km)
+        self._breite0 = np.radians(self.lat.mean()) if n else 0.0
+        self._baum = cKDTree(self._projizieren(self.lat, self.lon)) if n else None
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    @property
+    def anzahl_kanten(self) -> int:
+        return int(self.kanten.nnz)
+
+    def _projizieren(self, lat, lon) -> np.ndarray:
+        km_pro_grad = np.pi * ERDRADIUS_KM / 180
+        return np.column_stack([np.asarray(lat) * km_pro_grad,
+                                np.asarray(lon) * km_pro_grad * np.cos(self._breite0)])
+
+    def _anbinden(self, coords: Sequence[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Nächster Knoten und Anbindungszeit (Sekunden, inf = zu weit entfernt) pro Koordinate"""
+        punkte = np.asarray(coords, dtype=float).reshape(-1, 2)
+        abstand_km, knoten = self._baum.query(self._projizieren(punkte[:, 0], punkte[:, 1]))
+        anbindung = abstand_km / self.anbindung_kmh * 3600
+        anbindung[abstand_km > self.max_anbindung_km] = np.inf
+        return knoten, anbindung
+
+    def matrix(self, quellen: Sequence[Tuple[float, float]], ziele: Sequence[Tuple[float, float]],
+               block: int = 16) -> List[List[Optional[float]]]:
+        """
+        Fahrzeiten quellen × ziele in Minuten (None = nicht erreichbar).
+        Dijkstra läuft einmal pro eindeutigem Startknoten, blockweise, damit der
+        Speicherbedarf bei großen Graphen begrenzt bleibt.
+        """
+        from scipy.sparse.csgraph import dijkstra
+
+        if not len(quellen) or not len(ziele):
+            return [[] for _ in quellen]
+        if self._baum is None:
+            return [[None] * len(ziele) for _ in quellen]
+
+        q_knoten, q_anbindung = self._anbinden(quellen)
+        z_knoten, z_anbindung = self._anbinden(ziele)
+        starts, start_index = np.unique(q_knoten, return_inverse=True)
+
+        sekunden = np.empty((len(starts), len(z_knoten)))
+        for anfang in range(0, len(starts), block):
+            entfernungen = dijkstra(self.kanten, directed=True, indices=starts[anfang:anfang + block])
+            sekunden[anfang:anfang + block] = entfernungen[:, z_knoten]
+
+        gesamt = sekunden[start_index] + q_anbindung[:, None] + z_anbindung[None, :]
+        minuten = gesamt / 60
+        return [[float(m) if np.isfinite(m) else None for m in zeile] for zeile in minuten]
+
+    # --- Laden und Speichern ---
+
+    @classmethod
+    def laden(cls, pfad: str, **kwargs) -> Optional["Strassengraph"]:
+        """Lädt einen Graphen (.npz aus dem Import oder direkt .osm); None, wenn die Datei fehlt"""
+        if not pfad or not os.path.exists(pfad):
+            return None
+        if pfad.endswith('.npz'):
+            daten = np.load(pfad)
+            return cls(daten['lat'], daten['lon'], daten['von'], daten['nach'], daten['sekunden'], **kwargs)
+        return cls.aus_osm(pfad, **kwargs)
+
+    def speichern(self, pfad: str):
+        if os.path.dirname(pfad):
+            os.makedirs(os.path.dirname(pfad), exist_ok=True)
+        np.savez_compressed(pfad, lat=self.lat, lon=self.lon, von=self.von.astype(np.int32),
+                            nach=self.nach.astype(np.int32), sekunden=self.sekunden.astype(np.float32))
+
+    @classmethod
+    def aus_osm(cls, pfad: str, **kwargs) -> "Strassengraph":
+        """
+        Liest befahrbare Straßen aus OSM-XML. Zwei Durchläufe, damit nur die
+        Koordinaten der Straßenknoten im Speicher gehalten werden.
+        """
+        # 1. Durchlauf: Straßen mit Knotenfolge, Geschwindigkeit und Richtung
+        strassen = []
+        benoetigt = set()
+        for _, element in ET.iterparse(pfad, events=('end',)):
+            if element.tag == 'way':
+                tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+                kmh = _geschwindigkeit(tags)
+                if kmh is not None:
+                    refs = [int(nd.get('ref')) for nd in element.iter('nd')]
+                    if len(refs) > 1:
+                        strassen.append((refs, kmh, _richtung(tags)))
+                        benoetigt.update(refs)
+                element.clear()
+            elif element.tag == 'node':
+                element.clear()
+
+        # 2. Durchlauf: Koordinaten der benötigten Knoten
+        index: Dict[int, int] = {}
+        lat, lon = [], []
+        for _, element in ET.iterparse(pfad, events=('end',)):
+            if element.tag == 'node':
+                osm_id = int(element.get('id'))
+                if osm_id in benoetigt:
+                    index[osm_id] = len(lat)
+                    lat.append(float(element.get('lat')))
+                    lon.append(float(element.get('lon')))
+            element.clear()
+        lat, lon = np.array(lat), np.array(lon)
+
+        # Kanten zwischen aufeinanderfolgenden Knoten jeder Straße
+        von, nach, sekunden = [], [], []
+        for refs, kmh, richtung in strassen:
+            knoten = np.array([index[r] for r in refs if r in index])
+            if len(knoten) < 2:
+                continue
+            a, b = knoten[:-1], knoten[1:]
+            km = luftlinie_km(lat[a], lon[a], lat[b], lon[b])
+            dauer = km / kmh * 3600
+            if richtung >= 0:
+                von.append(a), nach.append(b), sekunden.append(dauer)
+            if richtung <= 0:
+                von.append(b), nach.append(a), sekunden.append(dauer)
+
+        if not von:
+            return cls(lat, lon, np.array([], dtype=int), np.array([], dtype=int), np.array([]), **kwargs)
+        return cls(lat, lon, np.concatenate(von), np.concatenate(nach), np.concatenate(sekunden), **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Straßengraph aus OSM-Extrakt importieren")
+    parser.add_argument('quelle', help="OSM-XML-Datei (z.B. schleswig-holstein.osm)")
+    parser.add_argument('--ziel', default="daten/strassengraph.npz", help="Ausgabedatei")
+    args = parser.parse_args()
+
+    graph = Strassengraph.aus_osm(args.quelle)
+    graph.speichern(args.ziel)
+    print(f"✓ Straßengraph gespeichert: {len(graph)} Knoten, {graph.anzahl_kanten} Kanten → {args.ziel}")
+
+
+if __name__ == "__main__":
+    main()
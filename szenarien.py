@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Szenario-Vergleich für Score-Gewichte
+Vergleicht Varianten von "scoring" und "fahrzeit_grenzen", ohne für jede Variante
+neu zu geocodieren und zu routen: Die Fahrzeit-Matrix wird einmal berechnet, als
+.npy-Dateien abgelegt und von den Worker-Prozessen schreibgeschützt per Memory-Map
+gelesen. Jeder Worker berechnet nur die statischen Scores seiner Variante und führt
+die Zuteilungs-Engine aus.
+
+    python szenarien.py schueler.xlsx lehrkraefte.xlsx szenarien.json
+    python szenarien.py schueler.xlsx lehrkraefte.xlsx szenarien.json --worker 4 --engine heap
+
+Szenario-Datei (JSON), Raster und/oder einzelne Varianten:
+    {
+      "raster": {
+        "scoring.klassen_match": [80, 100, 150],
+        "fahrzeit_grenzen.gut_max_min": [10, 15]
+      },
+      "varianten": [
+        {"name": "Fahrzeit stark", "scoring": {"fahrzeit_exzellent": 60, "fahrzeit_gut": 40}}
+      ]
+    }
+
+Das Raster erzeugt alle Kombinationen; Varianten überschreiben einzelne Einträge der
+Konfiguration. Die unveränderte Konfiguration läuft immer als Variante "Basis" mit.
+Ergebnis: Szenarien_<Zeitstempel>.xlsx mit einer Zeile pro Variante.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from batch import zusammenfuehren
+from bewertung import komponenten_berechnen, lastverteilung, statischer_score
+from zuteilung_engines import ENGINES, ZuteilungsZustand
+
+# Abschnitte der Konfiguration, die eine Variante ändern darf
+GEWICHTS_ABSCHNITTE = ('scoring', 'fahrzeit_grenzen')
+
+VERGLEICH_SPALTEN = ['Zugeteilt', 'Nicht_zugeteilt', 'Soll_Abweichung', 'Unterlast_Lehrkraefte',
+                     'Klassen_Treffer_Anteil', 'Fahrzeit_Mittel_min', 'Fahrzeit_Max_min',
+                     'Einrichtungen_pro_Lehrkraft', 'Dauer_s']
+
+# Basis-Matrizen pro Worker-Prozess (Memory-Maps, siehe _worker_starten)
+_BASIS: Dict[str, np.ndarray] = {}
+
+
+def varianten_laden(pfad: str, config: Dict) -> List[Dict]:
+    """
+    Liest die Szenario-Datei. Returns: Varianten mit name, parameter (geänderte Einträge)
+    und den vollständigen Abschnitten scoring/fahrzeit_grenzen; "Basis" zuerst
+    Raises: ValueError bei unbekannten Abschnitten oder Schlüsseln
+    """
+    with open(pfad, 'r', encoding='utf-8') as f:
+        szenarien = json.load(f)
+
+    aenderungen = [("Basis", {})]
+    raster = szenarien.get('raster', {})
+    for werte in itertools.product(*raster.values()):
+        parameter = dict(zip(raster, werte))
+        name = ", ".join(f"{schluessel.split('.', 1)[-1]}={wert}" for schluessel, wert in parameter.items())
+        aenderungen.append((name, parameter))
+    for nr, variante in enumerate(szenarien.get('varianten', []), 1):
+        parameter = {f"{abschnitt}.{schluessel}": wert
+                     for abschnitt in GEWICHTS_ABSCHNITTE
+                     for schluessel, wert in variante.get(abschnitt, {}).items()}
+        unbekannt = set(variante) - set(GEWICHTS_ABSCHNITTE) - {'name'}
+        if unbekannt:
+            raise ValueError(f"Variante {nr}: nur {', '.join(GEWICHTS_ABSCHNITTE)} änderbar, nicht {sorted(unbekannt)}")
+        aenderungen.append((variante.get('name', f"Variante {nr}"), parameter))
+
+    varianten = []
+    for name, parameter in aenderungen:
+        ueberschreiben: Dict[str, Dict] = {}
+        for schluessel, wert in parameter.items():
+            abschnitt, _, eintrag = schluessel.partition('.')
+            if abschnitt not in GEWICHTS_ABSCHNITTE or eintrag not in config.get(abschnitt, {}):
+                raise ValueError(f"Unbekannter Parameter: {schluessel} "
+                                 f"(erlaubt: Einträge aus {', '.join(GEWICHTS_ABSCHNITTE)})")
+            ueberschreiben.setdefault(abschnitt, {})[eintrag] = wert
+        gewichte = zusammenfuehren({abschnitt: config[abschnitt] for abschnitt in GEWICHTS_ABSCHNITTE},
+                                   ueberschreiben)
+        varianten.append({'name': name, 'parameter': parameter, **gewichte})
+    return varianten
+
+
+def basis_ablegen(basis: Dict[str, np.ndarray], verzeichnis: str) -> Dict[str, str]:
+    """Speichert die Basis-Matrizen als .npy (Returns: Name → Pfad)"""
+    pfade = {}
+    for name, matrix in basis.items():
+        pfade[name] = os.path.join(verzeichnis, f"{name}.npy")
+        np.save(pfade[name], matrix)
+    return pfade
+
+
+def _worker_starten(pfade: Dict[str, str]):
+    """Pool-Initializer: Basis-Matrizen schreibgeschützt einblenden (keine Kopie pro Variante)"""
+    _BASIS.update({name: np.load(pfad, mmap_mode='r') for name, pfad in pfade.items()})
+
+
+def variante_bewerten(variante: Dict, engine: str = 'greedy') -> Dict:
+    """Führt die Zuteilung für eine Variante aus und fasst sie zusammen (läuft im Worker)"""
+    start = time.perf_counter()
+    basis = _BASIS
+    scoring, grenzen = variante['scoring'], variante['fahrzeit_grenzen']
+    komponenten = komponenten_berechnen(basis['klassen_match'], basis['region_match'], basis['fahrzeit_min'],
+                                        scoring, grenzen)
+    soll = basis['soll'].tolist()
+    zustand = ZuteilungsZustand(
+        static_matrix=statischer_score(komponenten),
+        einrichtung_ids=basis['einrichtung_ids'],
+        soll=soll,
+        gruppen=basis['gruppen'].tolist(),
+        load_score=lambda ist, soll_anzahl: lastverteilung(ist, soll_anzahl, scoring['abweichung_soll_malus']),
+        konsistenz_bonus=scoring['einrichtung_konsistenz'],
+    )
+    zuteilung_engine = ENGINES[engine](zustand)
+    paare = []
+    while True:
+        match = zuteilung_engine.naechstes_match()
+        if match is None:
+            break
+        zuteilung_engine.zuteilen(*match)
+        paare.append(match)
+
+    return {'Variante': variante['name'], **variante['parameter'],
+            **vergleichswerte(zustand, paare, basis, time.perf_counter() - start)}
+
+
+def vergleichswerte(zustand: ZuteilungsZustand, paare: List, basis: Dict[str, np.ndarray], dauer_s: float) -> Dict:
+    """Kennzahlen einer Zuteilung (Spalten VERGLEICH_SPALTEN)"""
+    n_schueler = zustand.n_schueler
+    s_pos = np.array([s for s, _ in paare], dtype=int)
+    l_pos = np.array([l for _, l in paare], dtype=int)
+    fahrzeiten = np.asarray(basis['fahrzeit_min'][s_pos, l_pos], dtype=float)
+    gueltig = fahrzeiten[~np.isnan(fahrzeiten)]
+
+    # Soll-Abweichung pro Lehrkraft (Gruppen gleichen Namens zählen gemeinsam)
+    soll_abweichung, unterlast, einrichtungen = 0, 0, []
+    for gruppe, spalten in zustand.spalten_pro_gruppe.items():
+        ist, soll = zustand.anzahl[gruppe], zustand.soll[spalten[0]]
+        soll_abweichung += abs(ist - soll)
+        unterlast += ist < soll - 1
+        if ist:
+            einrichtungen.append(len(zustand.betreute_einrichtungen[gruppe]))
+
+    return {
+        'Zugeteilt': len(paare),
+        'Nicht_zugeteilt': n_schueler - len(paare),
+        'Soll_Abweichung': int(soll_abweichung),
+        'Unterlast_Lehrkraefte': int(unterlast),
+        'Klassen_Treffer_Anteil': round(float(basis['klassen_match'][s_pos, l_pos].mean()), 3) if paare else None,
+        'Fahrzeit_Mittel_min': round(float(gueltig.mean()), 1) if gueltig.size else None,
+        'Fahrzeit_Max_min': round(float(gueltig.max()), 1) if gueltig.size else None,
+        'Einrichtungen_pro_Lehrkraft': round(float(np.mean(einrichtungen)), 2) if einrichtungen else None,
+        'Dauer_s': round(dauer_s, 2),
+    }
+
+
+def _variante_ausfuehren(auftrag) -> Dict:
+    variante, engine = auftrag
+    return variante_bewerten(variante, engine)
+
+
+def szenarien_ausfuehren(basis: Dict[str, np.ndarray], varianten: List[Dict], engine: str = 'greedy',
+                         worker: int = None) -> List[Dict]:
+    """
+    Bewertet alle Varianten im Prozess-Pool; die Basis liegt dabei einmal als .npy auf
+    der Platte und wird von jedem Worker nur eingeblendet.
+    Returns: Vergleichszeilen in der Reihenfolge der Varianten
+    """
+    worker = max(1, min(worker or os.cpu_count() or 1, len(varianten)))
+    verzeichnis = tempfile.mkdtemp(prefix="szenarien_")
+    try:
+        pfade = basis_ablegen(basis, verzeichnis)
+        # spawn wie im Batch-Betrieb: keine geerbten Threads/SQLite-Verbindungen des Tools
+        kontext = multiprocessing.get_context('spawn')
+        with kontext.Pool(worker, initializer=_worker_starten, initargs=(pfade,)) as pool:
+            zeilen = []
+            for zeile in pool.imap(_variante_ausfuehren, [(variante, engine) for variante in varianten]):
+                zeilen.append(zeile)
+                print(f"   ✓ {zeile['Variante']}: {zeile['Nicht_zugeteilt']} nicht zugeteilt, "
+                      f"Soll-Abweichung {zeile['Soll_Abweichung']}, Fahrzeit Ø {zeile['Fahrzeit_Mittel_min']} min")
+    finally:
+        shutil.rmtree(verzeichnis, ignore_errors=True)
+    return zeilen
+
+
+def vergleich_speichern(zeilen: List[Dict], varianten: List[Dict], ausgabe_verzeichnis: str = None) -> str:
+    """Schreibt die Vergleichstabelle (Sheet "Vergleich") und die Gewichte je Variante"""
+    from tabellen_io import StreamingArbeitsmappe
+
+    parameter = list(dict.fromkeys(schluessel for variante in varianten for schluessel in variante['parameter']))
+    spalten = ['Variante'] + parameter + VERGLEICH_SPALTEN
+    dateiname = f"Szenarien_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    if ausgabe_verzeichnis:
+        os.makedirs(ausgabe_verzeichnis, exist_ok=True)
+        dateiname = os.path.join(ausgabe_verzeichnis, dateiname)
+
+    arbeitsmappe = StreamingArbeitsmappe(dateiname)
+    arbeitsmappe.blatt('Vergleich', spalten, ([zeile.get(spalte) for spalte in spalten] for zeile in zeilen))
+    gewichte = [(variante['name'], abschnitt, schluessel, wert)
+                for variante in varianten
+                for abschnitt in ('scoring', 'fahrzeit_grenzen')
+                for schluessel, wert in variante[abschnitt].items()]
+    arbeitsmappe.blatt('Gewichte', ['Variante', 'Abschnitt', 'Eintrag', 'Wert'], gewichte)
+    arbeitsmappe.speichern()
+    return dateiname
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Score-Gewichte vergleichen (eine Fahrzeit-Matrix für alle Varianten)")
+    parser.add_argument('schueler', help="Schülerinnen-Datei (Excel/CSV/Parquet)")
+    parser.add_argument('lehrkraefte', help="Lehrkräfte-Datei (Excel/CSV/Parquet)")
+    parser.add_argument('szenarien', help="Szenario-Datei (JSON) mit Raster und/oder Varianten")
+    parser.add_argument('--config', default="config.json", help="Basis-Konfiguration (Standard: config.json)")
+    parser.add_argument('--engine', choices=sorted(ENGINES), help="Zuteilungs-Engine (Standard: aus der Konfiguration)")
+    parser.add_argument('--worker', type=int, help="Anzahl paralleler Prozesse (Standard: alle Kerne)")
+    parser.add_argument('--ausgabe', help="Ausgabeverzeichnis (Standard: aktuelles Verzeichnis)")
+    args = parser.parse_args()
+
+    from praktikumszuteilung import PraktikumszuteilungTool, fehlende_spalten
+
+    tool = PraktikumszuteilungTool(args.config)
+    try:
+        varianten = varianten_laden(args.szenarien, tool.config)
+    except (OSError, ValueError) as e:
+        print(f"❌ Szenario-Datei ungültig: {e}")
+        return 2
+    engine = args.engine or tool.config.get('zuteilung', {}).get('engine', 'greedy')
+
+    schueler_df, lehrkraefte_df = tool.load_data(args.schueler, args.lehrkraefte)
+    fehler = fehlende_spalten(schueler_df, lehrkraefte_df)
+    if fehler:
+        for meldung in fehler:
+            print(f"❌ {meldung}")
+        return 2
+
+    start = time.perf_counter()
+    basis = tool.szenario_basis(schueler_df, lehrkraefte_df)
+    print(f"\n🔬 {len(varianten)} Varianten, Engine: {engine} "
+          f"(Fahrzeit-Matrix in {time.perf_counter() - start:.1f} s)")
+    start = time.perf_counter()
+    zeilen = szenarien_ausfuehren(basis, varianten, engine, args.worker)
+    datei = vergleich_speichern(zeilen, varianten, args.ausgabe)
+    print(f"\n💾 Vergleich gespeichert: {datei} ({time.perf_counter() - start:.1f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
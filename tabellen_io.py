@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ein- und Ausgabe großer Tabellen
+Eingaben als Excel (.xlsx, ältere .xls über pandas), CSV oder Parquet. Die Kopfzeile wird vor dem eigentlichen
+Einlesen geprüft, damit fehlende Pflichtspalten auffallen, bevor eine große Datei
+vollständig geladen ist. Die Ausgabe schreibt Arbeitsmappen im Write-only-Modus von
+openpyxl: Zeilen werden direkt in die Datei gestreamt statt als Zellobjekte im
+Speicher gehalten.
+"""
+
+import csv
+import os
+from typing import Dict, Iterable, List, Sequence
+
+import pandas as pd
+
+EXCEL_ENDUNGEN = ('.xlsx', '.xlsm')
+# Altes Excel-Format: kein openpyxl, pandas liest es über xlrd
+XLS_ENDUNGEN = ('.xls',)
+CSV_ENDUNGEN = ('.csv', '.txt')
+PARQUET_ENDUNGEN = ('.parquet', '.pq')
+
+# Spalten mit Postleitzahlen: in CSV als Text lesen, damit führende Nullen erhalten bleiben
+PLZ_SPALTEN = ('PLZ', 'PLZ_Wohnort')
+
+# Kodierungen für CSV in dieser Reihenfolge (Excel speichert "CSV (Trennzeichen-getrennt)" als Windows-1252)
+CSV_KODIERUNGEN = ('utf-8-sig', 'cp1252')
+
+# Excel begrenzt Blattnamen auf 31 Zeichen und verbietet einige Sonderzeichen
+_BLATTNAME_VERBOTEN = str.maketrans({zeichen: '_' for zeichen in '[]:*?/\\'})
+
+
+def _format(pfad: str) -> str:
+    endung = os.path.splitext(pfad)[1].lower()
+    if endung in EXCEL_ENDUNGEN:
+        return 'excel'
+    if endung in XLS_ENDUNGEN:
+        return 'xls'
+    if endung in CSV_ENDUNGEN:
+        return 'csv'
+    if endung in PARQUET_ENDUNGEN:
+        return 'parquet'
+    raise ValueError(f"Nicht unterstütztes Dateiformat: {pfad} (Excel, CSV oder Parquet)")
+
+
+def _kodierung_unbekannt(pfad: str) -> ValueError:
+    return ValueError(f"Kodierung nicht erkannt: {pfad} (erwartet UTF-8 oder Windows-1252)")
+
+
+def _csv_format(pfad: str) -> Dict:
+    """Trennzeichen (Komma/Semikolon) und Kodierung aus der Kopfzeile bestimmen"""
+    for encoding in CSV_KODIERUNGEN:
+        try:
+            with open(pfad, 'r', encoding=encoding, newline='') as f:
+                kopf = f.readline()
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise _kodierung_unbekannt(pfad)
+    try:
+        sep = csv.Sniffer().sniff(kopf, delimiters=',;\t').delimiter
+    except csv.Error:
+        sep = ','
+    return {'sep': sep, 'encoding': encoding}
+
+
+def _csv_lesen(pfad: str, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_csv mit Trennzeichen und Kodierung aus _csv_format. Die Kodierung stammt nur aus
+    dem Dateianfang; stehen Windows-1252-Umlaute erst weiter hinten, wird mit cp1252 wiederholt.
+    """
+    csv_format = _csv_format(pfad)
+    for encoding in dict.fromkeys((csv_format['encoding'],) + CSV_KODIERUNGEN[1:]):
+        try:
+            return pd.read_csv(pfad, sep=csv_format['sep'], encoding=encoding, **kwargs)
+        except UnicodeDecodeError:
+            continue
+    raise _kodierung_unbekannt(pfad)
+
+
+def _parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet-Dateien benötigen pyarrow (pip install pyarrow)")
+    return pq
+
+
+def spalten_lesen(pfad: str) -> List[str]:
+    """Liest nur die Kopfzeile (Excel: erstes Blatt, read-only; Parquet: nur das Schema)"""
+    art = _format(pfad)
+    if art == 'excel':
+        from openpyxl import load_workbook
+        arbeitsmappe = load_workbook(pfad, read_only=True, data_only=True)
+        try:
+            kopf = next(arbeitsmappe.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+        finally:
+            arbeitsmappe.close()
+        return [str(spalte) for spalte in kopf if spalte is not None]
+    if art == 'xls':
+        return [str(spalte) for spalte in pd.read_excel(pfad, nrows=0).columns]
+    if art == 'csv':
+        return list(_csv_lesen(pfad, nrows=0).columns)
+    return list(_parquet().read_schema(pfad).names)
+
+
+def tabelle_laden(pfad: str, erforderlich: Sequence[str], bezeichnung: str) -> pd.DataFrame:
+    """
+    Lädt eine Eingabetabelle, nachdem die Pflichtspalten in der Kopfzeile geprüft wurden.
+    Raises: ValueError mit den fehlenden Spalten (Meldung wie fehlende_spalten)
+    """
+    vorhanden = spalten_lesen(pfad)
+    fehlend = [s for s in erforderlich if s not in vorhanden]
+    if fehlend:
+        raise ValueError(f"Fehlende Spalten in {bezeichnung}: {fehlend}")
+    art = _format(pfad)
+    if art in ('excel', 'xls'):
+        # pandas liest xlsx über openpyxl im read-only-Modus (zeilenweise), xls über xlrd
+        return pd.read_excel(pfad)
+    if art == 'csv':
+        return _csv_lesen(pfad, dtype={s: str for s in PLZ_SPALTEN})
+    _parquet()
+    return pd.read_parquet(pfad)
+
+
+def _zeilen(df: pd.DataFrame) -> Iterable[tuple]:
+    """Zeilen als Tupel; fehlende Werte (NaN, pd.NA) werden zu leeren Zellen"""
+    werte = df.astype(object).where(df.notna(), None)
+    return werte.itertuples(index=False, name=None)
+
+
+def blattname(name: str, vergeben: set) -> str:
+    """Gültiger, eindeutiger Excel-Blattname (max. 31 Zeichen)"""
+    basis = str(name).translate(_BLATTNAME_VERBOTEN).strip("'")[:31] or "Blatt"
+    kandidat, nr = basis, 2
+    while kandidat.lower() in vergeben:
+        zusatz = f" ({nr})"
+        kandidat, nr = basis[:31 - len(zusatz)] + zusatz, nr + 1
+    vergeben.add(kandidat.lower())
+    return kandidat
+
+
+class StreamingArbeitsmappe:
+    """
+    Arbeitsmappe im Write-only-Modus: jedes Blatt wird in einem Zug geschrieben,
+    der Speicherbedarf bleibt unabhängig von der Zeilenzahl konstant.
+    """
+
+    def __init__(self, pfad: str):
+        from openpyxl import Workbook
+        self.pfad = pfad
+        self.arbeitsmappe = Workbook(write_only=True)
+        self.blattnamen: set = set()
+
+    def blatt(self, name: str, spalten: Sequence[str], zeilen: Iterable[Sequence]) -> str:
+        """Schreibt ein Blatt (Kopfzeile fett). Returns: tatsächlicher Blattname"""
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        name = blattname(name, self.blattnamen)
+        blatt = self.arbeitsmappe.create_sheet(name)
+        fett = Font(bold=True)
+        kopf = []
+        for spalte in spalten:
+            zelle = WriteOnlyCell(blatt, value=spalte)
+            zelle.font = fett
+            kopf.append(zelle)
+        blatt.append(kopf)
+        for zeile in zeilen:
+            blatt.append(zeile)
+        return name
+
+    def dataframe(self, name: str, df: pd.DataFrame) -> str:
+        return self.blatt(name, list(df.columns), _zeilen(df))
+
+    def speichern(self):
+        self.arbeitsmappe.save(self.pfad)
+
+
+def lehrkraft_statistik(results_df: pd.DataFrame) -> List[tuple]:
+    """Anzahl Schülerinnen und Einrichtungen pro Lehrkraft in einem Durchlauf (sortiert)"""
+    anzahl: Dict[str, int] = {}
+    einrichtungen: Dict[str, set] = {}
+    for lehrkraft, einrichtung in zip(results_df['Lehrkraft'], results_df['Einrichtung']):
+        anzahl[lehrkraft] = anzahl.get(lehrkraft, 0) + 1
+        einrichtungen.setdefault(lehrkraft, set()).add(einrichtung)
+    return [(lehrkraft, anzahl[lehrkraft], len(einrichtungen[lehrkraft])) for lehrkraft in sorted(anzahl)]
+
+
+def lehrkraft_gruppen(results_df: pd.DataFrame) -> Dict[str, List[int]]:
+    """Zeilenpositionen pro Lehrkraft, in der Reihenfolge des ersten Auftretens"""
+    gruppen: Dict[str, List[int]] = {}
+    for pos, lehrkraft in enumerate(results_df['Lehrkraft']):
+        gruppen.setdefault(lehrkraft, []).append(pos)
+    return gruppen
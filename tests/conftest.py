@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Gemeinsame Fixtures: Module liegen flach im Repository-Verzeichnis, Konfiguration
+wie im Benchmark (Cache im Speicher, keine externen Dateien, keine Netzwerk-Anfragen).
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+from benchmark import _benchmark_config  # noqa: E402
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Konfiguration aus config.json mit In-Memory-Cache (als Dict, pro Test anpassbar)"""
+    with open(_benchmark_config(os.path.join(REPO, "config.json"), str(tmp_path), "greedy"),
+              'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Adress-Normalisierung: Schreibweisen von Straße und Hausnummer, Zusammenführen von
+Tippvarianten nur bei gleicher Einrichtung und Hausnummer, sowie der Bericht
+(Sheet "Adressen").
+"""
+
+import pytest
+
+from adressen import BERICHT_SPALTEN, adress_schluessel, adressen_vereinheitlichen, strasse_normalisieren
+
+
+@pytest.mark.parametrize("eingabe, erwartet", [
+    ("Hauptstr. 12", "Hauptstraße 12"),
+    ("Hauptstrasse  12 a", "Hauptstraße 12a"),
+    ("Hauptstr.12", "Hauptstraße 12"),
+    ("Am Markt Nr. 3", "Am Markt 3"),
+    ("Kieler Str. 12 - 14", "Kieler Straße 12-14"),
+    ("Strandweg 5", "Strandweg 5"),
+])
+def test_strasse_normalisieren(eingabe, erwartet):
+    assert strasse_normalisieren(eingabe) == erwartet
+
+
+def test_adress_schluessel():
+    assert adress_schluessel("Hauptstraße 12a") == ("hauptstrasse", "12a")
+    assert adress_schluessel("Kieler Straße 12-14") == ("kielerstrasse", "12-14")
+    assert adress_schluessel("Am Markt") == ("ammarkt", "")
+
+
+def _vereinheitlichen(zeilen, schwelle=0.85):
+    """zeilen: (Straße, PLZ, Einrichtung); Ort immer Rendsburg"""
+    strassen, plz, einrichtungen = zip(*zeilen)
+    return adressen_vereinheitlichen(strassen, plz, ["Rendsburg"] * len(zeilen), einrichtungen, schwelle)
+
+
+def test_tippvariante_bei_gleicher_einrichtung():
+    adressen, bericht = _vereinheitlichen([
+        ("Hauptstr. 12", "24768", "Kita Sonnenschein"),
+        ("Hauptstarße 12", "24768", "Kita Sonnenschein"),
+        ("Hauptstraße 12", "24768", "Kita Sonnenschein"),
+    ])
+    assert adressen == ["Hauptstraße 12, 24768 Rendsburg"] * 3
+    assert list(bericht.columns) == BERICHT_SPALTEN
+    assert bericht['Adresse'].tolist() == ["Hauptstr. 12, 24768 Rendsburg", "Hauptstarße 12, 24768 Rendsburg"]
+    assert (bericht['Vereinheitlicht'] == "Hauptstraße 12, 24768 Rendsburg").all()
+    zeile = bericht.set_index('Adresse').loc["Hauptstarße 12, 24768 Rendsburg"]
+    assert (zeile['PLZ'], zeile['Schülerinnen'], zeile['Einrichtungen']) == ("24768", 1, "Kita Sonnenschein")
+    assert 0.85 <= zeile['Ähnlichkeit'] < 1
+
+
+def test_aehnlich_benannte_einrichtung_reicht():
+    adressen, _ = _vereinheitlichen([
+        ("Hauptstraße 12", "24768", "Kita Sonnenschein"),
+        ("Hauptstarße 12", "24768", "KiTa Sonnenschein e.V."),
+    ])
+    assert len(set(adressen)) == 1
+
+
+def test_tippvariante_ohne_gleiche_einrichtung_bleibt_getrennt():
+    adressen, bericht = _vereinheitlichen([
+        ("Hauptstraße 12", "24768", "Kita Sonnenschein"),
+        ("Hauptstarße 12", "24768", "Hort Waldweg"),
+    ])
+    assert adressen == ["Hauptstraße 12, 24768 Rendsburg", "Hauptstarße 12, 24768 Rendsburg"]
+    assert bericht.empty and list(bericht.columns) == BERICHT_SPALTEN
+
+
+def test_kirchstrasse_und_kirchenstrasse_bleiben_getrennt():
+    adressen, bericht = _vereinheitlichen([
+        ("Kirchstraße 1", "24768", "Kita Arche"),
+        ("Kirchenstraße 1", "24768", "Kita Regenbogen"),
+    ])
+    assert adressen == ["Kirchstraße 1, 24768 Rendsburg", "Kirchenstraße 1, 24768 Rendsburg"]
+    assert bericht.empty
+
+
+def test_verschiedene_hausnummern_nie_zusammengefuehrt():
+    adressen, bericht = _vereinheitlichen([
+        ("Hauptstraße 12", "24768", "Kita Sonnenschein"),
+        ("Hauptstraße 14", "24768", "Kita Sonnenschein"),
+        ("Hauptstarße 12a", "24768", "Kita Sonnenschein"),
+        ("Hauptstraße", "24768", "Kita Sonnenschein"),
+    ])
+    assert len(set(adressen)) == 4
+    assert bericht.empty
+
+
+def test_verschiedene_plz_nie_zusammengefuehrt():
+    adressen, _ = _vereinheitlichen([
+        ("Hauptstraße 12", "24768", "Kita Sonnenschein"),
+        ("Hauptstarße 12", "24782", "Kita Sonnenschein"),
+    ])
+    assert len(set(adressen)) == 2
+
+
+def test_haeufigste_schreibweise_gewinnt():
+    adressen, bericht = _vereinheitlichen([
+        ("Hauptstarße 12", "24768", "Kita Sonnenschein"),
+        ("Hauptstr. 12", "24768", "Kita Sonnenschein"),
+        ("Hauptstr 12", "24768", "Kita Sonnenschein"),
+    ])
+    # "Hauptstr. 12" und "Hauptstr 12" normalisieren beide zu "Hauptstraße 12" (2 Zeilen)
+    assert adressen == ["Hauptstraße 12, 24768 Rendsburg"] * 3
+    quoten = dict(zip(bericht['Adresse'], bericht['Ähnlichkeit']))
+    assert quoten["Hauptstr. 12, 24768 Rendsburg"] == quoten["Hauptstr 12, 24768 Rendsburg"] == 1.0
+    assert 0.85 <= quoten["Hauptstarße 12, 24768 Rendsburg"] < 1
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+routing.bei_bedarf: Wohnort → Einrichtung wird erst angefragt, wenn die Engine das Paar
+wählen würde - gleiches Ergebnis wie mit allen Fahrzeiten, aber weniger Anfragen
+(Fake-Backends aus benchmark.py, ohne Netzwerk).
+"""
+
+import pytest
+
+from benchmark import FakeGeocoder, FakeRouting
+from beispiel_schuelerinnen import synthetische_kohorte
+from praktikumszuteilung import SCORE_KOMPONENTEN, PraktikumszuteilungTool
+
+VERGLICHEN = ['Schülerin', 'Lehrkraft', 'Score', 'Begründung'] + SCORE_KOMPONENTEN
+
+
+class EinzelRouting(FakeRouting):
+    """FakeRouting als ORS ohne Matrix-Prefetch (bei_bedarf gilt nur dort); zählt die Anfragen"""
+
+    name = "ors"
+
+    def __init__(self):
+        super().__init__()
+        self.anfragen = 0
+
+    def fahrzeit(self, start, ende):
+        self.anfragen += 1
+        return super().fahrzeit(start, ende)
+
+
+def _zuteilung(config, schueler_df, lehrkraefte_df, engine):
+    routing = EinzelRouting()
+    tool = PraktikumszuteilungTool(config=config, geocoder=FakeGeocoder(), routing_backend=routing)
+    ergebnis = tool.assign_praktika(schueler_df, lehrkraefte_df, engine=engine)
+    ergebnis['Begründung'] = tool.begruendungen(ergebnis)
+    return tool, routing, ergebnis[VERGLICHEN].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("engine", ["greedy", "heap"])
+@pytest.mark.parametrize("n_schueler, n_lehrkraefte, seed", [(30, 5, 3), (80, 6, 4), (120, 15, 2), (200, 20, 1)])
+def test_bei_bedarf_entspricht_voller_matrix(config, engine, n_schueler, n_lehrkraefte, seed):
+    schueler_df, lehrkraefte_df = synthetische_kohorte(n_schueler, n_lehrkraefte, seed)
+    config['routing']['matrix_prefetch'] = False
+    _, voll_routing, voll = _zuteilung(config, schueler_df, lehrkraefte_df, engine)
+
+    config['routing']['bei_bedarf'] = True
+    tool, routing, bedarf = _zuteilung(config, schueler_df, lehrkraefte_df, engine)
+
+    assert tool.bei_bedarf
+    assert tool.metriken.zaehler['bedarf_offen'] > 0, "keine offenen Paare"
+    assert routing.anfragen < voll_routing.anfragen
+    assert bedarf.equals(voll)
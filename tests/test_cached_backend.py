@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Route-Cache vor einem Backend (CachedBackend): Zähler bei parallelen Abrufen,
+Raster-Schlüssel (routing.raster_m), Wiederverwendung der Gegenrichtung
+(routing.symmetrisch, Stichprobe) und Fehlerbericht der Symmetrie-Annahme.
+"""
+
+import sys
+import threading
+
+import pytest
+
+from benchmark import FakeRouting
+from geo_cache import QUELLE_LUFTLINIE, PersistentCache
+from routing_backends import METER_PRO_GRAD, CachedBackend, RoutingBackend, rasterpunkt
+
+A, B, C = (54.30, 9.60), (54.30, 9.80), (54.35, 9.70)
+
+
+class GerichtetesRouting(RoutingBackend):
+    """Feste Fahrzeiten je Richtung; zählt die Anfragen"""
+
+    name = "test"
+    quelle = "test"
+
+    def __init__(self, zeiten):
+        self.zeiten = zeiten
+        self.anfragen = []
+
+    def fahrzeit(self, start, ende):
+        self.anfragen.append((start, ende))
+        return self.zeiten[(start, ende)]
+
+
+@pytest.fixture
+def route_cache():
+    cache = PersistentCache(":memory:", ttl_tage=None, max_eintraege=None)
+    yield cache.route
+    cache.close()
+
+
+def test_zaehler_aus_mehreren_threads(route_cache):
+    backend = CachedBackend(FakeRouting(), route_cache)
+    orte = [(54.0 + i / 100, 9.5 + i / 100) for i in range(5)]
+    n_threads, n_runden = 8, 300
+
+    def abrufen():
+        for runde in range(n_runden):
+            backend.fahrzeit(orte[runde % 5], orte[(runde + 1) % 5])
+            backend.matrix(orte[:2], orte[2:])
+
+    # Häufige Thread-Wechsel, damit ungeschützte Zähler Inkremente verlieren würden
+    intervall = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=abrufen) for _ in range(n_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(intervall)
+
+    assert backend.treffer + backend.fehlschlaege == n_threads * n_runden
+    assert backend.aufrufe_einzeln == backend.fehlschlaege
+    assert backend.aufrufe_matrix == n_threads * n_runden
+
+
+def test_raster_nahe_orte_teilen_einen_eintrag(route_cache):
+    backend = CachedBackend(FakeRouting(), route_cache, raster_m=25)
+    mitte = rasterpunkt((54.3000, 9.6000), 25)
+    nah = (mitte[0] + 5 / METER_PRO_GRAD, mitte[1] - 5 / METER_PRO_GRAD)  # ca. 5 m entfernt
+    weit = (mitte[0] + 100 / METER_PRO_GRAD, mitte[1])                    # ca. 100 m entfernt
+
+    assert backend.schluessel(mitte, B) == backend.schluessel(nah, B)
+    assert backend.schluessel(weit, B) != backend.schluessel(mitte, B)
+    assert backend.orte([mitte, nah, weit, mitte]) == [mitte, weit]
+
+    dauer = backend.fahrzeit(mitte, B)
+    assert backend.fahrzeit(nah, B) == dauer
+    assert (backend.treffer, backend.aufrufe_einzeln) == (1, 1)
+    backend.fahrzeit(weit, B)
+    assert backend.aufrufe_einzeln == 2
+
+
+def test_ohne_raster_exakte_schluessel(route_cache):
+    backend = CachedBackend(FakeRouting(), route_cache)
+    nah = (A[0] + 5 / METER_PRO_GRAD, A[1])
+    assert backend.schluessel(A, B) != backend.schluessel(nah, B)
+    assert backend.zelle(A) == A
+
+
+def test_gegenrichtung_nur_wenn_symmetrisch(route_cache):
+    routing = GerichtetesRouting({(A, B): 10.0, (B, A): 12.0})
+    backend = CachedBackend(routing, route_cache)
+    backend.fahrzeit(A, B)
+    assert not backend.bekannt(B, A)
+    assert backend.fahrzeit(B, A) == 12.0
+    assert routing.anfragen == [(A, B), (B, A)]
+    assert backend.symmetrie_treffer == 0
+
+
+def test_symmetrisch_verwendet_gegenrichtung(route_cache):
+    routing = GerichtetesRouting({(A, B): 10.0, (B, A): 12.0})
+    backend = CachedBackend(routing, route_cache, symmetrisch=True, stichprobe=0.0)
+    backend.fahrzeit(A, B)
+    assert backend.bekannt(B, A)
+    assert backend.fahrzeit(B, A) == 10.0
+    assert routing.anfragen == [(A, B)]
+    assert backend.symmetrie_treffer == 1
+    # Nur im Speicher wiederverwendet, nicht unter der Gegenrichtung gespeichert
+    assert backend.schluessel(B, A) not in route_cache
+
+
+def test_stichprobe_wird_trotzdem_abgefragt(route_cache):
+    routing = GerichtetesRouting({(A, B): 10.0, (B, A): 12.0})
+    backend = CachedBackend(routing, route_cache, symmetrisch=True, stichprobe=1.0)
+    backend.fahrzeit(A, B)
+    assert not backend.bekannt(B, A)
+    assert backend.fahrzeit(B, A) == 12.0
+    assert routing.anfragen == [(A, B), (B, A)]
+
+
+def test_symmetrie_fehler(route_cache):
+    routing = GerichtetesRouting({(A, B): 10.0, (B, A): 12.0, (A, C): 8.0, (C, A): 8.0})
+    backend = CachedBackend(routing, route_cache, symmetrisch=True, stichprobe=1.0)
+    assert backend.symmetrie_fehler() == {'vergleiche': 0, 'mittlere_abweichung_min': None,
+                                          'max_abweichung_min': None, 'mittlere_abweichung_rel': None}
+    for start, ende in [(A, B), (B, A), (A, C), (C, A)]:
+        backend.fahrzeit(start, ende)
+    # Schätzungen zählen nicht als Vergleich
+    backend.speichern(B, C, 30.0, QUELLE_LUFTLINIE)
+    backend.speichern(C, B, 31.0)
+
+    assert backend.symmetrie_vergleiche == [(10.0, 12.0), (8.0, 8.0)]
+    assert backend.symmetrie_fehler() == {'vergleiche': 2, 'mittlere_abweichung_min': 1.0,
+                                          'max_abweichung_min': 2.0, 'mittlere_abweichung_rel': 0.0833}
+    assert backend.symmetrie_fehler(ab=1)['vergleiche'] == 1
+    assert backend.symmetrie_fehler(ab=1)['max_abweichung_min'] == 0.0
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Zuteilungs-Engines: Greedy (inkrementelle Score-Matrix) und Heap (Lazy Greedy) liefern
+dieselbe Zuteilung auf synthetischen Kohorten (Fake-Backends aus benchmark.py, ohne
+Netzwerk); MILP und lokale Suche bewerten Schülerinnen ohne Einrichtung wie zielwert.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from benchmark import FakeGeocoder, FakeRouting
+from beispiel_schuelerinnen import synthetische_kohorte
+from bewertung import lastverteilung
+from praktikumszuteilung import SCORE_KOMPONENTEN, PraktikumszuteilungTool
+from zuteilung_engines import ZuteilungsZustand, lokale_suche, optimiere_milp, zielwert
+
+VERGLICHEN = ['Schülerin', 'Lehrkraft', 'Score', 'Begründung'] + SCORE_KOMPONENTEN
+
+
+@pytest.mark.parametrize("n_schueler, n_lehrkraefte", [(10, 5), (60, 6), (120, 9), (200, 20)])
+def test_heap_entspricht_greedy(config, n_schueler, n_lehrkraefte):
+    schueler_df, lehrkraefte_df = synthetische_kohorte(n_schueler, n_lehrkraefte, 1)
+    tool = PraktikumszuteilungTool(config=config, geocoder=FakeGeocoder(), routing_backend=FakeRouting())
+
+    ergebnisse = {}
+    for engine in ("greedy", "heap"):
+        ergebnis = tool.assign_praktika(schueler_df, lehrkraefte_df, engine=engine)
+        ergebnis['Begründung'] = tool.begruendungen(ergebnis)
+        ergebnisse[engine] = ergebnis[VERGLICHEN].reset_index(drop=True)
+
+    assert len(ergebnisse['greedy']) == n_schueler
+    assert ergebnisse['heap'].equals(ergebnisse['greedy'])
+
+
+def _kleiner_zustand(seed: int) -> ZuteilungsZustand:
+    """6 Schülerinnen, 2 Lehrkräfte (Soll 2, also je höchstens 3); -1 = leere Einrichtung (pd.factorize)"""
+    rnd = np.random.default_rng(seed)
+    static = rnd.integers(0, 60, size=(6, 2)).astype(float)
+    return ZuteilungsZustand(static, np.array([0, -1, 1, -1, 0, 1]), [2, 2], [0, 1],
+                             lambda ist, soll: lastverteilung(ist, soll, 20), 30)
+
+
+def _bester_zielwert(zustand: ZuteilungsZustand) -> float:
+    """Vollständige Suche über alle Zuteilungen innerhalb von Soll +1"""
+    werte = []
+    for lehrkraefte in itertools.product(range(zustand.n_lehrkraefte), repeat=zustand.n_schueler):
+        if all(lehrkraefte.count(l_pos) <= soll + 1 for l_pos, soll in enumerate(zustand.soll)):
+            werte.append(zielwert(zustand, list(enumerate(lehrkraefte))))
+    return max(werte)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_milp_mit_leerer_einrichtung_ist_optimal(seed):
+    pytest.importorskip("scipy")
+    zustand = _kleiner_zustand(seed)
+    start = [(s_pos, s_pos % 2) for s_pos in range(zustand.n_schueler)]
+    paare, _ = optimiere_milp(zustand, start, zeitlimit_s=10)
+    assert zielwert(zustand, paare) == pytest.approx(_bester_zielwert(zustand))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lokale_suche_mit_leerer_einrichtung(seed):
+    zustand = _kleiner_zustand(seed)
+    start = [(s_pos, s_pos % 2) for s_pos in range(zustand.n_schueler)]
+    paare, bericht = lokale_suche(zustand, start)
+    assert bericht['zielwert'] == pytest.approx(zielwert(zustand, paare))
+    assert bericht['verbesserung'] == pytest.approx(bericht['zielwert'] - zielwert(zustand, start))
+    assert bericht['zielwert'] <= _bester_zielwert(zustand) + 1e-9
+
+
+def _vorbelegter_zustand(seed: int) -> ZuteilungsZustand:
+    """Wie _kleiner_zustand, Lehrkraft 0 betreut bereits eine Schülerin einer weiteren Einrichtung (Reparatur-Modus)"""
+    zustand = _kleiner_zustand(seed)
+    zustand.vorbelegen(0, 2)
+    return zustand
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_zielwert_zaehlt_vorbelegung(seed):
+    zustand = _vorbelegter_zustand(seed)
+    paare = [(s_pos, s_pos % 2) for s_pos in range(zustand.n_schueler)]
+    # Summe der Scores, wie eine Engine sie beim schrittweisen Zuteilen sieht
+    schrittweise, kopie = 0.0, zustand.kopie()
+    for s_pos, l_pos in paare:
+        schrittweise += kopie.score(s_pos, l_pos)
+        kopie.zuteilen(s_pos, l_pos)
+    assert zielwert(zustand, paare) == pytest.approx(schrittweise)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lokale_suche_mit_vorbelegung(seed):
+    zustand = _vorbelegter_zustand(seed)
+    start = [(0, 0), (1, 1), (2, 0), (3, 1), (4, 1)]  # Lehrkraft 0 mit Vorbelegung bei Soll +1
+    paare, bericht = lokale_suche(zustand, start)
+    assert bericht['start_zielwert'] == pytest.approx(zielwert(zustand, start))
+    assert bericht['zielwert'] == pytest.approx(zielwert(zustand, paare))
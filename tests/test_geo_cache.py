@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Persistenter Geo-Cache (SQLite-Datei in tmp_path): TTL, LRU-Verdrängung, Herkunft je
+Eintrag, Nachladen aus anderen Prozessen und Neuabfrage von Fallback-Einträgen.
+Die Uhr von geo_cache wird durch eine Fake-Uhr ersetzt.
+"""
+
+import types
+
+import pytest
+
+import geo_cache
+from benchmark import FakeGeocoder, FakeRouting
+from geo_cache import QUELLE_LUFTLINIE, QUELLE_NOMINATIM, QUELLE_ORS, QUELLE_PLZ_FALLBACK, PersistentCache
+from praktikumszuteilung import PraktikumszuteilungTool
+
+TAG = 86400
+
+
+@pytest.fixture
+def uhr(monkeypatch):
+    """Fake-Uhr: uhr.jetzt setzen oder uhr.weiter(sekunden)"""
+    uhr = types.SimpleNamespace(jetzt=1_000_000.0)
+    uhr.weiter = lambda sekunden=1.0: setattr(uhr, 'jetzt', uhr.jetzt + sekunden)
+    monkeypatch.setattr(geo_cache, 'time', types.SimpleNamespace(time=lambda: uhr.jetzt))
+    return uhr
+
+
+@pytest.fixture
+def pfad(tmp_path):
+    return str(tmp_path / "cache" / "geo_cache.sqlite")
+
+
+def test_ttl_entfernt_abgelaufene_eintraege(pfad, uhr):
+    cache = PersistentCache(pfad, ttl_tage=10)
+    cache.geocode.set("alt", (54.3, 9.7), QUELLE_NOMINATIM)
+    uhr.weiter(5 * TAG)
+    cache.geocode.set("neu", (54.4, 9.8), QUELLE_NOMINATIM)
+    cache.close()
+
+    uhr.weiter(6 * TAG)  # "alt" ist 11 Tage alt, "neu" 6 Tage
+    cache = PersistentCache(pfad, ttl_tage=10)
+    assert "alt" not in cache.geocode
+    assert cache.geocode["neu"] == (54.4, 9.8)
+    assert cache.statistik()['geocode'] == {QUELLE_NOMINATIM: 1}
+    cache.close()
+
+
+def test_ohne_ttl_bleibt_alles(pfad, uhr):
+    cache = PersistentCache(pfad, ttl_tage=None)
+    cache.route.set("a", 12.5, QUELLE_ORS)
+    cache.close()
+    uhr.weiter(1000 * TAG)
+    assert PersistentCache(pfad, ttl_tage=None).route["a"] == 12.5
+
+
+def test_lru_verdraengt_laengsten_nicht_genutzten(pfad, uhr):
+    cache = PersistentCache(pfad, max_eintraege=3)
+    for key in ("a", "b", "c"):
+        cache.route.set(key, 1.0, QUELLE_ORS)
+        uhr.weiter()
+    assert cache.route["a"] == 1.0  # Zugriff: "a" ist jetzt jünger als "b"
+    uhr.weiter()
+    cache.route.set("d", 1.0, QUELLE_ORS)
+
+    assert sorted(cache.route) == ["a", "c", "d"]
+    cache.close()
+    assert sorted(PersistentCache(pfad, max_eintraege=3).route) == ["a", "c", "d"]
+
+
+def test_herkunft_und_meta(pfad, uhr):
+    cache = PersistentCache(pfad)
+    cache.geocode.set("Hauptstraße 1, 24768 Rendsburg", (54.30, 9.66), QUELLE_NOMINATIM, {'plz': "24768"})
+    cache.geocode.set("Dorfweg 3, 24796 Bovenau", (54.33, 9.83), QUELLE_PLZ_FALLBACK, {'plz': "24796"})
+    cache.route.set("r1", 17.0, QUELLE_LUFTLINIE, {'start': (54.3, 9.6), 'ende': (54.3, 9.8)})
+    cache.close()
+
+    cache = PersistentCache(pfad)
+    # Koordinaten kommen als Tupel zurück (JSON kennt nur Listen)
+    assert cache.geocode["Dorfweg 3, 24796 Bovenau"] == (54.33, 9.83)
+    assert cache.geocode.quelle("Hauptstraße 1, 24768 Rendsburg") == QUELLE_NOMINATIM
+    assert cache.geocode.quelle("Dorfweg 3, 24796 Bovenau") == QUELLE_PLZ_FALLBACK
+    assert cache.geocode.quelle("unbekannt") is None
+    assert cache.geocode.fallback_eintraege() == [("Dorfweg 3, 24796 Bovenau", {'plz': "24796"})]
+    assert cache.route.fallback_eintraege() == [("r1", {'start': [54.3, 9.6], 'ende': [54.3, 9.8]})]
+    assert cache.geocode.eintraege(QUELLE_NOMINATIM) == [
+        ("Hauptstraße 1, 24768 Rendsburg", (54.30, 9.66), {'plz': "24768"})]
+    assert cache.statistik() == {'geocode': {QUELLE_NOMINATIM: 1, QUELLE_PLZ_FALLBACK: 1},
+                                 'route': {QUELLE_LUFTLINIE: 1}}
+
+    del cache.geocode["Dorfweg 3, 24796 Bovenau"]
+    cache.close()
+    assert "Dorfweg 3, 24796 Bovenau" not in PersistentCache(pfad).geocode
+
+
+def test_nachladen_uebernimmt_eintraege_anderer_prozesse(pfad, uhr):
+    erster = PersistentCache(pfad)
+    erster.route.set("bekannt", 5.0, QUELLE_ORS)
+    uhr.weiter()
+    zweiter = PersistentCache(pfad)
+    uhr.weiter()
+    zweiter.route.set("neu", 7.0, QUELLE_ORS)
+    zweiter.route.set("bekannt", 6.0, QUELLE_ORS)
+
+    assert "neu" not in erster.route
+    assert erster.nachladen() == 1  # "bekannt" war schon da und wird nur aktualisiert
+    assert erster.route["neu"] == 7.0 and erster.route["bekannt"] == 6.0
+    assert erster.nachladen() == 0
+    erster.close()
+    zweiter.close()
+
+
+def test_fallbacks_aktualisieren(config, pfad):
+    config['cache'] = {'pfad': pfad, 'ttl_tage': None, 'max_eintraege': None}
+    tool = PraktikumszuteilungTool(config=config, geocoder=FakeGeocoder(), routing_backend=FakeRouting())
+    exakt = "Hauptstraße 1, 24768 Rendsburg"
+    geschaetzt = "Dorfweg 3, 24796 Bovenau"
+    tool.geocode_cache.set(exakt, (1.0, 2.0), QUELLE_NOMINATIM, {'adresse': exakt, 'plz': "24768"})
+    tool.geocode_cache.set(geschaetzt, (3.0, 4.0), QUELLE_PLZ_FALLBACK, {'adresse': geschaetzt, 'plz': "24796"})
+    start, ende = (54.30, 9.60), (54.30, 9.80)
+    tool.routing.speichern(start, ende, 99.0, QUELLE_LUFTLINIE)
+
+    assert tool.aktualisiere_fallbacks() == {'geocode': 1, 'route': 1}
+    # Fallback-Einträge neu abgefragt, exakte Einträge unverändert
+    assert tool.geocode_cache[geschaetzt] == FakeGeocoder().geocode(geschaetzt)
+    assert tool.geocode_cache.quelle(geschaetzt) == QUELLE_NOMINATIM
+    assert tool.geocode_cache[exakt] == (1.0, 2.0)
+    key = tool.routing.schluessel(start, ende)
+    assert tool.route_cache[key] == pytest.approx(FakeRouting().fahrzeit(start, ende))
+    assert tool.route_cache.quelle(key) == FakeRouting.quelle
+    assert tool.route_cache.fallback_eintraege() == []
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Lokales Routing auf dem Beispiel-Graphen (daten/beispiel_strassengraph.osm): Autobahn
+nur West → Ost, Rückweg über die Ortsstraße, isolierte Ziele nicht erreichbar.
+"""
+
+import os
+
+import pytest
+
+from routing_backends import GraphBackend
+from strassengraph import Strassengraph
+
+BEISPIEL_GRAPH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "daten", "beispiel_strassengraph.osm")
+WEST, OST, NORD = (54.30, 9.60), (54.30, 9.80), (54.35, 9.70)
+
+
+@pytest.fixture
+def backend():
+    graph = Strassengraph.laden(BEISPIEL_GRAPH)
+    assert graph is not None, f"Beispiel-Graph fehlt: {BEISPIEL_GRAPH}"
+    assert len(graph) == 6
+    return GraphBackend(graph)
+
+
+def test_einbahnstrasse(backend):
+    hin = backend.fahrzeit(WEST, OST)    # über die Autobahn (nur West → Ost)
+    rueck = backend.fahrzeit(OST, WEST)  # zurück über die Ortsstraße
+    assert hin < 12
+    assert rueck > 25
+
+
+def test_matrix_entspricht_einzelabfragen(backend):
+    matrix = backend.matrix([WEST, OST], [NORD, WEST])
+    assert len(matrix) == 2 and all(len(zeile) == 2 for zeile in matrix)
+    for zeile, start in zip(matrix, [WEST, OST]):
+        for wert, ziel in zip(zeile, [NORD, WEST]):
+            assert wert == pytest.approx(backend.fahrzeit(start, ziel))
+
+
+def test_nicht_erreichbar(backend):
+    assert backend.fahrzeit(WEST, (55.0, 9.0)) is None
+
+
+def test_ohne_graph():
+    with pytest.raises(ValueError, match="Straßengraph"):
+        GraphBackend(Strassengraph.laden(os.path.join("gibt", "es", "nicht.osm")))
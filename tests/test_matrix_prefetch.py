@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Matrix-Prefetch gegen einen lokalen Fake-ORS-Server (http.server auf localhost):
+Blockgrößen laut routing.matrix_max_orte/matrix_max_routen, vollständiger Route-Cache
+für _calculate_detour und keine Directions-Anfragen danach.
+"""
+
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from benchmark import FakeGeocoder
+from beispiel_schuelerinnen import synthetische_kohorte
+from fahrzeit_modell import FahrzeitModell
+from praktikumszuteilung import PraktikumszuteilungTool
+
+# openrouteservice.Client hängt das Format an ("/v2/matrix/driving-car/json")
+MATRIX_PFAD = "/v2/matrix/driving-car"
+MAX_ORTE = 12
+MAX_ROUTEN = 40
+
+
+class FakeOrsHandler(BaseHTTPRequestHandler):
+    """Beantwortet /v2/matrix/driving-car mit Luftlinien-Fahrzeiten (Sekunden) und protokolliert alle Anfragen"""
+
+    modell = FahrzeitModell(3.0, 1.2)
+
+    def do_POST(self):
+        koerper = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.anfragen.append((self.path, koerper))
+        if not self.path.startswith(MATRIX_PFAD):
+            self.send_error(404)
+            return
+        orte = [(lat, lon) for lon, lat in koerper['locations']]
+        quellen = [orte[i] for i in koerper['sources']]
+        ziele = [orte[i] for i in koerper['destinations']]
+        antwort = json.dumps({'durations': (self.modell.matrix(quellen, ziele) * 60).tolist()}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(antwort)))
+        self.end_headers()
+        self.wfile.write(antwort)
+
+    def log_message(self, *args):
+        pass
+
+
+def _adressen(schueler_df):
+    return [f"{strasse}, {plz} {ort}" for strasse, plz, ort in
+            zip(schueler_df['Straße'], schueler_df['PLZ'], schueler_df['Ort'])]
+
+
+@pytest.fixture
+def fake_ors():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOrsHandler)
+    server.anfragen = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_prefetch_blockgroessen_und_vollstaendiger_cache(config, fake_ors):
+    config['routing'].update({
+        'backend': "ors", 'ors_base_url': f"http://127.0.0.1:{fake_ors.server_address[1]}",
+        'matrix_prefetch': True, 'matrix_max_orte': MAX_ORTE, 'matrix_max_routen': MAX_ROUTEN,
+    })
+    config['rate_limits'] = {'nominatim_pro_minute': 60000, 'ors_directions_pro_minute': 60000,
+                             'ors_matrix_pro_minute': 60000, 'parallele_anfragen': 4}
+    schueler_df, lehrkraefte_df = synthetische_kohorte(60, 8, 3)
+    tool = PraktikumszuteilungTool(config=config, geocoder=FakeGeocoder())
+    geschaetzt = tool.schaetzung(schueler_df, lehrkraefte_df)['anfragen_matrix']
+
+    ergebnis = tool.assign_praktika(schueler_df, lehrkraefte_df)
+    assert len(ergebnis) == len(schueler_df)
+
+    matrix_anfragen = [k for pfad, k in fake_ors.anfragen if pfad.startswith(MATRIX_PFAD)]
+    assert matrix_anfragen, "Prefetch hat keine Matrix-Anfrage gestellt"
+    assert len(matrix_anfragen) <= geschaetzt
+    for koerper in matrix_anfragen:
+        assert len(koerper['locations']) <= MAX_ORTE
+        assert len(koerper['sources']) * len(koerper['destinations']) <= MAX_ROUTEN
+    assert [pfad for pfad, _ in fake_ors.anfragen if not pfad.startswith(MATRIX_PFAD)] == []
+
+    # Mindestens so viele Blöcke, wie die Strecken bei MAX_ROUTEN pro Anfrage brauchen
+    schule = tool.schule_coords
+    einrichtungen = {tool._geocode(a) for a in dict.fromkeys(_adressen(schueler_df))}
+    wohnorte = {tool._geocode_plz(plz) for plz in lehrkraefte_df['PLZ_Wohnort']}
+    strecken = (1 + len(wohnorte)) * (len(einrichtungen) + 1) + len(einrichtungen)
+    assert len(matrix_anfragen) >= math.ceil(strecken / MAX_ROUTEN)
+
+    # Jede Strecke, die _calculate_detour für ein Paar braucht, liegt im Route-Cache
+    for e in einrichtungen:
+        assert tool.routing.bekannt(schule, e) and tool.routing.bekannt(e, schule)
+        for w in wohnorte:
+            assert tool.routing.bekannt(w, e)
+    for w in wohnorte:
+        assert tool.routing.bekannt(w, schule)
+
+    # Danach keine Directions-Anfragen mehr: alle Umwege kommen aus dem Cache
+    anzahl = len(fake_ors.anfragen)
+    for e in einrichtungen:
+        for w in wohnorte:
+            assert tool._calculate_detour(w, e) < 999
+    assert len(fake_ors.anfragen) == anzahl
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Phase 2 mit inkrementeller Score-Matrix gegen die frühere vollständige Neuberechnung:
+In jedem Schritt werden alle offenen Paare aus _static_scores plus Konsistenz und
+Lastverteilung (_dynamic_score) neu bewertet und das beste gewählt (bei Gleichstand
+erste Schülerin, dann erste Lehrkraft) - wie die Schleife vor der Umstellung.
+"""
+
+import numpy as np
+import pytest
+
+from benchmark import FakeGeocoder, FakeRouting
+from beispiel_schuelerinnen import synthetische_kohorte
+from kohorte import Kohorte
+from laufzeit_metriken import Laufzeitmetriken
+from praktikumszuteilung import PraktikumszuteilungTool
+from zuteilung_engines import GreedyEngine, ZuteilungsZustand
+
+GROESSEN = [(10, 5), (60, 6), (120, 9)]
+
+
+def _vorbereiten(config, n_schueler, n_lehrkraefte):
+    """Tool und Kohorte bis einschließlich Phase 1 (wie assign_praktika)"""
+    schueler_df, lehrkraefte_df = synthetische_kohorte(n_schueler, n_lehrkraefte, 2)
+    tool = PraktikumszuteilungTool(config=config, geocoder=FakeGeocoder(), routing_backend=FakeRouting())
+    tool.metriken = Laufzeitmetriken(tool.rate_limiter, tool.routing)
+    modell = Kohorte(schueler_df, lehrkraefte_df)
+    tool._geocodieren(modell)
+    tool.prefetch_fahrzeiten(modell.lehrkraft_coords, modell.schueler_coords)
+    static_scores, _ = tool._static_scores(modell)
+    return tool, modell, static_scores, schueler_df, lehrkraefte_df
+
+
+def _voll_neu_berechnet(tool, modell, static_scores, offen) -> np.ndarray:
+    """Score aller offenen Paare bei Lehrkräften unter Soll +1, sonst -inf"""
+    scores = np.full(static_scores.shape, -np.inf)
+    for l_pos in range(modell.n_lehrkraefte):
+        if modell.ist_anzahl(l_pos) >= modell.soll[l_pos] + 1:
+            continue
+        for s_pos in np.flatnonzero(offen):
+            konsistenz, last = tool._dynamic_score(modell, s_pos, l_pos)
+            scores[s_pos, l_pos] = static_scores[s_pos, l_pos] + konsistenz + last
+    return scores
+
+
+def _referenz(tool, modell, static_scores):
+    """Zuteilung durch vollständige Neuberechnung in jedem Schritt: [(s_pos, l_pos, score)]"""
+    modell.zuruecksetzen()
+    offen = np.ones(modell.n_schueler, dtype=bool)
+    paare = []
+    while offen.any():
+        scores = _voll_neu_berechnet(tool, modell, static_scores, offen)
+        if not np.isfinite(scores).any():
+            break
+        s_pos, l_pos = np.unravel_index(np.argmax(scores), scores.shape)
+        paare.append((int(s_pos), int(l_pos), float(scores[s_pos, l_pos])))
+        modell.zuteilen(s_pos, l_pos)
+        offen[s_pos] = False
+    modell.zuruecksetzen()
+    return paare
+
+
+@pytest.mark.parametrize("n_schueler, n_lehrkraefte", GROESSEN)
+def test_inkrementell_entspricht_neuberechnung_je_schritt(config, n_schueler, n_lehrkraefte):
+    tool, modell, static_scores, _, _ = _vorbereiten(config, n_schueler, n_lehrkraefte)
+    zustand = ZuteilungsZustand(static_scores, modell.einrichtung_ids, modell.soll, modell.gruppen,
+                                tool._load_score, config['scoring']['einrichtung_konsistenz'])
+    engine = GreedyEngine(zustand)
+
+    for schritt, (s_ref, l_ref, score_ref) in enumerate(_referenz(tool, modell, static_scores)):
+        # Inkrementell gepflegte Spalten = vollständig neu berechnete Matrix
+        voll = _voll_neu_berechnet(tool, modell, static_scores, zustand.offen)
+        inkrementell = np.column_stack([zustand.spalten_scores(l_pos) for l_pos in range(modell.n_lehrkraefte)])
+        np.testing.assert_allclose(inkrementell, voll, err_msg=f"Schritt {schritt}")
+
+        assert engine.naechstes_match() == (s_ref, l_ref), f"Schritt {schritt}"
+        assert zustand.score(s_ref, l_ref) == pytest.approx(score_ref)
+        modell.zuteilen(s_ref, l_ref)
+        engine.zuteilen(s_ref, l_ref)
+    assert engine.naechstes_match() is None
+
+
+@pytest.mark.parametrize("n_schueler, n_lehrkraefte", GROESSEN)
+def test_assign_praktika_entspricht_neuberechnung(config, n_schueler, n_lehrkraefte):
+    tool, modell, static_scores, schueler_df, lehrkraefte_df = _vorbereiten(config, n_schueler, n_lehrkraefte)
+    referenz = _referenz(tool, modell, static_scores)
+
+    ergebnis = tool.assign_praktika(schueler_df, lehrkraefte_df, engine="greedy")
+    assert ergebnis['Schülerin'].tolist() == [modell.schueler_namen[s_pos] for s_pos, _, _ in referenz]
+    assert ergebnis['Lehrkraft'].tolist() == [modell.lehrkraft_namen[l_pos] for _, l_pos, _ in referenz]
+    np.testing.assert_allclose(ergebnis['Score'].to_numpy(dtype=float), [score for _, _, score in referenz])
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+PLZ-Zentroide: Eingabeformen von parse_plz, Nachschlagen in der Tabelle, Import aus
+GeoNames und CSV, sowie der PLZ-Fallback der Geocodierung (Tabelle zuerst, sonst
+Nominatim über den Cache).
+"""
+
+import math
+
+import pytest
+
+from benchmark import FakeGeocoder, FakeRouting
+from geo_cache import QUELLE_NOMINATIM, QUELLE_PLZ_FALLBACK
+from plz_zentroide import PLZZentroide, importieren, parse_plz
+from praktikumszuteilung import PraktikumszuteilungTool
+
+
+@pytest.mark.parametrize("wert, erwartet", [
+    ("24111", "24111"),
+    ("24111 Kiel", "24111"),
+    (" D-24111 Kiel ", "24111"),
+    (24111, "24111"),
+    (24111.0, "24111"),
+    (1067, "01067"),
+    (1067.0, "01067"),
+    ("1067", "01067"),
+    ("01067 Dresden", "01067"),
+    (math.nan, None),
+    (None, None),
+    ("", None),
+    ("Kiel", None),
+    ("241110", None),
+    (0, None),
+])
+def test_parse_plz(wert, erwartet):
+    assert parse_plz(wert) == erwartet
+
+
+def test_koordinaten_und_speichern(tmp_path):
+    tabelle = PLZZentroide({24111: (54.33, 10.08), 1067: (51.05, 13.72), 24768: (54.30, 9.66)})
+    assert len(tabelle) == 3
+    assert tabelle.koordinaten("24111 Kiel") == (54.33, 10.08)
+    assert tabelle.koordinaten(1067.0) == (51.05, 13.72)
+    assert tabelle.koordinaten("24112") is None
+    assert tabelle.koordinaten(math.nan) is None
+    assert "01067" in tabelle and 99999 not in tabelle
+
+    pfad = tmp_path / "daten" / "plz_zentroide.csv"
+    tabelle.speichern(str(pfad))
+    assert pfad.read_text(encoding='utf-8').splitlines()[1] == "01067,51.05000,13.72000"
+    geladen = PLZZentroide.laden(str(pfad))
+    assert geladen.koordinaten("01067") == (51.05, 13.72)
+    assert PLZZentroide.laden(str(tmp_path / "fehlt.csv")) is None
+
+
+def test_import_geonames_mittelt_mehrere_orte(tmp_path):
+    # GeoNames: Land, PLZ, Ort, Land (Name/Code), Kreis (Name/Code), Gemeinde (Name/Code), Lat, Lon, Genauigkeit
+    quelle = tmp_path / "DE.txt"
+    quelle.write_text(
+        "DE\t24768\tRendsburg\tSchleswig-Holstein\tSH\t\t00\tKreis Rendsburg-Eckernförde\t01058\t54.30\t9.66\t4\n"
+        "DE\t24768\tBüdelsdorf\tSchleswig-Holstein\tSH\t\t00\tKreis Rendsburg-Eckernförde\t01058\t54.32\t9.68\t4\n"
+        "DE\t01067\tDresden\tSachsen\tSN\t\t00\tKreisfreie Stadt Dresden\t14612\t51.05\t13.72\t4\n",
+        encoding='utf-8')
+    ziel = tmp_path / "plz_zentroide.csv"
+    assert importieren(str(quelle), str(ziel)) == 2
+    tabelle = PLZZentroide.laden(str(ziel))
+    assert tabelle.koordinaten("24768") == pytest.approx((54.31, 9.67))
+    assert tabelle.koordinaten("01067") == (51.05, 13.72)
+
+
+@pytest.mark.parametrize("inhalt", [
+    "plz,lat,lon\n24111,54.33,10.08\n1067,51.05,13.72\nkeine,0,0\n",
+    "Postcode;Latitude;Longitude\n24111;54,33;10,08\n01067;51,05;13,72\n",
+])
+def test_import_csv(tmp_path, inhalt):
+    quelle = tmp_path / "quelle.csv"
+    quelle.write_text(inhalt, encoding='utf-8')
+    ziel = tmp_path / "plz_zentroide.csv"
+    assert importieren(str(quelle), str(ziel)) == 2
+    tabelle = PLZZentroide.laden(str(ziel))
+    assert tabelle.koordinaten(24111) == (54.33, 10.08)
+    assert tabelle.koordinaten("01067") == (51.05, 13.72)
+
+
+def test_import_csv_ohne_koordinaten(tmp_path):
+    quelle = tmp_path / "quelle.csv"
+    quelle.write_text("plz,ort\n24111,Kiel\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="Spalte fehlt"):
+        importieren(str(quelle), str(tmp_path / "ziel.csv"))
+
+
+class NurPLZGeocoder(FakeGeocoder):
+    """Findet keine Straßenadressen, nur "PLZ, Deutschland"; protokolliert alle Anfragen"""
+
+    def __init__(self):
+        self.anfragen = []
+
+    def geocode(self, anfrage):
+        self.anfragen.append(anfrage)
+        return super().geocode(anfrage) if anfrage.endswith(", Deutschland") else None
+
+
+def _tool(config, geocoder):
+    return PraktikumszuteilungTool(config=config, geocoder=geocoder, routing_backend=FakeRouting())
+
+
+def test_adress_fallback_nutzt_gecachte_plz(config):
+    geocoder = NurPLZGeocoder()
+    tool = _tool(config, geocoder)
+    erste = tool._geocode("Unbekannter Weg 1, 24768 Rendsburg", "24768")
+    zweite = tool._geocode("Unbekannter Weg 2, 24768 Rendsburg", 24768)
+
+    assert erste == zweite == FakeGeocoder().geocode("24768, Deutschland")
+    assert geocoder.anfragen.count("24768, Deutschland") == 1
+    assert tool.geocode_cache.quelle("24768, Deutschland") == QUELLE_NOMINATIM
+    assert tool.geocode_cache.quelle("Unbekannter Weg 1, 24768 Rendsburg") == QUELLE_PLZ_FALLBACK
+    assert tool.metriken.zaehler['geocode_cache_treffer'] == 1
+
+
+def test_adress_fallback_aus_zentroid_tabelle(config):
+    geocoder = NurPLZGeocoder()
+    tool = _tool(config, geocoder)
+    tool.plz_zentroide = PLZZentroide({24768: (54.30, 9.66)})
+
+    assert tool._geocode("Unbekannter Weg 1, 24768 Rendsburg", "24768") == (54.30, 9.66)
+    assert geocoder.anfragen == ["Unbekannter Weg 1, 24768 Rendsburg"]
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Rate-Limits mit Fake-Uhr (sleep rückt die Uhr vor, es wird nie wirklich gewartet):
+Abstand der Tokens, Burst, Pause nach HTTP 429 mit Retry-After, sowie
+Zusammenfassen gleicher Schlüssel und Abbrechen in ParallelerAbruf.
+"""
+
+import threading
+import types
+from email.utils import formatdate
+
+import pytest
+
+import rate_limit
+from rate_limit import ParallelerAbruf, TokenBucket, retry_after_sekunden
+from routing_backends import OrsBackend
+
+
+@pytest.fixture
+def uhr(monkeypatch):
+    """Ersetzt time in rate_limit; uhr.schlafen protokolliert alle Wartezeiten"""
+    uhr = types.SimpleNamespace(jetzt=1000.0, schlafen=[])
+
+    def sleep(sekunden):
+        uhr.schlafen.append(sekunden)
+        uhr.jetzt += sekunden
+
+    monkeypatch.setattr(rate_limit, 'time', types.SimpleNamespace(
+        monotonic=lambda: uhr.jetzt, time=lambda: uhr.jetzt, sleep=sleep))
+    return uhr
+
+
+def test_abstand_zwischen_tokens(uhr):
+    bucket = TokenBucket(60)  # eine Anfrage pro Sekunde
+    assert [bucket.acquire() for _ in range(4)] == pytest.approx([0, 1, 1, 1])
+    assert bucket.anfragen == 4
+    assert bucket.wartezeit_gesamt == pytest.approx(3)
+
+
+def test_ungenutzte_zeit_verfaellt_bis_auf_burst(uhr):
+    bucket = TokenBucket(60, burst=3)
+    assert [bucket.acquire() for _ in range(4)] == pytest.approx([0, 0, 0, 1])
+    uhr.jetzt += 100  # lange Pause: nur der Burst bleibt erhalten
+    assert [bucket.acquire() for _ in range(4)] == pytest.approx([0, 0, 0, 1])
+
+
+def test_ohne_limit_keine_wartezeit(uhr):
+    bucket = TokenBucket(0)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert uhr.schlafen == []
+
+
+def test_pause_und_restzeit(uhr):
+    bucket = TokenBucket(60)
+    bucket.acquire()
+    bucket.pausieren(30)
+    assert bucket.pausen == 1
+    assert bucket.restzeit(3) == pytest.approx(30 + 2)
+    assert bucket.restzeit(0) == 0
+    assert bucket.acquire() == pytest.approx(30)
+    assert bucket.acquire() == pytest.approx(1)
+
+
+@pytest.mark.parametrize("headers, erwartet", [
+    ({'Retry-After': "12"}, 12),
+    ({'retry-after': "-3"}, 0),
+    ({'Retry-After': formatdate(1000.0 + 40, usegmt=True)}, 40),
+    ({'x-ratelimit-reset': "1090"}, 90),
+    ({'Retry-After': "bald"}, 65),
+    ({}, 65),
+    (None, 65),
+])
+def test_retry_after_sekunden(uhr, headers, erwartet):
+    assert retry_after_sekunden(headers) == pytest.approx(erwartet)
+
+
+def test_ors_wartet_nach_429_laut_retry_after(uhr):
+    from openrouteservice.exceptions import ApiError
+
+    class Client:
+        aufrufe = 0
+
+        def directions(self, **kwargs):
+            Client.aufrufe += 1
+            if Client.aufrufe == 1:
+                raise ApiError(429, {'error': "Rate Limit Exceeded"})
+            return {'features': [{'properties': {'segments': [{'duration': 600}]}}]}
+
+    limit = TokenBucket(60)
+    backend = OrsBackend(Client, limit, TokenBucket(60),
+                         lambda: retry_after_sekunden({'Retry-After': "7"}))
+    assert backend.fahrzeit((54.3, 9.6), (54.3, 9.8)) == pytest.approx(10)
+    assert Client.aufrufe == 2
+    assert limit.pausen == 1
+    assert uhr.schlafen == pytest.approx([7])
+
+
+def test_gleicher_schluessel_wird_zusammengefasst():
+    abruf = ParallelerAbruf(4)
+    frei = threading.Event()
+    aufrufe = []
+
+    def holen(wert):
+        aufrufe.append(wert)
+        frei.wait(5)
+        return wert * 2
+
+    erster = abruf.abrufen("a", holen, 1)
+    zweiter = abruf.abrufen("a", holen, 99)  # läuft noch → gleiche Future, kein zweiter Aufruf
+    assert zweiter is erster
+    frei.set()
+    assert erster.result(5) == 2 and zweiter.result(5) == 2
+    assert aufrufe == [1]
+
+    # Abgeschlossene Schlüssel werden wieder neu abgefragt
+    assert abruf.abrufen("a", holen, 3).result(5) == 6
+    assert aufrufe == [1, 3]
+    abruf.close()
+
+
+def test_alle_mit_fortschritt():
+    abruf = ParallelerAbruf(3)
+    erledigt = []
+    ergebnis = abruf.alle({k: (pow, k, 2) for k in range(10)}, erledigt.append)
+    abruf.close()
+    assert ergebnis == {k: k * k for k in range(10)}
+    assert sorted(erledigt) == list(range(10))
+
+
+def test_abbrechen_verwirft_wartende_anfragen():
+    abruf = ParallelerAbruf(1)
+    laeuft, frei = threading.Event(), threading.Event()
+
+    def blockieren():
+        laeuft.set()
+        frei.wait(5)
+        return "fertig"
+
+    laufend = abruf.abrufen("laufend", blockieren)
+    assert laeuft.wait(5)
+    wartend = abruf.abrufen("wartend", lambda: "nie")
+    abruf.abbrechen()
+    frei.set()
+    assert laufend.result(5) == "fertig"
+    assert wartend.cancelled()
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Reparatur-Modus: Abgleich einer früheren Zuteilung mit geänderten Eingaben (ein Fall
+pro Grund), Sheet "Änderungen" und ein vollständiger Lauf von repariere_zuteilung
+mit Fake-Backends, in dem nicht betroffene Zuteilungen unverändert bleiben.
+"""
+
+import pandas as pd
+import pytest
+
+from benchmark import FakeGeocoder, FakeRouting
+from beispiel_schuelerinnen import synthetische_kohorte
+from praktikumszuteilung import PraktikumszuteilungTool
+from reparatur import (GRUND_EINRICHTUNG, GRUND_ENTFERNT, GRUND_KAPAZITAET, GRUND_KLASSE, GRUND_LEHRKRAFT,
+                       GRUND_NAME, GRUND_NEU, aenderungen, zuteilung_abgleichen)
+
+
+def _schuelerin(name, klasse="FSP23a", einrichtung="Kita Sonnenschein", strasse="Hauptstraße 1",
+                plz="24768", ort="Rendsburg"):
+    return {'Name': name, 'Klasse': klasse, 'Einrichtung': einrichtung, 'Straße': strasse, 'PLZ': plz, 'Ort': ort}
+
+
+def _zuteilung(name, lehrkraft, score, klasse="FSP23a", einrichtung="Kita Sonnenschein",
+               adresse="Hauptstraße 1, 24768 Rendsburg"):
+    return {'Schülerin': name, 'Klasse': klasse, 'Einrichtung': einrichtung, 'Adresse': adresse,
+            'Lehrkraft': lehrkraft, 'Score': score}
+
+
+@pytest.fixture
+def fall():
+    """Frühere Zuteilung und geänderte Eingaben mit je einer Schülerin pro Grund"""
+    vorher = pd.DataFrame([
+        _zuteilung("Anna", "Frau Berg", 80),
+        _zuteilung("Clara", "Frau Berg", 70),
+        _zuteilung("Dora", "Frau Berg", 60),
+        _zuteilung("Emma", "Herr Hansen", 50),
+        _zuteilung("Frieda", "Herr Weg", 40),
+        _zuteilung("Greta", "Herr Hansen", 30),
+        _zuteilung("Hanna", "Herr Hansen", 20),
+        # Frau Krüger: Soll sinkt auf 1 → höchstens 2 der 4 Zuteilungen bleiben
+        _zuteilung("Ida", "Frau Krüger", 50),
+        _zuteilung("Jana", "Frau Krüger", 20),
+        _zuteilung("Kira", "Frau Krüger", 30),
+        _zuteilung("Lena", "Frau Krüger", 10),
+    ])
+    schueler_df = pd.DataFrame([
+        _schuelerin("Anna"),
+        _schuelerin("Berta"),                                  # neu
+        _schuelerin("Clara", einrichtung="Kita Regenbogen"),   # andere Einrichtung
+        _schuelerin("Dora", strasse="Hauptstraße 3"),          # gleiche Einrichtung, neue Adresse
+        _schuelerin("Emma", klasse="FSP23b"),                  # Klasse gewechselt
+        _schuelerin("Frieda"),                                 # Herr Weg entfällt
+        _schuelerin("Greta"), _schuelerin("Greta", ort="Büdelsdorf"),  # Name doppelt
+        # Hanna fehlt → entfernt
+        _schuelerin("Ida"), _schuelerin("Jana"), _schuelerin("Kira"), _schuelerin("Lena"),
+    ])
+    lehrkraefte_df = pd.DataFrame({
+        'Name': ["Frau Berg", "Herr Hansen", "Frau Krüger"],
+        'Soll_Anzahl_Betreuungen': [4, 4, 1],
+    })
+    return vorher, schueler_df, lehrkraefte_df
+
+
+def test_gruende(fall):
+    vorher, schueler_df, lehrkraefte_df = fall
+    abgleich = zuteilung_abgleichen(vorher, schueler_df, lehrkraefte_df)
+    assert abgleich.gruende == {
+        "Clara": GRUND_EINRICHTUNG,
+        "Dora": GRUND_EINRICHTUNG,
+        "Emma": GRUND_KLASSE,
+        "Frieda": GRUND_LEHRKRAFT,
+        "Greta": GRUND_NAME,
+        "Jana": GRUND_KAPAZITAET,
+        "Lena": GRUND_KAPAZITAET,
+        "Berta": GRUND_NEU,
+    }
+    # Bei gesunkenem Soll bleiben die Zuteilungen mit dem höchsten Score
+    assert list(vorher['Schülerin'].iloc[abgleich.behalten]) == ["Anna", "Ida", "Kira"]
+    assert [schueler_df['Name'].iat[pos] for pos in abgleich.betroffen] == [
+        "Berta", "Clara", "Dora", "Emma", "Frieda", "Greta", "Greta", "Jana", "Lena"]
+    assert list(vorher['Schülerin'].iloc[abgleich.entfernt]) == ["Hanna"]
+
+
+def test_kapazitaet_bei_gleichem_score_spaetere_zeile_zuerst():
+    vorher = pd.DataFrame([_zuteilung(name, "Frau Krüger", 10) for name in ("Ida", "Jana", "Kira")])
+    schueler_df = pd.DataFrame([_schuelerin(name) for name in ("Ida", "Jana", "Kira")])
+    lehrkraefte_df = pd.DataFrame({'Name': ["Frau Krüger"], 'Soll_Anzahl_Betreuungen': [0]})
+    abgleich = zuteilung_abgleichen(vorher, schueler_df, lehrkraefte_df)
+    assert list(vorher['Schülerin'].iloc[abgleich.behalten]) == ["Ida"]
+    assert abgleich.gruende == {"Jana": GRUND_KAPAZITAET, "Kira": GRUND_KAPAZITAET}
+
+
+def test_aenderungen(fall):
+    vorher, schueler_df, lehrkraefte_df = fall
+    abgleich = zuteilung_abgleichen(vorher, schueler_df, lehrkraefte_df)
+    ergebnis = pd.concat([vorher.iloc[abgleich.behalten], pd.DataFrame([
+        _zuteilung("Berta", "Frau Berg", 55),
+        _zuteilung("Clara", "Frau Berg", 65, einrichtung="Kita Regenbogen"),
+        _zuteilung("Dora", "Herr Hansen", 45),
+        _zuteilung("Emma", "Frau Berg", 35, klasse="FSP23b"),
+        _zuteilung("Frieda", "Herr Hansen", 25),
+        _zuteilung("Jana", "Herr Hansen", 15),
+    ])], ignore_index=True)  # Greta (doppelt) und Lena bleiben ohne Zuteilung
+
+    tabelle = aenderungen(vorher, ergebnis, abgleich).set_index('Schülerin')
+    assert tabelle.loc["Berta", 'Änderung'] == "neu zugeteilt"
+    assert tabelle.loc["Clara", 'Änderung'] == "Lehrkraft unverändert"
+    assert tabelle.loc["Clara", 'Einrichtung_neu'] == "Kita Regenbogen"
+    assert tabelle.loc["Dora", 'Änderung'] == "umgeteilt"
+    assert (tabelle.loc["Dora", 'Lehrkraft_vorher'], tabelle.loc["Dora", 'Lehrkraft_neu']) == ("Frau Berg",
+                                                                                             "Herr Hansen")
+    assert tabelle.loc["Lena", 'Änderung'] == "nicht zugeteilt"
+    assert tabelle.loc["Lena", 'Score_vorher'] == 10 and pd.isna(tabelle.loc["Lena", 'Score_neu'])
+    assert tuple(tabelle.loc["Hanna", ['Änderung', 'Grund']]) == ("entfernt", GRUND_ENTFERNT)
+    assert set(tabelle.index) == set(abgleich.gruende) | {"Hanna"}
+
+
+def test_repariere_zuteilung_behaelt_nicht_betroffene(config):
+    schueler_df, lehrkraefte_df = synthetische_kohorte(40, 6, 4)
+    tool = PraktikumszuteilungTool(config=config, geocoder=FakeGeocoder(), routing_backend=FakeRouting())
+    vorher = tool.assign_praktika(schueler_df, lehrkraefte_df)
+    vorher['Begründung'] = tool.begruendungen(vorher)
+
+    # Änderungen: eine Schülerin mit neuer Einrichtung, eine entfernt, eine neu, ein Soll gesenkt
+    geaendert = vorher['Schülerin'].iat[3]
+    entfernt = vorher['Schülerin'].iat[7]
+    schueler_neu = schueler_df[schueler_df['Name'] != entfernt].copy()
+    zeile = schueler_neu['Name'] == geaendert
+    schueler_neu.loc[zeile, ['Einrichtung', 'Straße']] = ["Kita Neubau", "Neuer Weg 1"]
+    schueler_neu = pd.concat([schueler_neu, pd.DataFrame([
+        _schuelerin("Neue Schülerin", einrichtung="Hort Waldweg", strasse="Marktplatz 2", plz="24783",
+                    ort="Osterrönfeld")])], ignore_index=True)
+    lehrkraefte_neu = lehrkraefte_df.copy()
+    gesenkt = vorher['Lehrkraft'].value_counts().index[0]
+    lehrkraefte_neu.loc[lehrkraefte_neu['Name'] == gesenkt, 'Soll_Anzahl_Betreuungen'] -= 2
+
+    ergebnis, tabelle = tool.repariere_zuteilung(vorher, schueler_neu, lehrkraefte_neu)
+    abgleich = zuteilung_abgleichen(vorher, schueler_neu, lehrkraefte_neu)
+
+    # Jede Schülerin genau einmal, keine Lehrkraft über Soll +1
+    assert sorted(ergebnis['Schülerin']) == sorted(schueler_neu['Name'])
+    soll = dict(zip(lehrkraefte_neu['Name'], lehrkraefte_neu['Soll_Anzahl_Betreuungen']))
+    assert all(anzahl <= soll[name] + 1 for name, anzahl in ergebnis['Lehrkraft'].value_counts().items())
+
+    # Nicht betroffene Zuteilungen unverändert übernommen (inkl. Score und Begründung)
+    unveraendert = vorher[~vorher['Schülerin'].isin(list(abgleich.gruende) + [entfernt])]
+    assert len(unveraendert) == len(abgleich.behalten) > 0
+    behalten = ergebnis.set_index('Schülerin').loc[unveraendert['Schülerin']]
+    for spalte in ('Lehrkraft', 'Einrichtung', 'Score', 'Begründung'):
+        assert behalten[spalte].tolist() == unveraendert[spalte].tolist()
+
+    assert abgleich.gruende[geaendert] == GRUND_EINRICHTUNG
+    assert abgleich.gruende["Neue Schülerin"] == GRUND_NEU
+    assert GRUND_KAPAZITAET in abgleich.gruende.values()
+    assert set(tabelle['Schülerin']) == set(abgleich.gruende) | {entfernt}
+    assert ergebnis.set_index('Schülerin').loc[geaendert, 'Einrichtung'] == "Kita Neubau"
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Eingabetabellen: Trennzeichen, PLZ als Text, Kodierung (UTF-8 / Windows-1252) und Excel-Formate"""
+
+import pandas as pd
+import pytest
+
+from tabellen_io import tabelle_laden
+
+ERFORDERLICH = ['Name', 'PLZ']
+
+
+def test_semikolon_und_fuehrende_nullen(tmp_path):
+    pfad = tmp_path / "lehrkraefte.csv"
+    pfad.write_text("Name;PLZ\nFrau Jürgens;01067\n", encoding='utf-8')
+    df = tabelle_laden(str(pfad), ERFORDERLICH, "Test")
+    assert df['Name'].tolist() == ["Frau Jürgens"]
+    assert df['PLZ'].tolist() == ["01067"]
+
+
+def test_cp1252_umlaut_weit_hinten(tmp_path):
+    # Kopf und erste ~200 kB reines ASCII: der Dateianfang sieht nach UTF-8 aus
+    zeilen = ["Name,PLZ"] + [f"Lehrkraft {i},24768" for i in range(10000)] + ["Frau Müller,24103"]
+    pfad = tmp_path / "excel_export.csv"
+    pfad.write_bytes(("\r\n".join(zeilen) + "\r\n").encode('cp1252'))
+    df = tabelle_laden(str(pfad), ERFORDERLICH, "Test")
+    assert len(df) == 10001
+    assert df['Name'].iat[-1] == "Frau Müller"
+
+
+def test_unbekannte_kodierung(tmp_path):
+    # 0x81 ist weder gültiges UTF-8 noch in Windows-1252 belegt
+    pfad = tmp_path / "kaputt.csv"
+    pfad.write_bytes(b"Name,PLZ\nFrau \x81,24768\n")
+    with pytest.raises(ValueError, match="Kodierung nicht erkannt"):
+        tabelle_laden(str(pfad), ERFORDERLICH, "Test")
+
+
+def test_xls_ueber_pandas(tmp_path, monkeypatch):
+    # .xls liest openpyxl nicht: Kopfzeile und Daten kommen wie früher aus pd.read_excel
+    aufrufe = []
+
+    def read_excel(pfad, **kwargs):
+        aufrufe.append(kwargs)
+        df = pd.DataFrame({'Name': ["Frau Jürgens"], 'PLZ': ["24768"]})
+        return df.head(kwargs.get('nrows', len(df)))
+
+    monkeypatch.setattr(pd, 'read_excel', read_excel)
+    pfad = tmp_path / "alt.xls"
+    pfad.write_bytes(b"")
+    df = tabelle_laden(str(pfad), ERFORDERLICH, "Test")
+    assert df['Name'].tolist() == ["Frau Jürgens"]
+    assert aufrufe == [{'nrows': 0}, {}]
+
+
+def test_unbekanntes_format(tmp_path):
+    with pytest.raises(ValueError, match="Nicht unterstütztes Dateiformat"):
+        tabelle_laden(str(tmp_path / "daten.ods"), ERFORDERLICH, "Test")
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Räumlicher Vorfilter (vorfilter.aktiv): verworfene Paare ändern die Zuteilung nicht -
+gleiches Ergebnis wie mit allen Fahrzeiten (Fake-Backends aus benchmark.py, ohne Netzwerk).
+"""
+
+import pytest
+
+from benchmark import FakeGeocoder, FakeRouting
+from beispiel_schuelerinnen import synthetische_kohorte
+from praktikumszuteilung import SCORE_KOMPONENTEN, PraktikumszuteilungTool
+
+VERGLICHEN = ['Schülerin', 'Lehrkraft', 'Score', 'Begründung'] + SCORE_KOMPONENTEN
+
+
+def _zuteilung(config, schueler_df, lehrkraefte_df, engine="greedy"):
+    tool = PraktikumszuteilungTool(config=config, geocoder=FakeGeocoder(), routing_backend=FakeRouting())
+    ergebnis = tool.assign_praktika(schueler_df, lehrkraefte_df, engine=engine)
+    ergebnis['Begründung'] = tool.begruendungen(ergebnis)
+    return tool, ergebnis[VERGLICHEN].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("engine", ["greedy", "heap"])
+@pytest.mark.parametrize("n_schueler, n_lehrkraefte, seed", [(30, 5, 3), (80, 6, 4), (120, 15, 2), (200, 20, 1)])
+def test_vorfilter_entspricht_voller_matrix(config, engine, n_schueler, n_lehrkraefte, seed):
+    schueler_df, lehrkraefte_df = synthetische_kohorte(n_schueler, n_lehrkraefte, seed)
+    _, voll = _zuteilung(config, schueler_df, lehrkraefte_df, engine)
+
+    # FakeRouting fährt höchstens 50 km/h (1,2 min/km): 60 km/h ist noch eine gültige Schranke
+    # und verwirft auf den kleinen synthetischen Kohorten genug Paare
+    config['vorfilter'] = {'aktiv': True, 'max_kmh': 60}
+    tool, gefiltert = _zuteilung(config, schueler_df, lehrkraefte_df, engine)
+
+    assert tool.metriken.zaehler['vorfilter_verworfen'] > 0, "Vorfilter hat kein Paar verworfen"
+    assert len(tool.vorfilter_df) > 0
+    assert gefiltert.equals(voll)
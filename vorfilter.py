@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Räumlicher Vorfilter für Wohnort-Einrichtungs-Paare
+Die effektive Fahrzeit (siehe _calculate_detour) ist nie größer als die Rundfahrt
+Schule → Einrichtung → Schule. Die Optionen über den Wohnort zählen nur, wenn sie
+in ein besseres Fahrzeit-Band fallen können. Eine untere Schranke für Wohnort →
+Einrichtung (Luftlinie bei Höchstgeschwindigkeit, Dreiecksungleichung über die
+Schule) zeigt vorab, für welche Paare das ausgeschlossen ist: Diese Strecken werden
+nicht geroutet, der Score bleibt unverändert.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from fahrzeit_modell import luftlinie_km
+
+Koordinaten = Tuple[float, float]
+
+
+def bandgrenzen(grenzen: Dict) -> np.ndarray:
+    """Fahrzeiten, an denen sich Punkte oder Malus ändern (aufsteigend)"""
+    return np.sort(np.array([grenzen['exzellent_max_min'], grenzen['gut_max_min'],
+                             grenzen['akzeptabel_max_min'], grenzen['lang_min'], grenzen['sehr_lang_min']],
+                            dtype=float))
+
+
+def untere_schranke(einrichtungen: Sequence[Koordinaten], wohnorte: Sequence[Koordinaten],
+                    einrichtung_to_schule: np.ndarray, wohnort_to_schule: np.ndarray,
+                    max_kmh: float) -> np.ndarray:
+    """
+    Untere Schranke der Fahrzeit Wohnort → Einrichtung (Matrix Einrichtung × Wohnort):
+    Luftlinie bei max_kmh, und Wohnort → Schule ≤ Wohnort → Einrichtung → Schule
+    """
+    e, w = np.asarray(einrichtungen, dtype=float), np.asarray(wohnorte, dtype=float)
+    km = luftlinie_km(e[:, None, 0], e[:, None, 1], w[None, :, 0], w[None, :, 1])
+    return np.maximum(km * 60.0 / max_kmh, wohnort_to_schule[None, :] - einrichtung_to_schule[:, None])
+
+
+def effektive_fahrzeit(schule_to_einrichtung, einrichtung_to_schule, wohnort_to_schule, wohnort_to_einrichtung):
+    """
+    Günstigste Option wie in _calculate_detour (Rundfahrt ab Schule, Rundfahrt ab Wohnort,
+    Umweg Wohnort → Einrichtung → Schule); elementweise für Zahlen und Arrays
+    """
+    from_school_roundtrip = schule_to_einrichtung * 2
+    from_home_roundtrip = wohnort_to_einrichtung * 2
+    complete_trip_via_einrichtung = wohnort_to_einrichtung + einrichtung_to_schule + wohnort_to_schule
+    detour_time = complete_trip_via_einrichtung - wohnort_to_schule * 2
+    return np.minimum(np.minimum(from_school_roundtrip, from_home_roundtrip), np.maximum(0, detour_time))
+
+
+def schranken(schule_to_einrichtung: np.ndarray, einrichtung_to_schule: np.ndarray,
+              wohnort_to_schule: np.ndarray, schranke: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Untere und obere Schranke der effektiven Fahrzeit (Einrichtung × Wohnort):
+    gleiche Optionen wie _calculate_detour, mit der Schranke statt Wohnort → Einrichtung
+    """
+    obere = np.broadcast_to((schule_to_einrichtung * 2)[:, None], schranke.shape)
+    untere = effektive_fahrzeit(schule_to_einrichtung[:, None], einrichtung_to_schule[:, None],
+                                wohnort_to_schule[None, :], schranke)
+    return untere, obere
+
+
+def verwerfbar(untere: np.ndarray, obere: np.ndarray, grenzen: np.ndarray) -> np.ndarray:
+    """Beide Schranken im selben Band: die Strecke Wohnort → Einrichtung ändert den Score nicht"""
+    return np.searchsorted(grenzen, untere) == np.searchsorted(grenzen, obere)
+
+
+def raumordnung(coords: Sequence[Koordinaten]) -> List[Koordinaten]:
+    """
+    Sortiert Orte entlang einer Z-Kurve: benachbarte Orte landen in denselben
+    Matrix-Blöcken, verworfene Paare bilden zusammenhängende Blöcke
+    """
+    if not coords:
+        return []
+    c = np.asarray(coords, dtype=float)
+    spanne = np.maximum(c.max(axis=0) - c.min(axis=0), 1e-9)
+    gitter = ((c - c.min(axis=0)) / spanne * 65535).astype(np.uint64)
+    schluessel = np.zeros(len(c), dtype=np.uint64)
+    for bit in range(16):
+        for achse in (0, 1):
+            schluessel |= ((gitter[:, achse] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit + achse)
+    return [coords[i] for i in np.argsort(schluessel, kind='stable')]
@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Zuteilungs-Engines für Phase 2
+Wählen auf Basis der statischen Score-Matrix schrittweise das beste verfügbare Paar
+(Schülerin, Lehrkraft) unter Berücksichtigung von Lastverteilung, Einrichtungskonsistenz
+und der harten Kapazitätsgrenze Soll +1.
+"""
+
+import heapq
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ZuteilungsZustand:
+    """
+    Gemeinsamer Zustand aller Engines: statische Scores, Einrichtungen, Soll-Werte
+    und die bisherigen Zuteilungen pro Lehrkraft.
+
+    Spalten mit gleichem Lehrkraft-Namen bilden eine Gruppe und teilen sich
+    Zähler und betreute Einrichtungen (wie die namensbasierte Zuteilungsliste im Tool).
+    """
+
+    def __init__(self, static_matrix: np.ndarray, einrichtung_ids: np.ndarray,
+                 soll: Sequence[int], gruppen: Sequence[int],
+                 load_score: Callable[[int, int], float], konsistenz_bonus: float):
+        self.static_matrix = static_matrix
+        self.einrichtung_ids = np.asarray(einrichtung_ids)
+        self.soll = list(soll)
+        self.gruppen = list(gruppen)
+        self.load_score = load_score
+        self.konsistenz_bonus = konsistenz_bonus
+
+        self.n_schueler, self.n_lehrkraefte = static_matrix.shape
+        n_gruppen = max(self.gruppen) + 1 if self.gruppen else 0
+        self.anzahl = [0] * n_gruppen
+        self.betreute_einrichtungen = [set() for _ in range(n_gruppen)]
+        self.spalten_pro_gruppe: Dict[int, List[int]] = {}
+        for l_pos, gruppe in enumerate(self.gruppen):
+            self.spalten_pro_gruppe.setdefault(gruppe, []).append(l_pos)
+        self.offen = np.ones(self.n_schueler, dtype=bool)
+
+    def leere_kopie(self) -> "ZuteilungsZustand":
+        """Gleiche Eingaben, aber noch ohne Zuteilungen"""
+        return ZuteilungsZustand(self.static_matrix, self.einrichtung_ids, self.soll, self.gruppen,
+                                 self.load_score, self.konsistenz_bonus)
+
+    def kopie(self) -> "ZuteilungsZustand":
+        """Unabhängige Kopie mit den bisherigen Zuteilungen (z.B. inklusive Vorbelegung)"""
+        kopie = self.leere_kopie()
+        kopie.anzahl = list(self.anzahl)
+        kopie.betreute_einrichtungen = [set(einrichtungen) for einrichtungen in self.betreute_einrichtungen]
+        kopie.offen = self.offen.copy()
+        return kopie
+
+    def hat_kapazitaet(self, l_pos: int) -> bool:
+        """Harte Grenze: Soll +1"""
+        return self.anzahl[self.gruppen[l_pos]] < self.soll[l_pos] + 1
+
+    def dynamischer_score(self, s_pos: int, l_pos: int) -> float:
+        """Aktueller Konsistenz- und Lastverteilungsanteil eines Paares"""
+        gruppe = self.gruppen[l_pos]
+        score = self.load_score(self.anzahl[gruppe], self.soll[l_pos])
+        if self.einrichtung_ids[s_pos] in self.betreute_einrichtungen[gruppe]:
+            score += self.konsistenz_bonus
+        return score
+
+    def score(self, s_pos: int, l_pos: int) -> float:
+        return self.static_matrix[s_pos, l_pos] + self.dynamischer_score(s_pos, l_pos)
+
+    def spalten_scores(self, l_pos: int) -> np.ndarray:
+        """Aktuelle Scores einer Lehrkraft-Spalte, vergebene Zeilen und volle Spalten = -inf"""
+        if not self.hat_kapazitaet(l_pos):
+            return np.full(self.n_schueler, -np.inf)
+        gruppe = self.gruppen[l_pos]
+        spalte = self.static_matrix[:, l_pos] + self.load_score(self.anzahl[gruppe], self.soll[l_pos])
+        if self.betreute_einrichtungen[gruppe]:
+            betreut = np.fromiter(self.betreute_einrichtungen[gruppe], dtype=self.einrichtung_ids.dtype)
+            spalte = spalte + self.konsistenz_bonus * np.isin(self.einrichtung_ids, betreut)
+        spalte[~self.offen] = -np.inf
+        return spalte
+
+    def vorbelegen(self, l_pos: int, einrichtung_id: Optional[int] = None):
+        """Zählt eine feste Zuteilung, deren Schülerin nicht in der Matrix steht (Reparatur-Modus)"""
+        gruppe = self.gruppen[l_pos]
+        self.anzahl[gruppe] += 1
+        if einrichtung_id is not None:
+            self.betreute_einrichtungen[gruppe].add(einrichtung_id)
+
+    def zuteilen(self, s_pos: int, l_pos: int) -> bool:
+        """
+        Vermerkt eine Zuteilung.
+        Returns: True, wenn die Einrichtung für die Lehrkraft neu ist
+        """
+        gruppe = self.gruppen[l_pos]
+        self.offen[s_pos] = False
+        self.anzahl[gruppe] += 1
+        einrichtung = self.einrichtung_ids[s_pos]
+        neu = einrichtung not in self.betreute_einrichtungen[gruppe]
+        self.betreute_einrichtungen[gruppe].add(einrichtung)
+        return neu
+
+
+class GreedyEngine:
+    """
+    Greedy mit inkrementeller Score-Matrix: Pro Spalte werden bester Wert und beste
+    Zeile gehalten; nach einer Zuteilung werden nur die Spalte(n) der Lehrkraft neu
+    berechnet und Spalten, deren beste Zeile vergeben wurde, neu ausgewertet.
+    Bei Gleichstand gewinnt die erste Schülerin, dann die erste Lehrkraft.
+    """
+
+    def __init__(self, zustand: ZuteilungsZustand):
+        self.zustand = zustand
+        n_s, n_l = zustand.n_schueler, zustand.n_lehrkraefte
+        self.total = np.full((n_s, n_l), -np.inf)
+        self.spalten_bestwert = np.full(n_l, -np.inf)
+        self.spalten_bestzeile = np.zeros(n_l, dtype=int)
+        for l_pos in range(n_l):
+            self._spalte_aktualisieren(l_pos)
+
+    def _spalte_bestwert_aktualisieren(self, l_pos: int):
+        if self.zustand.n_schueler == 0:
+            return
+        zeile = int(np.argmax(self.total[:, l_pos]))
+        self.spalten_bestzeile[l_pos] = zeile
+        self.spalten_bestwert[l_pos] = self.total[zeile, l_pos]
+
+    def _spalte_aktualisieren(self, l_pos: int):
+        self.total[:, l_pos] = self.zustand.spalten_scores(l_pos)
+        self._spalte_bestwert_aktualisieren(l_pos)
+
+    def naechstes_match(self) -> Optional[Tuple[int, int]]:
+        if self.zustand.n_lehrkraefte == 0:
+            return None
+        bestwert = self.spalten_bestwert.max()
+        if bestwert == -np.inf:
+            return None
+        kandidaten = np.flatnonzero(self.spalten_bestwert == bestwert)
+        l_pos = int(kandidaten[np.argmin(self.spalten_bestzeile[kandidaten])])
+        return int(self.spalten_bestzeile[l_pos]), l_pos
+
+    def spalten_aktualisieren(self, spalten: Sequence[int]):
+        """Statische Scores dieser Spalten wurden geändert (z.B. durch BedarfsEngine)"""
+        for l_pos in spalten:
+            self._spalte_aktualisieren(l_pos)
+
+    def zuteilen(self, s_pos: int, l_pos: int):
+        self.zustand.zuteilen(s_pos, l_pos)
+        self.total[s_pos, :] = -np.inf
+        geaenderte_spalten = self.zustand.spalten_pro_gruppe[self.zustand.gruppen[l_pos]]
+        for spalte in geaenderte_spalten:
+            self._spalte_aktualisieren(spalte)
+        for spalte in np.flatnonzero(self.spalten_bestzeile == s_pos):
+            if spalte not in geaenderte_spalten:
+                self._spalte_bestwert_aktualisieren(spalte)
+
+
+class HeapEngine:
+    """
+    Lazy Greedy mit Prioritätswarteschlange, initialisiert aus der Phase-1-Liste.
+
+    Jede Lehrkraft-Spalte hat einen Versionszähler. Einträge mit veralteter Version werden
+    erst beim Herausnehmen neu bewertet und wieder eingefügt. Das ist korrekt, weil der
+    Lastverteilungsanteil mit jeder Zuteilung nur sinkt; der einzige steigende Anteil
+    (Konsistenz-Bonus für eine neu betreute Einrichtung) wird sofort neu eingefügt.
+    Gleiche Auswahl und Reihenfolge wie GreedyEngine, aber O(log n) pro Schritt.
+    """
+
+    def __init__(self, zustand: ZuteilungsZustand,
+                 phase1_matches: Optional[List[Tuple[float, int, int]]] = None):
+        self.zustand = zustand
+        self.version = [0] * zustand.n_lehrkraefte
+
+        if phase1_matches is None:
+            phase1_matches = [(zustand.score(s_pos, l_pos), s_pos, l_pos)
+                              for s_pos in range(zustand.n_schueler)
+                              for l_pos in range(zustand.n_lehrkraefte)]
+        self.heap = [(-float(score), s_pos, l_pos, 0) for score, s_pos, l_pos in phase1_matches]
+        heapq.heapify(self.heap)
+
+    def naechstes_match(self) -> Optional[Tuple[int, int]]:
+        zustand = self.zustand
+        while self.heap:
+            _, s_pos, l_pos, version = self.heap[0]
+            if not zustand.offen[s_pos] or not zustand.hat_kapazitaet(l_pos):
+                # Schülerin vergeben oder Lehrkraft voll: bleibt dauerhaft ungültig
+                heapq.heappop(self.heap)
+                continue
+            if version != self.version[l_pos]:
+                heapq.heapreplace(self.heap, (-float(zustand.score(s_pos, l_pos)), s_pos, l_pos,
+                                              self.version[l_pos]))
+                continue
+            return s_pos, l_pos
+        return None
+
+    def spalten_aktualisieren(self, spalten: Sequence[int]):
+        """
+        Statische Scores dieser Spalten wurden gesenkt: Einträge veralten und werden beim
+        Herausnehmen neu bewertet (steigende Scores wären hier nicht zulässig)
+        """
+        for l_pos in spalten:
+            self.version[l_pos] += 1
+
+    def zuteilen(self, s_pos: int, l_pos: int):
+        zustand = self.zustand
+        einrichtung = zustand.einrichtung_ids[s_pos]
+        neue_einrichtung = zustand.zuteilen(s_pos, l_pos)
+        spalten = zustand.spalten_pro_gruppe[zustand.gruppen[l_pos]]
+        for spalte in spalten:
+            self.version[spalte] += 1
+
+        if neue_einrichtung:
+            # Konsistenz-Bonus erhöht Scores dieser Einrichtung → sofort mit aktuellem Wert einfügen
+            zeilen = np.flatnonzero(zustand.offen & (zustand.einrichtung_ids == einrichtung))
+            for spalte in spalten:
+                if not zustand.hat_kapazitaet(spalte):
+                    continue
+                for zeile in zeilen:
+                    heapq.heappush(self.heap, (-float(zustand.score(zeile, spalte)), int(zeile),
+                                               spalte, self.version[spalte]))
+
+
+class FesteZuteilungEngine:
+    """
+    Gibt eine vorab bestimmte Menge von Paaren aus. Reihenfolge wie beim Greedy:
+    jeweils das Paar mit dem aktuell höchsten Score, damit Scores und Begründungen
+    pro Zeile denselben Regeln folgen. Die Summe der Scores hängt nicht von der Reihenfolge ab.
+    """
+
+    def __init__(self, zustand: ZuteilungsZustand, paare: List[Tuple[int, int]]):
+        self.zustand = zustand
+        self.paare = sorted(paare)
+
+    def naechstes_match(self) -> Optional[Tuple[int, int]]:
+        if not self.paare:
+            return None
+        scores = [self.zustand.score(s_pos, l_pos) for s_pos, l_pos in self.paare]
+        return self.paare[int(np.argmax(scores))]
+
+    def zuteilen(self, s_pos: int, l_pos: int):
+        self.zustand.zuteilen(s_pos, l_pos)
+        self.paare.remove((s_pos, l_pos))
+
+
+class BedarfsEngine:
+    """
+    Fahrzeiten bei Bedarf (routing.bei_bedarf): Für offene Paare enthält die statische
+    Matrix eine obere Schranke des Scores. Wählt die innere Engine ein offenes Paar, klärt
+    aufloesen dessen Fahrzeit, trägt die exakten Scores in die Matrix ein, setzt offen
+    zurück und liefert die geänderten Spalten; danach wird neu gewählt. Angefragt wird
+    so in der Reihenfolge der Schranken, und nur, solange ein Paar gewinnen könnte.
+    Da Scores beim Auflösen nur sinken, wird jedes Paar erst gewählt, wenn es exakt
+    bewertet ist: gleiche Zuteilung wie mit allen Fahrzeiten vorab.
+    """
+
+    def __init__(self, engine, offen: np.ndarray, aufloesen: Callable[[List[Tuple[int, int]]], Sequence[int]]):
+        self.engine = engine
+        self.offen = offen
+        self.aufloesen = aufloesen
+
+    def naechstes_match(self) -> Optional[Tuple[int, int]]:
+        while True:
+            match = self.engine.naechstes_match()
+            if match is None or not self.offen[match]:
+                return match
+            self.engine.spalten_aktualisieren(self.aufloesen([match]))
+
+    def zuteilen(self, s_pos: int, l_pos: int):
+        self.engine.zuteilen(s_pos, l_pos)
+
+
+def greedy_loesen(zustand: ZuteilungsZustand) -> List[Tuple[int, int]]:
+    """Führt die Greedy-Zuteilung auf dem Zustand vollständig aus"""
+    engine = GreedyEngine(zustand)
+    paare = []
+    while True:
+        match = engine.naechstes_match()
+        if match is None:
+            return paare
+        engine.zuteilen(*match)
+        paare.append(match)
+
+
+def zielwert(zustand: ZuteilungsZustand, paare: List[Tuple[int, int]]) -> float:
+    """
+    Summe der Scores einer Zuteilung, unabhängig von der Reihenfolge:
+    statische Scores + Σ Lastverteilung für 0..n-1 + Konsistenz-Bonus für jede weitere
+    Schülerin derselben Einrichtung bei derselben Lehrkraft.
+
+    Gezählt wird ab dem Stand von zustand: Eine Vorbelegung (Reparatur-Modus) geht wie in
+    lokale_suche in Anzahl und betreute Einrichtungen ein, die paare selbst noch nicht.
+    """
+    summe = 0.0
+    anzahl = list(zustand.anzahl)
+    einrichtungen = {(gruppe, einrichtung) for gruppe, betreut in enumerate(zustand.betreute_einrichtungen)
+                     for einrichtung in betreut}
+    for s_pos, l_pos in paare:
+        gruppe = zustand.gruppen[l_pos]
+        summe += zustand.static_matrix[s_pos, l_pos]
+        summe += zustand.load_score(anzahl[gruppe], zustand.soll[l_pos])
+        anzahl[gruppe] += 1
+        schluessel = (gruppe, zustand.einrichtung_ids[s_pos])
+        if schluessel in einrichtungen:
+            summe += zustand.konsistenz_bonus
+        einrichtungen.add(schluessel)
+    return summe
+
+
+def einrichtung_spalten(einrichtung_ids: np.ndarray, weitere: Sequence = ()) -> Tuple[np.ndarray, int]:
+    """
+    Spalte je Schülerin für Tabellen/Variablen Lehrkraft × Einrichtung. pd.factorize vergibt -1
+    für eine leere Einrichtung; diese Schülerinnen zählen wie in ZuteilungsZustand als eine
+    gemeinsame Einrichtung und erhalten die letzte Spalte (statt über -1 die der letzten Einrichtung).
+    weitere: Mengen zusätzlicher IDs (vorbelegte Einrichtungen), die in die Tabelle passen müssen
+    Returns: (Spalte je Schülerin, Anzahl Spalten)
+    """
+    ids = np.asarray(einrichtung_ids, dtype=int)
+    leer = int(max([ids.max(initial=-1)] + [max(e, default=-1) for e in weitere])) + 1
+    return np.where(ids < 0, leer, ids), leer + 1
+
+
+def optimiere_milp(zustand: ZuteilungsZustand, start_paare: List[Tuple[int, int]],
+                   zeitlimit_s: float = 60) -> Tuple[List[Tuple[int, int]], Dict]:
+    """
+    Exakte Zuteilung als gemischt-ganzzahliges Programm (scipy.optimize.milp / HiGHS).
+
+    Variablen: x[s,l] (Zuteilung, binär), y[l,k] (k-ter Platz der Lehrkraft, trägt den
+    Lastverteilungs-Score für Ist=k), z[l,f] (Lehrkraft betreut Einrichtung f).
+    Ziel: max Σ (static + Konsistenz) x − Konsistenz Σ z + Σ Last(k) y
+    Nebenbedingungen: jede Schülerin höchstens einmal, insgesamt so viele Zuteilungen
+    wie möglich, Σ_s x[s,l] = Σ_k y[l,k] mit k ≤ Soll (harte Grenze Soll +1), x ≤ z.
+    Da Last(k) mit k fällt, werden die Plätze in Reihenfolge belegt und das Modell
+    entspricht genau der Greedy-Bewertung (siehe zielwert).
+
+    Die Greedy-Lösung dient als Startlösung: Findet der Solver im Zeitlimit nichts
+    Besseres, wird sie unverändert übernommen.
+    Returns: (paare, bericht)
+    """
+    try:
+        from scipy.optimize import Bounds, LinearConstraint, milp
+        from scipy.sparse import coo_matrix
+    except ImportError:
+        raise ImportError("Die Engine 'milp' benötigt SciPy (pip install scipy)")
+
+    start = time.perf_counter()
+    n_s, n_l = zustand.n_schueler, zustand.n_lehrkraefte
+    einrichtung_ids, n_f = einrichtung_spalten(zustand.einrichtung_ids)
+    kons = zustand.konsistenz_bonus
+    greedy_wert = zielwert(zustand, start_paare)
+
+    bericht = {'greedy_zielwert': greedy_wert, 'milp_zielwert': None, 'verbesserung': 0.0,
+               'solver_gap': None, 'status': None, 'laufzeit_s': 0.0, 'uebernommen': False}
+
+    if len(set(zustand.gruppen)) != n_l:
+        bericht['status'] = "Doppelte Lehrkraft-Namen werden vom MILP-Modell nicht unterstützt"
+        return start_paare, bericht
+
+    # Variablen-Indizes
+    n_x = n_s * n_l
+    plaetze = [max(0, int(soll) + 1) for soll in zustand.soll]
+    y_start = np.concatenate([[0], np.cumsum(plaetze)])[:-1] + n_x
+    n_y = sum(plaetze)
+    z_start = n_x + n_y
+    n_var = z_start + n_l * n_f
+
+    c = np.zeros(n_var)
+    c[:n_x] = (zustand.static_matrix + kons).ravel()
+    for l_pos in range(n_l):
+        for k in range(plaetze[l_pos]):
+            c[y_start[l_pos] + k] = zustand.load_score(k, zustand.soll[l_pos])
+    c[z_start:] = -kons
+    c = -c  # milp minimiert
+
+    zeilen, spalten, werte, lb, ub = [], [], [], [], []
+    zeile = 0
+
+    def bedingung(indizes, koeffizienten, untere, obere):
+        nonlocal zeile
+        zeilen.extend([zeile] * len(indizes))
+        spalten.extend(indizes)
+        werte.extend(koeffizienten)
+        lb.append(untere)
+        ub.append(obere)
+        zeile += 1
+
+    # Jede Schülerin höchstens einmal
+    for s_pos in range(n_s):
+        bedingung(range(s_pos * n_l, (s_pos + 1) * n_l), [1.0] * n_l, 0, 1)
+    # So viele Zuteilungen wie möglich (alle Paare sind erlaubt)
+    max_zuteilungen = min(n_s, sum(plaetze))
+    bedingung(range(n_x), [1.0] * n_x, max_zuteilungen, max_zuteilungen)
+    # Anzahl pro Lehrkraft = belegte Plätze (≤ Soll +1)
+    for l_pos in range(n_l):
+        indizes = list(range(l_pos, n_x, n_l)) + list(range(y_start[l_pos], y_start[l_pos] + plaetze[l_pos]))
+        bedingung(indizes, [1.0] * n_s + [-1.0] * plaetze[l_pos], 0, 0)
+    # x[s,l] ≤ z[l,f(s)]
+    for s_pos in range(n_s):
+        for l_pos in range(n_l):
+            bedingung([s_pos * n_l + l_pos, z_start + l_pos * n_f + einrichtung_ids[s_pos]],
+                      [1.0, -1.0], -np.inf, 0)
+
+    matrix = coo_matrix((werte, (zeilen, spalten)), shape=(zeile, n_var)).tocsr()
+    integralitaet = np.zeros(n_var)
+    integralitaet[:n_x] = 1  # y und z ergeben sich bei ganzzahligem x von selbst ganzzahlig
+
+    ergebnis = milp(c, integrality=integralitaet, bounds=Bounds(0, 1),
+                    constraints=LinearConstraint(matrix, lb, ub),
+                    options={'time_limit': zeitlimit_s, 'disp': False})
+
+    bericht['laufzeit_s'] = time.perf_counter() - start
+    bericht['status'] = ergebnis.message
+    bericht['solver_gap'] = getattr(ergebnis, 'mip_gap', None)
+    if ergebnis.x is None:
+        return start_paare, bericht
+
+    x = ergebnis.x[:n_x].reshape(n_s, n_l) > 0.5
+    paare = [(int(s_pos), int(l_pos)) for s_pos, l_pos in zip(*np.nonzero(x))]
+    milp_wert = zielwert(zustand, paare)
+    bericht['milp_zielwert'] = milp_wert
+
+    # Greedy als Startlösung/Rückfallebene: mehr zugeteilte Schülerinnen, dann höherer Zielwert
+    if (len(paare), milp_wert) > (len(start_paare), greedy_wert):
+        bericht['verbesserung'] = milp_wert - greedy_wert
+        bericht['uebernommen'] = True
+        return paare, bericht
+    return start_paare, bericht
+
+
+def lokale_suche(zustand: ZuteilungsZustand, start_paare: List[Tuple[int, int]],
+                 max_iterationen: int = 10000, zeitlimit_s: float = 0.5,
+                 offen: Optional[np.ndarray] = None,
+                 aufloesen: Callable[[List[Tuple[int, int]]], Sequence[int]] = None
+                 ) -> Tuple[List[Tuple[int, int]], Dict]:
+    """
+    Verbessert eine Zuteilung durch Verschieben (eine Schülerin wechselt die Lehrkraft) und
+    Tauschen (zwei Schülerinnen tauschen ihre Lehrkräfte), immer innerhalb der Grenze Soll +1.
+
+    Jeder Kandidat wird als Differenz des Zielwerts (siehe zielwert) in O(1) bewertet: statische
+    Matrix, Lastverteilung aus der Anzahl pro Lehrkraft und Konsistenz-Bonus aus der Anzahl
+    Schülerinnen pro Lehrkraft und Einrichtung. Pro Schülerin werden alle Kandidaten auf
+    einmal (vektorisiert) verglichen und der beste übernommen, solange er den Zielwert erhöht.
+    Ende nach max_iterationen Verbesserungen, nach zeitlimit_s oder im lokalen Optimum.
+
+    zustand: Ausgangslage vor den start_paaren (mit Vorbelegung), wird nicht verändert
+    offen/aufloesen: wie BedarfsEngine - ein offenes Paar wird erst exakt bewertet, bevor
+    ein Kandidat damit übernommen wird
+    Returns: (paare, bericht)
+    """
+    start = time.perf_counter()
+    n_s, n_l = zustand.n_schueler, zustand.n_lehrkraefte
+    static = zustand.static_matrix
+    kons = zustand.konsistenz_bonus
+    gruppen = np.asarray(zustand.gruppen, dtype=int)
+    soll = np.asarray(zustand.soll, dtype=int)
+    spalten = np.arange(n_l)
+
+    # Lastverteilung je Spalte und Anzahl vorab (Anzahl bis Soll +1)
+    last = np.array([[zustand.load_score(k, int(soll[l_pos])) for k in range(int(soll.max(initial=0)) + 2)]
+                     for l_pos in range(n_l)]).reshape(n_l, -1)
+    kapazitaet = soll + 1
+
+    # Anzahl pro Gruppe und Schülerinnen pro (Gruppe, Einrichtung); eine vorbelegte Einrichtung
+    # zählt wie eine bereits zugeteilte Schülerin (Bonus ab der ersten)
+    einrichtung_ids, n_f = einrichtung_spalten(zustand.einrichtung_ids, zustand.betreute_einrichtungen)
+    anzahl = np.array(zustand.anzahl, dtype=int)
+    pro_einrichtung = np.zeros((len(anzahl), n_f), dtype=int)
+    for gruppe, einrichtungen in enumerate(zustand.betreute_einrichtungen):
+        pro_einrichtung[gruppe, [e if e >= 0 else n_f - 1 for e in einrichtungen]] = 1
+    lehrkraft = np.full(n_s, -1)
+    for s_pos, l_pos in start_paare:
+        lehrkraft[s_pos] = l_pos
+        anzahl[gruppen[l_pos]] += 1
+        pro_einrichtung[gruppen[l_pos], einrichtung_ids[s_pos]] += 1
+
+    def kennzahlen() -> Tuple[float, int]:
+        """Einrichtungen pro Lehrkraft (Mittel) und Σ |Ist − Soll|"""
+        soll_gruppe = np.zeros(len(anzahl), dtype=int)
+        soll_gruppe[gruppen] = soll
+        betreut = (pro_einrichtung > 0).sum(axis=1)
+        return float(betreut.mean()) if len(betreut) else 0.0, int(np.abs(anzahl - soll_gruppe).sum())
+
+    def bester_kandidat(s1: int) -> Tuple[float, List[Tuple[int, int]], Optional[int]]:
+        """Beste Verschiebung bzw. bester Tausch für s1: (Differenz, neue Paare, Tauschpartner)"""
+        l1 = lehrkraft[s1]
+        g1, f1 = gruppen[l1], einrichtung_ids[s1]
+        bonus_weg = kons * (pro_einrichtung[g1, f1] >= 2)
+
+        # Verschieben: s1 wechselt zu Spalte l2 (andere Gruppe nur mit freier Kapazität)
+        ziel = gruppen
+        andere = ziel != g1
+        verschieben = static[s1] - static[s1, l1]
+        verschieben = verschieben + np.where(
+            andere, last[spalten, np.minimum(anzahl[ziel], last.shape[1] - 1)]
+            - zustand.load_score(int(anzahl[g1]) - 1, int(soll[l1]))
+            + kons * (pro_einrichtung[ziel, f1] >= 1) - bonus_weg, 0)
+        verschieben[(andere & (anzahl[ziel] >= kapazitaet)) | (spalten == l1)] = -np.inf
+        l2 = int(np.argmax(verschieben))
+        bester = (float(verschieben[l2]), [(s1, l2)], None)
+
+        # Tauschen: s1 übernimmt die Lehrkraft von s2 und umgekehrt; Anzahl bleibt gleich
+        partner = np.flatnonzero(lehrkraft >= 0)
+        l_partner = lehrkraft[partner]
+        g2, f2 = gruppen[l_partner], einrichtung_ids[partner]
+        tauschen = (static[s1, l_partner] + static[partner, l1]
+                    - static[s1, l1] - static[partner, l_partner])
+        # Konsistenz ändert sich nur zwischen verschiedenen Gruppen und Einrichtungen; dann
+        # sind die vier betroffenen (Gruppe, Einrichtung)-Zähler verschieden
+        tauschen = tauschen + np.where(
+            (g2 != g1) & (f2 != f1),
+            kons * ((pro_einrichtung[g2, f1] >= 1).astype(int) + (pro_einrichtung[g1, f2] >= 1)
+                    - (pro_einrichtung[g2, f2] >= 2)) - bonus_weg, 0)
+        tauschen[l_partner == l1] = -np.inf
+        if len(partner):
+            i = int(np.argmax(tauschen))
+            if tauschen[i] > bester[0]:
+                s2, l2 = int(partner[i]), int(l_partner[i])
+                bester = (float(tauschen[i]), [(s1, l2), (s2, int(l1))], s2)
+        return bester
+
+    einrichtungen_vorher, abweichung_vorher = kennzahlen()
+    start_wert = zielwert(zustand, start_paare)
+    verbesserung, iterationen, aufgeloest = 0.0, 0, 0
+    lokales_optimum = False
+    while iterationen < max_iterationen and time.perf_counter() - start < zeitlimit_s:
+        verbessert = False
+        for s1 in np.flatnonzero(lehrkraft >= 0):
+            if iterationen >= max_iterationen or time.perf_counter() - start >= zeitlimit_s:
+                break
+            while True:
+                delta, neue_paare, s2 = bester_kandidat(int(s1))
+                offene_paare = [paar for paar in neue_paare if offen is not None and offen[paar]]
+                if delta <= 1e-9 or not offene_paare:
+                    break
+                # Scores offener Paare sinken beim Auflösen nur → neu bewerten
+                aufloesen(offene_paare)
+                aufgeloest += len(offene_paare)
+            if delta <= 1e-9:
+                continue
+            for s_pos, l_neu in neue_paare:
+                l_alt, f = lehrkraft[s_pos], einrichtung_ids[s_pos]
+                anzahl[gruppen[l_alt]] -= 1
+                pro_einrichtung[gruppen[l_alt], f] -= 1
+                anzahl[gruppen[l_neu]] += 1
+                pro_einrichtung[gruppen[l_neu], f] += 1
+            for s_pos, l_neu in neue_paare:
+                lehrkraft[s_pos] = l_neu
+            verbesserung += delta
+            iterationen += 1
+            verbessert = True
+        if not verbessert:
+            lokales_optimum = True
+            break
+
+    einrichtungen_nachher, abweichung_nachher = kennzahlen()
+    paare = [(int(s_pos), int(lehrkraft[s_pos])) for s_pos in np.flatnonzero(lehrkraft >= 0)]
+    bericht = {
+        'start_zielwert': start_wert, 'zielwert': start_wert + verbesserung, 'verbesserung': verbesserung,
+        'iterationen': iterationen, 'lokales_optimum': lokales_optimum, 'aufgeloest': aufgeloest,
+        'einrichtungen_pro_lehrkraft': (einrichtungen_vorher, einrichtungen_nachher),
+        'soll_abweichung': (abweichung_vorher, abweichung_nachher),
+        'laufzeit_s': time.perf_counter() - start,
+    }
+    return paare, bericht
+
+
+class LokaleSucheEngine(FesteZuteilungEngine):
+    """
+    Verbesserungsstufe nach Greedy/Heap (zuteilung.lokale_suche): Die Start-Engine läuft auf
+    einer Kopie des Zustands bis zum Ende, lokale_suche verbessert ihre Paare, ausgegeben
+    wird das Ergebnis wie bei FesteZuteilungEngine. Der Bericht steht in self.bericht.
+    """
+
+    def __init__(self, zustand: ZuteilungsZustand, start_engine, max_iterationen: int = 10000,
+                 zeitlimit_s: float = 0.5, offen: Optional[np.ndarray] = None,
+                 aufloesen: Callable[[List[Tuple[int, int]]], Sequence[int]] = None):
+        start_paare = []
+        while True:
+            match = start_engine.naechstes_match()
+            if match is None:
+                break
+            start_engine.zuteilen(*match)
+            start_paare.append(match)
+        paare, self.bericht = lokale_suche(zustand, start_paare, max_iterationen, zeitlimit_s,
+                                           offen, aufloesen)
+        super().__init__(zustand, paare)
+
+
+class MilpEngine(FesteZuteilungEngine):
+    """
+    Exakte Optimierung über die Score-Matrix (siehe optimiere_milp), Greedy als Startlösung.
+    Der Bericht (Zielwerte, Gap, Laufzeit) steht anschließend in self.bericht.
+    """
+
+    def __init__(self, zustand: ZuteilungsZustand, zeitlimit_s: float = 60):
+        greedy_paare = greedy_loesen(zustand.leere_kopie())
+        paare, self.bericht = optimiere_milp(zustand, greedy_paare, zeitlimit_s)
+        super().__init__(zustand, paare)
+
+
+ENGINES = {
+    'greedy': GreedyEngine,
+    'heap': HeapEngine,
+    'milp': MilpEngine,
+}